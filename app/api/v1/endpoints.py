@@ -1,12 +1,18 @@
 # FastAPI API endpoints
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import json
+from typing import Any, AsyncIterator, Dict, List
 
-from app.internal.llm.chain import (
-    build_stock_analysis_chain_with_retry,
-    get_analysis_prompt_template,
-    get_llm_client,
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.configs.config import get_config
+from app.internal.llm.provider import AnalysisChainProvider
+from app.services.analysis.stock_trend_pipeline import (
+    analyze_stock_trend_signals_batch,
 )
+from app.utils.metrics import PROMETHEUS_CONTENT_TYPE, metrics
 
 router = APIRouter()
 
@@ -21,16 +27,44 @@ class StockAnalysisResponse(BaseModel):
     reason: str
 
 
+class StockBatchSignalRequest(BaseModel):
+    stock_ids: List[str] = Field(min_length=1)
+
+
+class StockBatchSignalResponse(BaseModel):
+    signals: Dict[str, Dict[str, Any]]
+
+
+class StockReport(BaseModel):
+    suggestion: str
+    reason: str
+
+
+class StockBatchReportResponse(BaseModel):
+    reports: Dict[str, StockReport]
+    failures: Dict[str, str]
+
+
+def get_analysis_chain_provider(request: Request) -> AnalysisChainProvider:
+    """Return the provider created in the app lifespan (built lazily if missing)."""
+    provider = getattr(request.app.state, "analysis_chain_provider", None)
+    if provider is None:
+        provider = AnalysisChainProvider.from_config()
+        request.app.state.analysis_chain_provider = provider
+    return provider
+
+
 @router.post("/stock/llm-report", response_model=StockAnalysisResponse)
-async def get_stock_llm_report(request: StockAnalysisRequest):
+async def get_stock_llm_report(
+    request: StockAnalysisRequest,
+    provider: AnalysisChainProvider = Depends(get_analysis_chain_provider),
+):
     """
     Generate a stock analysis report using LLM based on technical indicators.
     Returns a clear, actionable trading suggestion and rationale.
     """
-    llm_client = get_llm_client()
-    prompt_template = get_analysis_prompt_template()
-    chain = build_stock_analysis_chain_with_retry(llm_client, prompt_template)
     try:
+        chain = provider.get_chain()
         llm_result = await chain.ainvoke(request.stock_id)
         # Ensure the response is in the expected JSON format
         return StockAnalysisResponse(
@@ -40,3 +74,149 @@ async def get_stock_llm_report(request: StockAnalysisRequest):
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM analysis failed: {str(e)}")
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/stock/llm-report/stream")
+async def stream_stock_llm_report(
+    request: StockAnalysisRequest,
+    provider: AnalysisChainProvider = Depends(get_analysis_chain_provider),
+) -> StreamingResponse:
+    """
+    Stream a stock analysis report as server-sent events.
+    Events, in order: `signal` (the computed signal dict, sent as soon as the data stage
+    finishes), `token` (LLM text deltas), `suggestion` (once the field is complete) and
+    `report` (the parsed JSON response). Failures end the stream with an `error` event.
+    """
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event, data in provider.stream_report(request.stock_id):
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"detail": f"LLM analysis failed: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/stock/batch-signals", response_model=StockBatchSignalResponse)
+async def get_stock_batch_signals(request: StockBatchSignalRequest):
+    """
+    Compute technical trend signals for many stocks in one request.
+    K-lines are downloaded in bulk and enriched concurrently; no LLM call is made.
+
+    Example request: {"stock_ids": ["2330.TW", "2317.TW"]}
+    Example response: {"signals": {"2330.TW": {"signal_status": "ok", ...}, ...}}
+    """
+    config = get_config()
+    if len(request.stock_ids) > config.analysis.max_batch_size:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {config.analysis.max_batch_size} stock_ids per request",
+        )
+    try:
+        signals = await run_in_threadpool(
+            analyze_stock_trend_signals_batch,
+            request.stock_ids,
+            config.analysis.max_workers,
+            config.analysis.download_chunk_size,
+            config.analysis.backend,
+            config.analysis.compact_indicators,
+        )
+        return StockBatchSignalResponse(signals=signals)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Batch signal analysis failed: {str(e)}"
+        )
+
+
+@router.post("/stock/batch-llm-report", response_model=StockBatchReportResponse)
+async def get_stock_batch_llm_report(
+    request: StockBatchSignalRequest,
+    provider: AnalysisChainProvider = Depends(get_analysis_chain_provider),
+):
+    """
+    LLM reports for many stocks, several tickers per completion (see `llm.batch_*`).
+    Tickers without usable signals or without a valid answer after `llm.retry` attempts
+    are listed in `failures`.
+
+    Example request: {"stock_ids": ["2330.TW", "2317.TW"]}
+    Example response: {"reports": {"2330.TW": {"suggestion": "Long", "reason": "..."}},
+                       "failures": {"2317.TW": "..."}}
+    """
+    config = provider.config
+    if len(request.stock_ids) > config.analysis.max_batch_size:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {config.analysis.max_batch_size} stock_ids per request",
+        )
+    try:
+        signals = await run_in_threadpool(
+            analyze_stock_trend_signals_batch,
+            request.stock_ids,
+            config.analysis.max_workers,
+            config.analysis.download_chunk_size,
+            config.analysis.backend,
+            config.analysis.compact_indicators,
+        )
+        failures = {
+            stock_id: signal.get("reason", "invalid signal")
+            for stock_id, signal in signals.items()
+            if signal.get("signal_status") == "invalid"
+        }
+        result = await provider.aanalyze_batch(
+            {k: v for k, v in signals.items() if k not in failures}
+        )
+        failures.update(result.failures)
+        return StockBatchReportResponse(reports=result.reports, failures=failures)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Batch LLM analysis failed: {str(e)}"
+        )
+
+
+@router.get("/runtime/stats")
+async def get_runtime_stats(
+    provider: AnalysisChainProvider = Depends(get_analysis_chain_provider),
+) -> Dict[str, Any]:
+    """
+    Reuse metrics for the shared LLM client/chain, request coalescing per analysis stage,
+    estimated prompt tokens, the LLM scheduler (concurrency limit, queue depth per
+    priority, throttles) and the LLM response cache.
+
+    Example response: {"analysis_chain": {"requests_served": 10, "chain_builds": 1, ...}}
+    """
+    stats: Dict[str, Any] = {
+        "analysis_chain": provider.stats(),
+        "coalescing": provider.flights.stats(),
+        "prompt_tokens": provider.prompt_tokens.stats(),
+    }
+    if provider.scheduler is not None:
+        stats["llm_scheduler"] = provider.scheduler.stats()
+    if provider.response_cache is not None:
+        stats["llm_cache"] = provider.response_cache.stats()
+    return stats
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(
+    provider: AnalysisChainProvider = Depends(get_analysis_chain_provider),
+) -> PlainTextResponse:
+    """
+    Prometheus text-format metrics: per-stage latency histograms
+    (`analysis_stage_seconds{stage=fetch|enrich|signals|prompt|llm|parse}`), per-indicator
+    timings, cache, retry, throttle and coalescing counters, and scheduler gauges.
+    Returns 404 when `metrics.enabled` is false.
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    provider.update_metrics()
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -4,9 +4,17 @@ Configuration management for the agent, using Pydantic models and YAML loading.
 
 import os
 from functools import lru_cache
+from typing import Dict
 
 import yaml
-from pydantic import BaseModel, SecretStr, StrictFloat, StrictInt, StrictStr
+from pydantic import (
+    BaseModel,
+    SecretStr,
+    StrictBool,
+    StrictFloat,
+    StrictInt,
+    StrictStr,
+)
 from pydantic_settings import BaseSettings
 
 
@@ -19,11 +27,59 @@ class AppConfig(BaseModel):
     log_level: StrictStr
 
 
+class LoggingConfig(BaseModel):
+    enabled: StrictBool = True  # configure stdout/file sinks at startup (app.main)
+    queued: StrictBool = True  # write log lines from a background thread
+    path: StrictStr = "app.log"
+    queue_size: StrictInt = 10000
+    batch_size: StrictInt = 256
+    flush_interval_seconds: StrictFloat = 0.5
+    drop_policy: StrictStr = "drop_new"  # "drop_new" or "drop_oldest"
+    # Keep one in N records whose message mentions the event
+    sample_every: Dict[StrictStr, StrictInt] = {"health_check": 100}
+
+
+class LLMCacheConfig(BaseModel):
+    enabled: StrictBool = False
+    backend: StrictStr = "memory"  # "memory" or "disk"
+    ttl_seconds: StrictInt = 3600
+    max_entries: StrictInt = 1024
+    path: StrictStr = "./data/llm_cache.sqlite3"
+
+
+class LLMSchedulerConfig(BaseModel):
+    enabled: StrictBool = True
+    requests_per_minute: StrictInt = 600
+    tokens_per_minute: StrictInt = 600000
+    initial_concurrency: StrictInt = 8
+    min_concurrency: StrictInt = 1
+    max_concurrency: StrictInt = 64
+    latency_target_seconds: StrictFloat = 30.0
+    decrease_factor: StrictFloat = 0.5
+    decrease_cooldown_seconds: StrictFloat = 1.0
+    max_throttle_retries: StrictInt = 5
+    default_retry_after_seconds: StrictFloat = 1.0
+    # 5xx, timeouts and connection errors (the SDK's own retries are off)
+    max_transient_retries: StrictInt = 2
+    transient_backoff_seconds: StrictFloat = 0.5
+
+
 class LLMConfig(BaseModel):
     stock_analyzer_prompt_path: StrictStr
     temperature: StrictFloat
     max_tokens: StrictInt
     retry: StrictInt
+    cache: LLMCacheConfig = LLMCacheConfig()
+    max_connections: StrictInt = 100
+    max_keepalive_connections: StrictInt = 20
+    keepalive_expiry_seconds: StrictFloat = 30.0
+    request_timeout_seconds: StrictFloat = 60.0
+    signal_format: StrictStr = "json"  # "json" or "compact"
+    batch_prompt_path: StrictStr = "./app/prompts/stock_batch_analyzer_prompt.md"
+    batch_max_tickers: StrictInt = 20
+    batch_output_tokens_per_ticker: StrictInt = 160
+    batch_max_prompt_tokens: StrictInt = 24000
+    scheduler: LLMSchedulerConfig = LLMSchedulerConfig()
 
 
 class ShioajiConfig(BaseModel):
@@ -38,11 +94,52 @@ class AzureOpenAIConfig(BaseModel):
     subscription_key: SecretStr
 
 
+class BarCacheConfig(BaseModel):
+    enabled: StrictBool = False
+    path: StrictStr = "./data/bar_cache.sqlite3"
+    timezone: StrictStr = "Asia/Taipei"
+    market_open: StrictStr = "09:00"
+    market_close: StrictStr = "13:30"
+    intraday_ttl_seconds: StrictInt = 300
+    lookback_months: StrictInt = 3
+
+
+class BarArchiveConfig(BaseModel):
+    path: StrictStr = "./data/bar_archive"
+
+
+class ScreeningConfig(BaseModel):
+    scanner_count: StrictInt = 200
+    snapshot_chunk_size: StrictInt = 200  # capped at 500 contracts per call
+    snapshot_concurrency: StrictInt = 2
+    full_market: StrictBool = False  # scan all TSE/OTC stocks instead of AmountRank
+    volume_ratio: StrictFloat = 1.1
+    top_n: StrictInt = 10
+
+
+class AnalysisConfig(BaseModel):
+    max_workers: StrictInt = 4
+    backend: StrictStr = "thread"  # "thread" or "process"
+    compact_indicators: StrictBool = False
+    max_batch_size: StrictInt = 2000
+    download_chunk_size: StrictInt = 100
+    bar_cache: BarCacheConfig = BarCacheConfig()
+    bar_archive: BarArchiveConfig = BarArchiveConfig()
+    screening: ScreeningConfig = ScreeningConfig()
+
+
+class MetricsConfig(BaseModel):
+    enabled: StrictBool = True
+
+
 class Config(BaseSettings):
     app: AppConfig
     llm: LLMConfig
     shioaji: ShioajiConfig
     azure_openai: AzureOpenAIConfig
+    analysis: AnalysisConfig = AnalysisConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    logging: LoggingConfig = LoggingConfig()
 
 
 @lru_cache()
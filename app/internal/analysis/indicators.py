@@ -3,7 +3,9 @@ Technical indicator calculation and stock analysis logic.
 All functions are pure and stateless, suitable for use in async API services.
 """
 
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 
 def calculate_moving_averages(df: pd.DataFrame) -> pd.DataFrame:
@@ -101,6 +103,29 @@ def calculate_vma(
     return df
 
 
+def rolling_mean_abs_deviation(
+    values: np.ndarray, window: int, chunk_size: int = 65536
+) -> np.ndarray:
+    """
+    Rolling mean absolute deviation along axis 0 using strided windows.
+    Works on 1-D series and 2-D (date × ticker) arrays; windows containing NaN yield NaN.
+    Rows are processed in chunks to bound the temporary window matrix.
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, np.nan)
+    n_rows = values.shape[0]
+    if window <= 0 or n_rows < window:
+        return result
+    windows = sliding_window_view(values, window, axis=0)
+    for start in range(0, windows.shape[0], chunk_size):
+        block = windows[start : start + chunk_size]
+        block_mean = block.mean(axis=-1, keepdims=True)
+        result[start + window - 1 : start + window - 1 + len(block)] = np.abs(
+            block - block_mean
+        ).mean(axis=-1)
+    return result
+
+
 def calculate_cci(df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
     """
     計算順勢指標 (Commodity Channel Index, CCI)。
@@ -109,8 +134,9 @@ def calculate_cci(df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
     """
     typical_price = (df["high"] + df["low"] + df["close"]) / 3
     moving_avg = typical_price.rolling(window=window).mean()
-    mean_deviation = typical_price.rolling(window=window).apply(
-        lambda x: abs(x - x.mean()).mean(), raw=True
+    mean_deviation = pd.Series(
+        rolling_mean_abs_deviation(typical_price.to_numpy(dtype=float), window),
+        index=typical_price.index,
     )
     df["cci"] = (typical_price - moving_avg) / (0.015 * mean_deviation)
     return df
@@ -137,15 +163,11 @@ def calculate_obv(df: pd.DataFrame) -> pd.DataFrame:
     邏輯: 根據股價漲跌來累計成交量。價漲則加，價跌則減。
     用途: 衡量買賣壓力，觀察量價關係。OBV趨勢應與價格趨勢同步，若出現背離 (如價創新高但OBV未創新高)，可能為趨勢反轉的警訊。
     """
-    obv = [0]
-    for i in range(1, len(df)):
-        if df["close"].iloc[i] > df["close"].iloc[i - 1]:
-            obv.append(obv[-1] + df["volume"].iloc[i])
-        elif df["close"].iloc[i] < df["close"].iloc[i - 1]:
-            obv.append(obv[-1] - df["volume"].iloc[i])
-        else:
-            obv.append(obv[-1])
-    df["obv"] = obv
+    # Flat bars and the first bar add nothing; a NaN volume on an up/down bar turns OBV
+    # NaN from there on, as the cumulative definition implies
+    direction = np.sign(df["close"].diff()).fillna(0)
+    flow = (direction * df["volume"]).where(direction != 0, 0.0)
+    df["obv"] = flow.cumsum(skipna=False)
     return df
 
 
@@ -0,0 +1,282 @@
+"""
+Vectorized multi-ticker technical indicators over a (date × ticker) panel.
+A panel is a dict of wide DataFrames (rows: timestamps, columns: tickers), one per
+OHLCV field. Every indicator is computed for all tickers in one pass and matches the
+single-ticker functions in `indicators.py` numerically.
+Tickers are aligned on the union of timestamps; leading gaps (shorter histories) are
+handled exactly, interior gaps from mismatched trading calendars are not.
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.internal.analysis.indicators import rolling_mean_abs_deviation
+
+PANEL_FIELDS = ["open", "high", "low", "close", "volume"]
+
+Panel = Dict[str, pd.DataFrame]
+
+
+def build_ohlcv_panel(df: pd.DataFrame, ticker_level: int = 0) -> Panel:
+    """
+    Convert a stacked OHLCV frame with a (ticker, timestamp) MultiIndex into a panel.
+    Args:
+        df (pd.DataFrame): Stacked frame with [open, high, low, close, volume] columns.
+        ticker_level (int): MultiIndex level holding the ticker.
+    Returns:
+        Panel: Wide DataFrame per field, indexed by timestamp with one column per ticker.
+    """
+    if not isinstance(df.index, pd.MultiIndex):
+        raise ValueError("Stacked OHLCV frame must have a (ticker, timestamp) index")
+    fields = [field for field in PANEL_FIELDS if field in df.columns]
+    wide = df[fields].unstack(level=ticker_level)
+    return {field: wide[field].astype(float) for field in fields}
+
+
+def build_ohlcv_panel_from_frames(frames: Mapping[str, pd.DataFrame]) -> Panel:
+    """
+    Build a panel from per-ticker OHLCV frames (e.g. the output of a bulk download).
+    Args:
+        frames (Mapping[str, pd.DataFrame]): Single-ticker frames keyed by ticker.
+    Returns:
+        Panel: Wide DataFrame per field, aligned on the union of timestamps.
+    """
+    fields = [
+        field
+        for field in PANEL_FIELDS
+        if all(field in frame.columns for frame in frames.values())
+    ]
+    if not frames:
+        return {field: pd.DataFrame(dtype=float) for field in fields}
+    index = None
+    for frame in frames.values():
+        if index is None:
+            index = frame.index
+        elif not frame.index.equals(index):
+            index = index.union(frame.index)
+    # Stack NumPy columns directly; reindex only frames off the common calendar
+    aligned = [
+        frame if frame.index.equals(index) else frame.reindex(index)
+        for frame in frames.values()
+    ]
+    return {
+        field: pd.DataFrame(
+            np.column_stack([frame[field].to_numpy(dtype=float) for frame in aligned]),
+            index=index,
+            columns=list(frames),
+        )
+        for field in fields
+    }
+
+
+def build_ohlcv_panel_from_arrays(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    volume: np.ndarray,
+    open_: Optional[np.ndarray] = None,
+    index: Optional[Sequence] = None,
+    tickers: Optional[Sequence[str]] = None,
+) -> Panel:
+    """
+    Wrap 2-D NumPy arrays of shape (n_dates, n_tickers) into a panel without copying.
+    Args:
+        close, high, low, volume (np.ndarray): Field arrays with identical shapes.
+        open_ (np.ndarray, optional): Open prices, same shape.
+        index (Sequence, optional): Timestamps for the rows.
+        tickers (Sequence[str], optional): Ticker labels for the columns.
+    Returns:
+        Panel: Wide DataFrame per field.
+    """
+    arrays = {"high": high, "low": low, "close": close, "volume": volume}
+    if open_ is not None:
+        arrays["open"] = open_
+    shape = np.shape(close)
+    for field, values in arrays.items():
+        if np.ndim(values) != 2 or np.shape(values) != shape:
+            raise ValueError(f"Field '{field}' must be a 2-D array of shape {shape}")
+    return {
+        field: pd.DataFrame(
+            np.asarray(arrays[field], dtype=float),
+            index=index,
+            columns=tickers,
+            copy=False,
+        )
+        for field in PANEL_FIELDS
+        if field in arrays
+    }
+
+
+def stack_panel(panel: Mapping[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Convert a panel back into a stacked frame indexed by (ticker, timestamp).
+    Rows before a ticker's first observation are dropped.
+    """
+    stacked = pd.concat(
+        {name: frame.stack(future_stack=True) for name, frame in panel.items()}, axis=1
+    )
+    stacked = stacked.swaplevel(0, 1).sort_index()
+    stacked.index.names = ["ticker", "timestamp"]
+    if "close" in stacked.columns:
+        stacked = stacked[stacked["close"].notna()]
+    return stacked
+
+
+def panel_moving_averages(panel: Panel) -> Panel:
+    """5/10/20 period moving averages of close. See `calculate_moving_averages`."""
+    close = panel["close"]
+    return {
+        "5ma": close.rolling(window=5).mean(),
+        "10ma": close.rolling(window=10).mean(),
+        "20ma": close.rolling(window=20).mean(),
+    }
+
+
+def panel_bollinger_bands(
+    panel: Panel, window: int = 20, num_std_dev: int = 2
+) -> Panel:
+    """Bollinger Bands of close. See `calculate_bollinger_bands`."""
+    close = panel["close"]
+    middle = close.rolling(window=window).mean()
+    std = close.rolling(window=window).std()
+    return {
+        "bollinger_middle": middle,
+        "bollinger_upper": middle + num_std_dev * std,
+        "bollinger_lower": middle - num_std_dev * std,
+    }
+
+
+def _panel_true_range(panel: Panel) -> pd.DataFrame:
+    prev_close = panel["close"].shift()
+    high_low = panel["high"] - panel["low"]
+    high_close = (panel["high"] - prev_close).abs()
+    low_close = (panel["low"] - prev_close).abs()
+    # Element-wise max that skips NaN, matching DataFrame.max(axis=1) per ticker
+    return np.fmax(np.fmax(high_low, high_close), low_close)
+
+
+def panel_atr(panel: Panel, window: int = 14) -> Panel:
+    """Average True Range. See `calculate_atr`."""
+    return {"atr": _panel_true_range(panel).rolling(window=window).mean()}
+
+
+def panel_rsi(panel: Panel, window: int = 14) -> Panel:
+    """Relative Strength Index. See `calculate_rsi`."""
+    close = panel["close"]
+    delta = close.diff()
+    # Keep rows before a ticker's first bar as NaN so they don't fill the window
+    listed = close.notna()
+    gain = delta.where(delta > 0, 0).where(listed).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).where(listed).rolling(window=window).mean()
+    rs = gain / loss
+    return {"rsi": 100 - (100 / (1 + rs))}
+
+
+def panel_macd(
+    panel: Panel,
+    short_period: int = 12,
+    long_period: int = 26,
+    signal_period: int = 9,
+) -> Panel:
+    """MACD line and signal line. See `calculate_macd`."""
+    close = panel["close"]
+    ema_short = close.ewm(span=short_period, adjust=False).mean()
+    ema_long = close.ewm(span=long_period, adjust=False).mean()
+    macd = ema_short - ema_long
+    return {
+        "macd": macd,
+        "signal_line": macd.ewm(span=signal_period, adjust=False).mean(),
+    }
+
+
+def panel_vma(panel: Panel, short_window: int = 5, long_window: int = 20) -> Panel:
+    """Volume moving averages. See `calculate_vma`."""
+    volume = panel["volume"]
+    return {
+        "vma_short": volume.rolling(window=short_window).mean(),
+        "vma_long": volume.rolling(window=long_window).mean(),
+    }
+
+
+def panel_cci(panel: Panel, window: int = 20) -> Panel:
+    """Commodity Channel Index. See `calculate_cci`."""
+    typical_price = (panel["high"] + panel["low"] + panel["close"]) / 3
+    moving_avg = typical_price.rolling(window=window).mean()
+    mean_deviation = pd.DataFrame(
+        rolling_mean_abs_deviation(typical_price.to_numpy(), window),
+        index=typical_price.index,
+        columns=typical_price.columns,
+    )
+    return {"cci": (typical_price - moving_avg) / (0.015 * mean_deviation)}
+
+
+def panel_kdj(panel: Panel, window: int = 9) -> Panel:
+    """Stochastic oscillator (KDJ). See `calculate_kdj`."""
+    low_min = panel["low"].rolling(window=window).min()
+    high_max = panel["high"].rolling(window=window).max()
+    rsv = (panel["close"] - low_min) / (high_max - low_min) * 100
+    kdj_k = rsv.ewm(com=2).mean()
+    kdj_d = kdj_k.ewm(com=2).mean()
+    return {"kdj_k": kdj_k, "kdj_d": kdj_d, "kdj_j": 3 * kdj_k - 2 * kdj_d}
+
+
+def panel_obv(panel: Panel) -> Panel:
+    """On-Balance Volume, starting at 0 on each ticker's first bar. See `calculate_obv`."""
+    close = panel["close"]
+    direction = np.sign(close.diff()).fillna(0)
+    flow = (direction * panel["volume"]).where(direction != 0, 0.0)
+    return {"obv": flow.cumsum(skipna=False).where(close.notna())}
+
+
+def panel_adx(panel: Panel, window: int = 14) -> Panel:
+    """Average Directional Index. See `calculate_adx`."""
+    up_move = panel["high"].diff()
+    down_move = panel["low"].diff().abs()
+    plus_dm = ((up_move > down_move) & (up_move > 0)) * up_move
+    minus_dm = ((down_move > up_move) & (down_move > 0)) * down_move
+    atr = _panel_true_range(panel).rolling(window=window).mean()
+    plus_di = 100 * (plus_dm.rolling(window=window).sum() / atr)
+    minus_di = 100 * (minus_dm.rolling(window=window).sum() / atr)
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
+    return {"adx": dx.rolling(window=window).mean()}
+
+
+def calculate_panel_indicators(
+    panel: Mapping[str, pd.DataFrame], include_ohlcv: bool = True
+) -> Panel:
+    """
+    Compute every indicator used by `enrich_with_all_indicators` for all tickers at once.
+    Args:
+        panel (Mapping[str, pd.DataFrame]): OHLCV panel (see `build_ohlcv_panel`).
+        include_ohlcv (bool): Also return the input OHLCV fields in the result.
+    Returns:
+        Panel: Wide DataFrame per output column (e.g. "macd", "rsi", "obv").
+    """
+    missing = [
+        field for field in ["high", "low", "close", "volume"] if field not in panel
+    ]
+    if missing:
+        raise ValueError(f"Panel is missing fields: {missing}")
+    panel = dict(panel)
+    result: Panel = dict(panel) if include_ohlcv else {}
+    for compute in (
+        panel_moving_averages,
+        panel_macd,
+        panel_vma,
+        panel_cci,
+        panel_rsi,
+        panel_bollinger_bands,
+        panel_atr,
+        panel_kdj,
+        panel_obv,
+        panel_adx,
+    ):
+        result.update(compute(panel))
+    return result
+
+
+def panel_tickers(panel: Mapping[str, pd.DataFrame]) -> List[str]:
+    """Return the ticker labels of a panel."""
+    return list(next(iter(panel.values())).columns)
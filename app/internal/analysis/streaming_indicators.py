@@ -0,0 +1,383 @@
+"""
+Incremental (streaming) technical indicators for a single ticker.
+`StreamingIndicatorState` keeps the rolling-window and EMA state needed by every indicator in
+`indicators.py`, so appending one bar updates all of them in constant time (independent of
+history length) and reproduces the batch functions' values.
+"""
+
+import copy
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import pandas as pd
+
+NAN = float("nan")
+
+# Output columns in the same order `enrich_with_all_indicators` produces them
+STREAMING_COLUMNS = [
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "5ma",
+    "10ma",
+    "20ma",
+    "macd",
+    "signal_line",
+    "vma_short",
+    "vma_long",
+    "cci",
+    "rsi",
+    "bollinger_middle",
+    "bollinger_upper",
+    "bollinger_lower",
+    "atr",
+    "kdj_k",
+    "kdj_d",
+    "kdj_j",
+    "obv",
+    "adx",
+]
+
+
+def _is_nan(value: float) -> bool:
+    return value != value
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """IEEE-754 division (x/0 -> ±inf, 0/0 -> NaN), matching pandas arithmetic."""
+    if denominator == 0:
+        if _is_nan(numerator) or numerator == 0:
+            return NAN
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+class _RollingWindow:
+    """
+    Fixed-size window with a running sum. Like pandas rolling(window) with the default
+    min_periods, aggregates are NaN until the window is full or while it holds a NaN.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: Deque[float] = deque(maxlen=window)
+        self.total = 0.0
+        self.nan_count = 0
+        self._pushes_since_resync = 0
+
+    def push(self, value: float) -> None:
+        if len(self.values) == self.window:
+            evicted = self.values[0]
+            if _is_nan(evicted):
+                self.nan_count -= 1
+            else:
+                self.total -= evicted
+        self.values.append(value)
+        if _is_nan(value):
+            self.nan_count += 1
+        else:
+            self.total += value
+        # Periodically rebuild the sum to stop floating-point drift (amortized O(1))
+        self._pushes_since_resync += 1
+        if self._pushes_since_resync >= self.window:
+            self.total = math.fsum(v for v in self.values if not _is_nan(v))
+            self._pushes_since_resync = 0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.window and self.nan_count == 0
+
+    def sum(self) -> float:
+        return self.total if self.ready else NAN
+
+    def mean(self) -> float:
+        return self.total / self.window if self.ready else NAN
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1)."""
+        if not self.ready or self.window < 2:
+            return NAN
+        mean = self.total / self.window
+        variance = math.fsum((v - mean) ** 2 for v in self.values) / (self.window - 1)
+        return math.sqrt(variance)
+
+    def mean_abs_deviation(self) -> float:
+        if not self.ready:
+            return NAN
+        mean = self.total / self.window
+        return math.fsum(abs(v - mean) for v in self.values) / self.window
+
+
+class _RollingExtreme:
+    """Rolling max (or min) over a fixed window using a monotonic deque."""
+
+    def __init__(self, window: int, maximum: bool):
+        self.window = window
+        self.maximum = maximum
+        self.index = -1
+        self.candidates: Deque[tuple[int, float]] = deque()
+        self.nan_positions: Deque[int] = deque()
+
+    def push(self, value: float) -> None:
+        self.index += 1
+        while self.candidates and self.candidates[0][0] <= self.index - self.window:
+            self.candidates.popleft()
+        while self.nan_positions and self.nan_positions[0] <= self.index - self.window:
+            self.nan_positions.popleft()
+        if _is_nan(value):
+            self.nan_positions.append(self.index)
+            return
+        while self.candidates and (
+            self.candidates[-1][1] <= value
+            if self.maximum
+            else self.candidates[-1][1] >= value
+        ):
+            self.candidates.pop()
+        self.candidates.append((self.index, value))
+
+    def value(self) -> float:
+        if self.index + 1 < self.window or self.nan_positions or not self.candidates:
+            return NAN
+        return self.candidates[0][1]
+
+
+class _Ewm:
+    """
+    Exponentially weighted mean replicating pandas `ewm(...).mean()` with the default
+    ignore_na=False and min_periods=0, including NaN gaps.
+    """
+
+    def __init__(self, alpha: float, adjust: bool):
+        self.old_wt_factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.weighted = NAN
+        self.old_wt = 1.0
+
+    def push(self, value: float) -> float:
+        is_observation = not _is_nan(value)
+        if not _is_nan(self.weighted):
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = (
+                        self.old_wt * self.weighted + self.new_wt * value
+                    ) / (self.old_wt + self.new_wt)
+                if self.adjust:
+                    self.old_wt += self.new_wt
+                else:
+                    self.old_wt = 1.0
+        elif is_observation:
+            self.weighted = value
+        return self.weighted
+
+
+class StreamingIndicatorState:
+    """
+    Per-ticker indicator state updated one bar at a time.
+
+    Holds the EMA and rolling-window state for MA, MACD, VMA, CCI, RSI, Bollinger, ATR,
+    KDJ, OBV and ADX, plus a ring buffer of the last `history_size` enriched bars so that
+    `generate_trend_signals` can run from the state without the full history.
+    Window lengths use the defaults of the functions in `indicators.py`.
+    """
+
+    def __init__(self, history_size: int = 60):
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self.bar_count = 0
+        self.prev_close = NAN
+        self.prev_high = NAN
+        self.prev_low = NAN
+        # Moving averages
+        self.ma5 = _RollingWindow(5)
+        self.ma10 = _RollingWindow(10)
+        self.ma20 = _RollingWindow(20)
+        # MACD
+        self.ema_short = _Ewm(2 / (12 + 1), adjust=False)
+        self.ema_long = _Ewm(2 / (26 + 1), adjust=False)
+        self.ema_signal = _Ewm(2 / (9 + 1), adjust=False)
+        # VMA
+        self.vma_short = _RollingWindow(5)
+        self.vma_long = _RollingWindow(20)
+        # CCI
+        self.typical_price = _RollingWindow(20)
+        # RSI
+        self.gain = _RollingWindow(14)
+        self.loss = _RollingWindow(14)
+        # Bollinger Bands
+        self.bollinger = _RollingWindow(20)
+        # ATR
+        self.true_range = _RollingWindow(14)
+        # KDJ
+        self.low_min = _RollingExtreme(9, maximum=False)
+        self.high_max = _RollingExtreme(9, maximum=True)
+        self.kdj_k = _Ewm(1 / 3, adjust=True)
+        self.kdj_d = _Ewm(1 / 3, adjust=True)
+        # OBV
+        self.obv = 0.0
+        # ADX
+        self.plus_dm = _RollingWindow(14)
+        self.minus_dm = _RollingWindow(14)
+        self.dx = _RollingWindow(14)
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, history_size: int = 60
+    ) -> "StreamingIndicatorState":
+        """Warm up a state by replaying an OHLCV frame bar by bar."""
+        state = cls(history_size=history_size)
+        for timestamp, row in zip(
+            df.index,
+            df[["open", "high", "low", "close", "volume"]].itertuples(index=False),
+        ):
+            state.update(*row, timestamp=timestamp)
+        return state
+
+    def update(
+        self,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        timestamp: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        """
+        Append one bar and update every indicator in O(1).
+        Returns the enriched bar as a dict keyed by `STREAMING_COLUMNS`.
+        """
+        open_, high, low = float(open_), float(high), float(low)
+        close, volume = float(close), float(volume)
+        bar: Dict[str, Any] = {
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+        }
+
+        for window in (self.ma5, self.ma10, self.ma20, self.bollinger):
+            window.push(close)
+        bar["5ma"] = self.ma5.mean()
+        bar["10ma"] = self.ma10.mean()
+        bar["20ma"] = self.ma20.mean()
+
+        macd = self.ema_short.push(close) - self.ema_long.push(close)
+        bar["macd"] = macd
+        bar["signal_line"] = self.ema_signal.push(macd)
+
+        self.vma_short.push(volume)
+        self.vma_long.push(volume)
+        bar["vma_short"] = self.vma_short.mean()
+        bar["vma_long"] = self.vma_long.mean()
+
+        typical_price = (high + low + close) / 3
+        self.typical_price.push(typical_price)
+        bar["cci"] = _divide(
+            typical_price - self.typical_price.mean(),
+            0.015 * self.typical_price.mean_abs_deviation(),
+        )
+
+        delta = close - self.prev_close
+        self.gain.push(delta if delta > 0 else 0.0)
+        self.loss.push(-delta if delta < 0 else 0.0)
+        rs = _divide(self.gain.mean(), self.loss.mean())
+        bar["rsi"] = 100 - _divide(100, 1 + rs)
+
+        middle = self.bollinger.mean()
+        std = self.bollinger.std()
+        bar["bollinger_middle"] = middle
+        bar["bollinger_upper"] = middle + 2 * std
+        bar["bollinger_lower"] = middle - 2 * std
+
+        # True range skips NaN terms like DataFrame.max(axis=1)
+        true_range = max(
+            (
+                v
+                for v in (
+                    high - low,
+                    abs(high - self.prev_close),
+                    abs(low - self.prev_close),
+                )
+                if not _is_nan(v)
+            ),
+            default=NAN,
+        )
+        self.true_range.push(true_range)
+        atr = self.true_range.mean()
+        bar["atr"] = atr
+
+        self.low_min.push(low)
+        self.high_max.push(high)
+        low_min = self.low_min.value()
+        rsv = _divide(close - low_min, self.high_max.value() - low_min) * 100
+        kdj_k = self.kdj_k.push(rsv)
+        kdj_d = self.kdj_d.push(kdj_k)
+        bar["kdj_k"] = kdj_k
+        bar["kdj_d"] = kdj_d
+        bar["kdj_j"] = 3 * kdj_k - 2 * kdj_d
+
+        if close > self.prev_close:
+            self.obv += volume
+        elif close < self.prev_close:
+            self.obv -= volume
+        bar["obv"] = self.obv
+
+        up_move = high - self.prev_high
+        down_move = abs(low - self.prev_low)
+        if _is_nan(up_move):
+            plus_dm = NAN
+        else:
+            plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+        if _is_nan(down_move):
+            minus_dm = NAN
+        else:
+            minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+        self.plus_dm.push(plus_dm)
+        self.minus_dm.push(minus_dm)
+        plus_di = 100 * _divide(self.plus_dm.sum(), atr)
+        minus_di = 100 * _divide(self.minus_dm.sum(), atr)
+        self.dx.push(100 * _divide(abs(plus_di - minus_di), plus_di + minus_di))
+        bar["adx"] = self.dx.mean()
+
+        self.prev_close, self.prev_high, self.prev_low = close, high, low
+        self.bar_count += 1
+        bar["timestamp"] = timestamp if timestamp is not None else self.bar_count - 1
+        self.history.append(bar)
+        return bar
+
+    def copy(self) -> "StreamingIndicatorState":
+        """Return an independent copy; its size is bounded by the windows and buffer."""
+        return copy.deepcopy(self)
+
+    def preview(
+        self,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        timestamp: Optional[Any] = None,
+    ) -> "StreamingIndicatorState":
+        """
+        Return a copy updated with a provisional (still-forming) bar, leaving this
+        state untouched. Used to score intraday before the bar closes.
+        """
+        state = self.copy()
+        state.update(open_, high, low, close, volume, timestamp=timestamp)
+        return state
+
+    @property
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """The most recent enriched bar, or None before the first update."""
+        return self.history[-1] if self.history else None
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the buffered enriched bars as a DataFrame indexed by timestamp."""
+        if not self.history:
+            return pd.DataFrame(columns=STREAMING_COLUMNS)
+        df = pd.DataFrame(list(self.history)).set_index("timestamp")
+        return df[STREAMING_COLUMNS]
@@ -0,0 +1,264 @@
+"""
+Batched LLM prompting: several tickers' signals are packed into one completion and the
+model answers with a JSON array of {stock_id, suggestion, reason}. Batch size adapts to
+the completion budget (`LLMConfig.max_tokens`), and tickers whose entry is missing or
+malformed are retried in new batches without re-sending the ones that succeeded.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import PromptTemplate
+
+from app.configs.config import LLMConfig
+from app.internal.llm.cache import (
+    LLMResponseCache,
+    get_prompt_version,
+    make_cache_key,
+)
+from app.internal.llm.serialization import (
+    PromptTokenStats,
+    compact_signal,
+    estimate_tokens,
+    format_prompt_version,
+    with_legend,
+)
+from app.utils.logger import log
+from app.utils.metrics import metrics, span
+
+SUGGESTIONS = ("Long", "Short", "Wait")
+
+BATCH_RETRIED_TICKERS = metrics.counter(
+    "llm_batch_retried_tickers_total",
+    "Ticker analyses re-sent after a missing or malformed batch entry.",
+)
+
+
+@dataclass
+class BatchAnalysisResult:
+    """
+    Attributes:
+        reports (Dict[str, Dict[str, str]]): {suggestion, reason} per analyzed ticker.
+        failures (Dict[str, str]): Tickers without a valid answer after all attempts.
+        requests (int): LLM completions made.
+        retried (int): Ticker analyses re-sent after a missing or malformed entry.
+        cache_hits (int): Tickers answered from the response cache.
+    """
+
+    reports: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    failures: Dict[str, str] = field(default_factory=dict)
+    requests: int = 0
+    retried: int = 0
+    cache_hits: int = 0
+
+
+def load_batch_prompt_template(prompt_file: Path) -> PromptTemplate:
+    """Load the batch prompt; `{signals_json}` is appended if the file lacks it."""
+    with open(prompt_file, "r", encoding="utf-8") as f:
+        template = f.read().strip()
+    if "{signals_json}" not in template:
+        template += "\n\nAssets:\n```json\n{signals_json}\n```"
+    return PromptTemplate(input_variables=["signals_json"], template=template)
+
+
+def serialize_batch_entry(
+    stock_id: str, signal: Dict[str, Any], signal_format: str = "json"
+) -> str:
+    if signal_format == "compact":
+        signal = compact_signal(signal)
+        separators = (",", ":")
+    elif signal_format == "json":
+        separators = (", ", ": ")
+    else:
+        raise ValueError(f"Unknown signal format: {signal_format!r}")
+    return json.dumps(
+        {"stock_id": stock_id, "signal": signal},
+        ensure_ascii=False,
+        default=str,
+        separators=separators,
+    )
+
+
+def format_batch_prompt(
+    prompt_template: PromptTemplate,
+    entries: List[Tuple[str, Dict[str, Any]]],
+    signal_format: str = "json",
+) -> str:
+    signals_json = ",\n".join(
+        serialize_batch_entry(stock_id, signal, signal_format)
+        for stock_id, signal in entries
+    )
+    prompt = prompt_template.format(signals_json=f"[\n{signals_json}\n]")
+    return with_legend(prompt, signal_format)
+
+
+def plan_batches(
+    entries: List[Tuple[str, Dict[str, Any]]],
+    llm_config: LLMConfig,
+    base_prompt_tokens: int = 0,
+) -> List[List[Tuple[str, Dict[str, Any]]]]:
+    """
+    Greedily pack (stock_id, signal) entries into batches. A batch closes when its
+    expected answer would exceed `max_tokens`, its prompt would exceed
+    `batch_max_prompt_tokens`, or it holds `batch_max_tickers` entries.
+    Every batch holds at least one entry.
+    """
+    per_ticker = max(1, llm_config.batch_output_tokens_per_ticker)
+    max_size = max(
+        1, min(llm_config.batch_max_tickers, llm_config.max_tokens // per_ticker)
+    )
+    batches: List[List[Tuple[str, Dict[str, Any]]]] = []
+    batch: List[Tuple[str, Dict[str, Any]]] = []
+    prompt_tokens = base_prompt_tokens
+    for entry in entries:
+        entry_tokens = estimate_tokens(
+            serialize_batch_entry(*entry, llm_config.signal_format)
+        )
+        if batch and (
+            len(batch) >= max_size
+            or prompt_tokens + entry_tokens > llm_config.batch_max_prompt_tokens
+        ):
+            batches.append(batch)
+            batch = []
+            prompt_tokens = base_prompt_tokens
+        batch.append(entry)
+        prompt_tokens += entry_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def parse_batch_response(
+    text: str, expected_ids: List[str]
+) -> Tuple[Dict[str, Dict[str, str]], Dict[str, str]]:
+    """
+    Parse a batch completion into per-ticker reports.
+    Returns (reports, failures); an entry fails when it is missing, names an unknown
+    ticker, or lacks a valid suggestion or reason. The first entry per ticker wins.
+    """
+    try:
+        parsed = JsonOutputParser().parse(text)
+    except Exception as e:
+        return {}, {stock_id: f"unparseable response: {e}" for stock_id in expected_ids}
+    if isinstance(parsed, dict):
+        # Tolerate a wrapping object such as {"results": [...]}
+        parsed = next((v for v in parsed.values() if isinstance(v, list)), [parsed])
+    if not isinstance(parsed, list):
+        return {}, {
+            stock_id: "response is not a JSON array" for stock_id in expected_ids
+        }
+    expected = set(expected_ids)
+    reports: Dict[str, Dict[str, str]] = {}
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        stock_id = item.get("stock_id")
+        if stock_id not in expected or stock_id in reports:
+            continue
+        suggestion = item.get("suggestion")
+        reason = item.get("reason")
+        if suggestion in SUGGESTIONS and isinstance(reason, str) and reason:
+            reports[stock_id] = {"suggestion": suggestion, "reason": reason}
+    failures = {
+        stock_id: "missing or malformed entry in batch response"
+        for stock_id in expected_ids
+        if stock_id not in reports
+    }
+    return reports, failures
+
+
+async def aanalyze_signals_batched(
+    signals: Mapping[str, Dict[str, Any]],
+    llm_client: Any,
+    prompt_template: PromptTemplate,
+    llm_config: LLMConfig,
+    response_cache: Optional[LLMResponseCache] = None,
+    max_concurrency: int = 4,
+    token_stats: Optional[PromptTokenStats] = None,
+) -> BatchAnalysisResult:
+    """
+    Analyze many tickers' signals with batched completions.
+    Args:
+        signals (Mapping[str, Dict[str, Any]]): Signal dict per stock_id.
+        llm_client (Any): Chat model with `ainvoke`.
+        prompt_template (PromptTemplate): Batch prompt with a `{signals_json}` variable.
+        llm_config (LLMConfig): Token budget, batch limits and `retry` attempts.
+        response_cache (LLMResponseCache, optional): Per-ticker cache of batch answers.
+        max_concurrency (int): Batches in flight at once.
+        token_stats (PromptTokenStats, optional): Records estimated tokens per prompt.
+    Returns:
+        BatchAnalysisResult: Reports, final failures and request counters.
+    """
+    result = BatchAnalysisResult()
+    signal_format = llm_config.signal_format
+    prompt_version = format_prompt_version(
+        get_prompt_version(prompt_template), signal_format
+    )
+    pending: Dict[str, Dict[str, Any]] = {}
+    for stock_id, signal in signals.items():
+        if response_cache is not None:
+            cached = await asyncio.to_thread(
+                response_cache.get, make_cache_key(prompt_version, stock_id, signal)
+            )
+            if cached is not None:
+                result.reports[stock_id] = cached
+                result.cache_hits += 1
+                continue
+        pending[stock_id] = signal
+
+    base_prompt_tokens = estimate_tokens(
+        format_batch_prompt(prompt_template, [], signal_format)
+    )
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_batch(
+        batch: List[Tuple[str, Dict[str, Any]]],
+    ) -> Tuple[Dict[str, Dict[str, str]], Dict[str, str]]:
+        stock_ids = [stock_id for stock_id, _ in batch]
+        prompt = format_batch_prompt(prompt_template, batch, signal_format)
+        if token_stats is not None:
+            token_stats.record(estimate_tokens(prompt))
+        async with semaphore:
+            result.requests += 1
+            try:
+                with span("batch_llm"):
+                    response = await llm_client.ainvoke(prompt)
+            except Exception as e:
+                return {}, {stock_id: f"request failed: {e}" for stock_id in stock_ids}
+        text = response.content if hasattr(response, "content") else str(response)
+        with span("batch_parse"):
+            return parse_batch_response(text, stock_ids)
+
+    failures: Dict[str, str] = {}
+    for attempt in range(max(1, llm_config.retry)):
+        if not pending:
+            break
+        if attempt:
+            result.retried += len(pending)
+            BATCH_RETRIED_TICKERS.inc(len(pending))
+        batches = plan_batches(list(pending.items()), llm_config, base_prompt_tokens)
+        outcomes = await asyncio.gather(*(run_batch(batch) for batch in batches))
+        failures = {}
+        for reports, batch_failures in outcomes:
+            failures.update(batch_failures)
+            for stock_id, report in reports.items():
+                result.reports[stock_id] = report
+                if response_cache is not None:
+                    key = make_cache_key(prompt_version, stock_id, pending[stock_id])
+                    await asyncio.to_thread(response_cache.set, key, report)
+        pending = {stock_id: pending[stock_id] for stock_id in failures}
+    result.reports = {
+        stock_id: result.reports[stock_id]
+        for stock_id in signals
+        if stock_id in result.reports
+    }
+    result.failures = failures
+    log.info(
+        f"[LLM] Batch analysis: {len(result.reports)} reports, "
+        f"{len(result.failures)} failed, {result.requests} requests"
+    )
+    return result
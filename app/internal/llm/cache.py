@@ -0,0 +1,250 @@
+"""
+LLM response cache keyed on prompt version + a canonical hash of stock_id and signal JSON.
+Lets the analysis chain skip the LLM call when a ticker's signal has not changed.
+Provides an in-process LRU backend and a SQLite on-disk backend, both with TTL expiry.
+"""
+
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Protocol, Tuple
+
+from langchain_core.prompts import PromptTemplate
+
+from app.configs.config import Config, LLMCacheConfig, get_config
+from app.utils.logger import log
+from app.utils.metrics import metrics
+
+Clock = Callable[[], float]
+
+LLM_CACHE_LOOKUPS = metrics.counter(
+    "llm_cache_lookups_total", "LLM response cache lookups.", ["result"]
+)
+LLM_CACHE_EVICTIONS = metrics.counter(
+    "llm_cache_evictions_total", "LLM response cache entries evicted on insert."
+)
+
+
+def get_prompt_version(prompt_template: PromptTemplate) -> str:
+    """Short content hash of a prompt template; changes whenever the prompt text changes."""
+    return hashlib.sha256(prompt_template.template.encode("utf-8")).hexdigest()[:16]
+
+
+def make_cache_key(prompt_version: str, stock_id: str, signal: Dict[str, Any]) -> str:
+    """Canonical SHA-256 key: independent of dict key order and whitespace."""
+    payload = json.dumps(
+        {"prompt_version": prompt_version, "stock_id": stock_id, "signal": signal},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        """Return (value, expired); value is None on a miss."""
+        ...
+
+    def set(self, key: str, value: Any) -> int:
+        """Store a value and return the number of entries evicted."""
+        ...
+
+    def __len__(self) -> int: ...
+
+
+class InMemoryCacheBackend:
+    """Thread-safe in-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Clock = time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None, True
+            self._entries.move_to_end(key)
+            return copy.deepcopy(value), False
+
+    def set(self, key: str, value: Any) -> int:
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_seconds, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCacheBackend:
+    """SQLite-backed cache with TTL; evicts least recently accessed entries."""
+
+    def __init__(
+        self, path: str, max_entries: int, ttl_seconds: float, clock: Clock = time.time
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        now = self.clock()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, False
+            if row[1] <= now:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None, True
+            conn.execute(
+                "UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            return json.loads(row[0]), False
+
+    def set(self, key: str, value: Any) -> int:
+        now = self.clock()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?)",
+                (
+                    key,
+                    json.dumps(value, ensure_ascii=False),
+                    now + self.ttl_seconds,
+                    now,
+                ),
+            )
+            conn.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (now,))
+            cursor = conn.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                "SELECT key FROM llm_responses ORDER BY last_access DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            return max(cursor.rowcount, 0)
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+
+class LLMResponseCache:
+    """Front-end over a cache backend that tracks hit/miss/eviction metrics."""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value, expired = self.backend.get(key)
+        except Exception as e:
+            log.error(f"[LLMCache] Lookup failed: {e}")
+            value, expired = None, False
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                self.expirations += int(expired)
+            else:
+                self.hits += 1
+        if value is None:
+            LLM_CACHE_LOOKUPS.inc(result="expired" if expired else "miss")
+        else:
+            LLM_CACHE_LOOKUPS.inc(result="hit")
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            evicted = self.backend.set(key, value)
+        except Exception as e:
+            log.error(f"[LLMCache] Store failed: {e}")
+            return
+        with self._lock:
+            self.evictions += evicted
+        if evicted:
+            LLM_CACHE_EVICTIONS.inc(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "size": len(self.backend),
+            }
+
+
+def build_llm_response_cache(config: LLMCacheConfig) -> LLMResponseCache:
+    """Create a response cache with the backend selected in config."""
+    if config.backend == "disk":
+        backend: CacheBackend = DiskCacheBackend(
+            config.path, config.max_entries, config.ttl_seconds
+        )
+    elif config.backend == "memory":
+        backend = InMemoryCacheBackend(config.max_entries, config.ttl_seconds)
+    else:
+        raise ValueError(f"Unknown LLM cache backend: {config.backend}")
+    return LLMResponseCache(backend)
+
+
+@lru_cache()
+def _shared_llm_response_cache(config_json: str) -> LLMResponseCache:
+    return build_llm_response_cache(LLMCacheConfig.model_validate_json(config_json))
+
+
+def get_llm_response_cache(
+    config: Optional[Config] = None,
+) -> Optional[LLMResponseCache]:
+    """Return the process-wide response cache, or None when disabled in config."""
+    if config is None:
+        config = get_config()
+    if not config.llm.cache.enabled:
+        return None
+    return _shared_llm_response_cache(config.llm.cache.model_dump_json())
@@ -2,9 +2,17 @@
 LLM chain for stock trend analysis: embeds signal into prompt and queries LLM.
 """
 
+import asyncio
+import json
+import re
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Hashable, Optional, Tuple
 
+import httpx
+import pandas as pd
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableLambda, RunnableSerializable
@@ -12,11 +20,65 @@ from langchain_core.runnables.retry import RunnableRetry
 from langchain_openai import AzureChatOpenAI
 
 from app.configs.config import Config, get_config
-from app.services.analysis.stock_trend_pipeline import analyze_stock_trend_signal
+from app.internal.llm.cache import (
+    LLMResponseCache,
+    get_prompt_version,
+    make_cache_key,
+)
+from app.internal.llm.serialization import (
+    PromptTokenStats,
+    estimate_tokens,
+    format_prompt_version,
+    serialize_signal,
+    with_legend,
+)
+from app.internal.yfinance.bar_cache import BarCache
+from app.services.analysis.stock_trend_pipeline import (
+    compute_trend_signal,
+    fetch_and_prepare_kline,
+)
+from app.utils.logger import log
+from app.utils.metrics import metrics, span
+from app.utils.single_flight import SingleFlight
 
+CHAIN_ATTEMPTS = metrics.counter(
+    "analysis_chain_attempts_total",
+    "Analysis chain attempts, retries included (minus requests = retries).",
+)
+CHAIN_FAILURES = metrics.counter(
+    "analysis_chain_failures_total", "Analysis chain attempts that raised."
+)
 
-def get_llm_client(config: Optional[Config] = None) -> AzureChatOpenAI:
-    """Return AzureChatOpenAI client for stock analysis."""
+
+@dataclass
+class AnalysisFlights:
+    """
+    Per-stage single-flight groups: concurrent requests for the same stock wait on one
+    in-flight download, indicator pass and LLM call instead of repeating them.
+    """
+
+    fetch: SingleFlight = field(default_factory=lambda: SingleFlight("fetch"))
+    signal: SingleFlight = field(default_factory=lambda: SingleFlight("signal"))
+    llm: SingleFlight = field(default_factory=lambda: SingleFlight("llm"))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            flight.name: flight.stats()
+            for flight in (self.fetch, self.signal, self.llm)
+        }
+
+
+def get_llm_client(
+    config: Optional[Config] = None,
+    http_client: Optional[httpx.Client] = None,
+    http_async_client: Optional[httpx.AsyncClient] = None,
+) -> AzureChatOpenAI:
+    """
+    Return AzureChatOpenAI client for stock analysis.
+    Pass long-lived httpx clients to reuse pooled keep-alive connections across requests.
+    With the LLM scheduler enabled, the SDK's own retries are off: the scheduler re-queues
+    429s (so it sees every one) as well as 5xx, timeout and connection errors.
+    """
     if config is None:
         config = get_config()
     return AzureChatOpenAI(
@@ -26,6 +88,10 @@ def get_llm_client(config: Optional[Config] = None) -> AzureChatOpenAI:
         api_key=config.azure_openai.subscription_key,
         temperature=config.llm.temperature,
         max_tokens=config.llm.max_tokens,
+        timeout=config.llm.request_timeout_seconds,
+        max_retries=0 if config.llm.scheduler.enabled else 2,
+        http_client=http_client,
+        http_async_client=http_async_client,
     )
 
 
@@ -58,70 +124,324 @@ def get_analysis_prompt_template(config: Optional[Config] = None) -> PromptTempl
     return load_prompt_template(Path(config.llm.stock_analyzer_prompt_path))
 
 
-def build_prompt_formatting_chain(prompt_template: PromptTemplate) -> RunnableLambda:
-    """Format prompt for LLM with stock_id and signal_json."""
-    import json
+def build_prompt_formatting_chain(
+    prompt_template: PromptTemplate,
+    signal_format: str = "json",
+    token_stats: Optional[PromptTokenStats] = None,
+) -> RunnableLambda:
+    """
+    Format prompt for LLM with stock_id and the signal serialized as `signal_format`
+    (see `serialize_signal`). Estimated prompt tokens are recorded in `token_stats`.
+    """
 
     def format_prompt_step(input_data: dict) -> str:
-        formatted = prompt_template.format(
-            stock_id=input_data["stock_id"],
-            signal_json=json.dumps(input_data["signal"], ensure_ascii=False, indent=2),
-        )
+        with span("prompt"):
+            formatted = prompt_template.format(
+                stock_id=input_data["stock_id"],
+                signal_json=serialize_signal(input_data["signal"], signal_format),
+            )
+            formatted = with_legend(formatted, signal_format)
+        tokens = estimate_tokens(formatted)
+        if token_stats is not None:
+            token_stats.record(tokens)
+        log.debug(f"[LLM] Prompt for {input_data['stock_id']}: ~{tokens} tokens")
         return formatted
 
-    return RunnableLambda(format_prompt_step)
+    async def aformat_prompt_step(input_data: dict) -> str:
+        # Cheap and CPU-only: run inline instead of hopping to a worker thread
+        return format_prompt_step(input_data)
+
+    return RunnableLambda(format_prompt_step, afunc=aformat_prompt_step)
 
 
 def build_llm_call_chain(llm_client: Any) -> RunnableLambda:
     """Call LLM and return response text."""
 
+    def response_text(response: Any) -> str:
+        return response.content if hasattr(response, "content") else str(response)
+
     def call_llm_step(prompt: str) -> str:
-        response = llm_client.invoke(prompt)
-        response_text = (
-            response.content if hasattr(response, "content") else str(response)
-        )
-        return response_text
+        with span("llm"):
+            return response_text(llm_client.invoke(prompt))
+
+    async def acall_llm_step(prompt: str) -> str:
+        with span("llm"):
+            return response_text(await llm_client.ainvoke(prompt))
+
+    return RunnableLambda(call_llm_step, afunc=acall_llm_step)
+
+
+@lru_cache()
+def get_analysis_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Shared bounded executor for the blocking data-fetch and indicator stages."""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+
 
-    return RunnableLambda(call_llm_step)
+def signal_flight_key(stock_id: str, df: pd.DataFrame) -> Hashable:
+    """Identify an indicator pass by ticker and the bars it runs on."""
+    return stock_id, len(df), df.index[-1] if len(df) else None
 
 
-def build_stock_signal_chain() -> RunnableLambda:
-    """Chain to produce signal dict from stock_id."""
+def build_stock_signal_chain(
+    bar_cache: Optional[BarCache] = None,
+    executor: Optional[Executor] = None,
+    flights: Optional[AnalysisFlights] = None,
+) -> RunnableLambda:
+    """
+    Chain to produce signal dict from stock_id.
+    In async mode the blocking fetch + pandas work runs on `executor` (the event loop's
+    default executor if None), so it never blocks the event loop.
+    The fetch and indicator stages are each coalesced across concurrent requests.
+    """
+    if flights is None:
+        flights = AnalysisFlights()
 
     def signal_step(stock_id: str) -> Dict[str, Any]:
-        signal = analyze_stock_trend_signal(stock_id)
+        df = flights.fetch.do(
+            stock_id, lambda: fetch_and_prepare_kline(stock_id, bar_cache)
+        )
+        signal = flights.signal.do(
+            signal_flight_key(stock_id, df), lambda: compute_trend_signal(df, stock_id)
+        )
         return {"stock_id": stock_id, "signal": signal}
 
-    return RunnableLambda(signal_step)
+    async def asignal_step(stock_id: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        df = await flights.fetch.ado(
+            stock_id,
+            lambda: loop.run_in_executor(
+                executor, fetch_and_prepare_kline, stock_id, bar_cache
+            ),
+        )
+        signal = await flights.signal.ado(
+            signal_flight_key(stock_id, df),
+            lambda: loop.run_in_executor(executor, compute_trend_signal, df, stock_id),
+        )
+        return {"stock_id": stock_id, "signal": signal}
+
+    return RunnableLambda(signal_step, afunc=asignal_step)
 
 
 def build_json_output_parsing_chain() -> RunnableLambda:
     """Parse LLM response as JSON."""
 
     def parse_response_step(response_text: str) -> dict:
-        parser = JsonOutputParser()
-        return parser.parse(response_text)
+        with span("parse"):
+            return JsonOutputParser().parse(response_text)
+
+    async def aparse_response_step(response_text: str) -> dict:
+        return parse_response_step(response_text)
+
+    return RunnableLambda(parse_response_step, afunc=aparse_response_step)
+
+
+def build_cached_llm_chain(
+    llm_chain: RunnableSerializable,
+    response_cache: LLMResponseCache,
+    prompt_version: str,
+) -> RunnableLambda:
+    """Skip the prompt → LLM → JSON parse steps when the signal is already cached."""
+
+    def cache_key(input_data: dict) -> str:
+        return make_cache_key(
+            prompt_version, input_data["stock_id"], input_data["signal"]
+        )
+
+    def cached_step(input_data: dict) -> dict:
+        key = cache_key(input_data)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+        result = llm_chain.invoke(input_data)
+        response_cache.set(key, result)
+        return result
 
-    return RunnableLambda(parse_response_step)
+    async def acached_step(input_data: dict) -> dict:
+        key = cache_key(input_data)
+        # Backends may touch disk, so keep them off the event loop
+        cached = await asyncio.to_thread(response_cache.get, key)
+        if cached is not None:
+            return cached
+        result = await llm_chain.ainvoke(input_data)
+        await asyncio.to_thread(response_cache.set, key, result)
+        return result
+
+    return RunnableLambda(cached_step, afunc=acached_step)
+
+
+def build_coalesced_llm_chain(
+    llm_chain: RunnableSerializable, flight: SingleFlight, prompt_version: str
+) -> RunnableLambda:
+    """Share one in-flight LLM call among concurrent requests with the same prompt input."""
+
+    def flight_key(input_data: dict) -> str:
+        return make_cache_key(
+            prompt_version, input_data["stock_id"], input_data["signal"]
+        )
+
+    def coalesced_step(input_data: dict) -> dict:
+        return flight.do(flight_key(input_data), lambda: llm_chain.invoke(input_data))
+
+    async def acoalesced_step(input_data: dict) -> dict:
+        return await flight.ado(
+            flight_key(input_data), lambda: llm_chain.ainvoke(input_data)
+        )
+
+    return RunnableLambda(coalesced_step, afunc=acoalesced_step)
 
 
 def build_stock_analysis_chain(
-    llm_client: Any, prompt_template: PromptTemplate
+    llm_client: Any,
+    prompt_template: PromptTemplate,
+    bar_cache: Optional[BarCache] = None,
+    response_cache: Optional[LLMResponseCache] = None,
+    executor: Optional[Executor] = None,
+    flights: Optional[AnalysisFlights] = None,
+    signal_format: str = "json",
+    token_stats: Optional[PromptTokenStats] = None,
 ) -> RunnableSerializable:
-    """Full chain: stock_id → signal → prompt → LLM → JSON parse."""
-    return (
-        build_stock_signal_chain()
-        | build_prompt_formatting_chain(prompt_template)
+    """
+    Full chain: stock_id → signal → [cache] → prompt → LLM → JSON parse.
+    With `ainvoke`, data fetch and indicators run on `executor` and the LLM is awaited via
+    `llm_client.ainvoke`, so concurrent requests overlap instead of serializing.
+    Concurrent requests for the same stock share each stage through `flights`.
+    """
+    if flights is None:
+        flights = AnalysisFlights()
+    prompt_version = format_prompt_version(
+        get_prompt_version(prompt_template), signal_format
+    )
+    llm_chain = (
+        build_prompt_formatting_chain(prompt_template, signal_format, token_stats)
         | build_llm_call_chain(llm_client)
         | build_json_output_parsing_chain()
     )
+    if response_cache is not None:
+        llm_chain = build_cached_llm_chain(llm_chain, response_cache, prompt_version)
+    llm_chain = build_coalesced_llm_chain(llm_chain, flights.llm, prompt_version)
+    return build_stock_signal_chain(bar_cache, executor, flights) | llm_chain
+
+
+# A complete `"suggestion": "..."` pair; the closing quote marks the value as final
+_SUGGESTION_PATTERN = re.compile(r'"suggestion"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def parse_partial_suggestion(text: str) -> Optional[str]:
+    """Return the `suggestion` value once it is complete in a partial JSON response."""
+    match = _SUGGESTION_PATTERN.search(text)
+    if match is None:
+        return None
+    return json.loads(f'"{match.group(1)}"')
+
+
+async def astream_stock_analysis(
+    stock_id: str,
+    llm_client: Any,
+    prompt_template: PromptTemplate,
+    bar_cache: Optional[BarCache] = None,
+    response_cache: Optional[LLMResponseCache] = None,
+    executor: Optional[Executor] = None,
+    flights: Optional[AnalysisFlights] = None,
+    signal_format: str = "json",
+    token_stats: Optional[PromptTokenStats] = None,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of the analysis chain. Yields (event, data) pairs:
+        ("signal", {"stock_id", "signal"}) as soon as the data stage finishes,
+        ("token", str) for every LLM text delta,
+        ("suggestion", str) once the `suggestion` field is complete,
+        ("report", dict) with the parsed JSON response.
+    Cached responses skip the LLM and emit no tokens. Nothing is retried: tokens
+    already sent cannot be taken back.
+    """
+    signal_chain = build_stock_signal_chain(bar_cache, executor, flights)
+    input_data = await signal_chain.ainvoke(stock_id)
+    yield "signal", input_data
+
+    cache_key = None
+    if response_cache is not None:
+        prompt_version = format_prompt_version(
+            get_prompt_version(prompt_template), signal_format
+        )
+        cache_key = make_cache_key(prompt_version, stock_id, input_data["signal"])
+        cached = await asyncio.to_thread(response_cache.get, cache_key)
+        if cached is not None:
+            if "suggestion" in cached:
+                yield "suggestion", cached["suggestion"]
+            yield "report", cached
+            return
+
+    prompt = await build_prompt_formatting_chain(
+        prompt_template, signal_format, token_stats
+    ).ainvoke(input_data)
+    text = ""
+    suggestion = None
+    # Spans the whole stream, including time the client spends consuming events
+    with span("llm"):
+        async for chunk in llm_client.astream(prompt):
+            delta = chunk.content if hasattr(chunk, "content") else str(chunk)
+            if not delta:
+                continue
+            text += delta
+            yield "token", delta
+            if suggestion is None:
+                suggestion = parse_partial_suggestion(text)
+                if suggestion is not None:
+                    yield "suggestion", suggestion
+    report = await build_json_output_parsing_chain().ainvoke(text)
+    if cache_key is not None:
+        await asyncio.to_thread(response_cache.set, cache_key, report)
+    yield "report", report
+
+
+def build_attempt_counting_chain(chain: RunnableSerializable) -> RunnableLambda:
+    """Count each attempt of `chain` and its failures, so retries show up in metrics."""
+
+    def attempt_step(stock_id: str) -> dict:
+        CHAIN_ATTEMPTS.inc()
+        try:
+            return chain.invoke(stock_id)
+        except Exception:
+            CHAIN_FAILURES.inc()
+            raise
+
+    async def aattempt_step(stock_id: str) -> dict:
+        CHAIN_ATTEMPTS.inc()
+        try:
+            return await chain.ainvoke(stock_id)
+        except Exception:
+            CHAIN_FAILURES.inc()
+            raise
+
+    return RunnableLambda(attempt_step, afunc=aattempt_step)
 
 
 def build_stock_analysis_chain_with_retry(
-    llm_client: Any, prompt_template: PromptTemplate, config: Optional[Config] = None
+    llm_client: Any,
+    prompt_template: PromptTemplate,
+    config: Optional[Config] = None,
+    bar_cache: Optional[BarCache] = None,
+    response_cache: Optional[LLMResponseCache] = None,
+    executor: Optional[Executor] = None,
+    flights: Optional[AnalysisFlights] = None,
+    token_stats: Optional[PromptTokenStats] = None,
 ) -> RunnableSerializable:
     """Full chain with retry: stock_id → signal → prompt → LLM → JSON parse (with retry)."""
     if config is None:
         config = get_config()
-    base_chain = build_stock_analysis_chain(llm_client, prompt_template)
-    return RunnableRetry(bound=base_chain, max_attempt_number=config.llm.retry)
+    if executor is None:
+        executor = get_analysis_executor(config.analysis.max_workers)
+    base_chain = build_stock_analysis_chain(
+        llm_client,
+        prompt_template,
+        bar_cache,
+        response_cache,
+        executor,
+        flights,
+        config.llm.signal_format,
+        token_stats,
+    )
+    return RunnableRetry(
+        bound=build_attempt_counting_chain(base_chain),
+        max_attempt_number=config.llm.retry,
+    )
@@ -0,0 +1,256 @@
+"""
+Long-lived LLM analysis resources shared across API requests.
+`AnalysisChainProvider` owns a pooled LLM client (keep-alive HTTP connections), the prompt
+template and the compiled analysis chain. The prompt file is re-read only when its mtime
+changes, and the chain is recompiled only then.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+import httpx
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableSerializable
+
+from app.configs.config import Config, get_config
+from app.internal.llm.batch import (
+    BatchAnalysisResult,
+    aanalyze_signals_batched,
+    load_batch_prompt_template,
+)
+from app.internal.llm.cache import LLMResponseCache, get_llm_response_cache
+from app.internal.llm.chain import (
+    AnalysisFlights,
+    astream_stock_analysis,
+    build_stock_analysis_chain_with_retry,
+    get_analysis_executor,
+    get_llm_client,
+    load_prompt_template,
+)
+from app.internal.llm.scheduler import BATCH, INTERACTIVE, LLMScheduler, ScheduledLLM
+from app.internal.llm.serialization import PromptTokenStats
+from app.internal.yfinance.bar_cache import BarCache, get_bar_cache
+from app.utils.logger import log
+from app.utils.metrics import metrics
+
+REQUESTS_SERVED = metrics.gauge(
+    "analysis_requests_served",
+    "Analysis requests served by the shared chain.",
+    ["mode"],
+)
+PROMPT_TOKENS = metrics.gauge(
+    "llm_prompt_tokens_estimated", "Estimated prompt tokens sent since startup."
+)
+FLIGHTS_IN_FLIGHT = metrics.gauge(
+    "single_flight_in_flight", "Executions in flight per coalescing stage.", ["flight"]
+)
+SCHEDULER_LIMIT = metrics.gauge(
+    "llm_scheduler_concurrency_limit", "Current AIMD concurrency limit of LLM calls."
+)
+SCHEDULER_IN_FLIGHT = metrics.gauge(
+    "llm_scheduler_in_flight", "LLM calls holding a scheduler slot."
+)
+SCHEDULER_QUEUE_DEPTH = metrics.gauge(
+    "llm_scheduler_queue_depth", "LLM calls waiting for a slot.", ["priority"]
+)
+
+
+class PromptTemplateLoader:
+    """Caches a prompt template and reloads it only when the file's mtime changes."""
+
+    def __init__(
+        self,
+        path: Path,
+        load: Callable[[Path], PromptTemplate] = load_prompt_template,
+    ):
+        self.path = Path(path)
+        self.load = load
+        self.reloads = 0
+        self._mtime_ns: Optional[int] = None
+        self._template: Optional[PromptTemplate] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> PromptTemplate:
+        """Return the cached template, re-reading the file if it changed on disk."""
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        with self._lock:
+            if self._template is None or mtime_ns != self._mtime_ns:
+                self._template = self.load(self.path)
+                self._mtime_ns = mtime_ns
+                self.reloads += 1
+                log.info(f"[LLM] Loaded prompt template from {self.path}")
+            return self._template
+
+
+class AnalysisChainProvider:
+    """
+    App-lifespan holder of the LLM client, prompt template and compiled analysis chain.
+    Create once at startup, call `get_chain()` per request and `aclose()` at shutdown.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        llm_client: Optional[Any] = None,
+        bar_cache: Optional[BarCache] = None,
+        response_cache: Optional[LLMResponseCache] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.config = config
+        self.clock = clock
+        self.bar_cache = bar_cache
+        self.response_cache = response_cache
+        self.executor = get_analysis_executor(config.analysis.max_workers)
+        # Outlive chain rebuilds so in-flight calls keep coalescing across prompt reloads
+        self.flights = AnalysisFlights()
+        self.prompt_tokens = PromptTokenStats()
+        self.prompt_loader = PromptTemplateLoader(
+            Path(config.llm.stock_analyzer_prompt_path)
+        )
+        self.batch_prompt_loader = PromptTemplateLoader(
+            Path(config.llm.batch_prompt_path), load=load_batch_prompt_template
+        )
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+        start = self.clock()
+        if llm_client is None:
+            limits = httpx.Limits(
+                max_connections=config.llm.max_connections,
+                max_keepalive_connections=config.llm.max_keepalive_connections,
+                keepalive_expiry=config.llm.keepalive_expiry_seconds,
+            )
+            timeout = httpx.Timeout(config.llm.request_timeout_seconds)
+            self._http_client = httpx.Client(limits=limits, timeout=timeout)
+            self._http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+            llm_client = get_llm_client(
+                config,
+                http_client=self._http_client,
+                http_async_client=self._http_async_client,
+            )
+        self.llm_client = llm_client
+        # Interactive and batch calls share one scheduler; interactive ones go first
+        self.scheduler: Optional[LLMScheduler] = None
+        self.interactive_llm: Any = llm_client
+        self.batch_llm: Any = llm_client
+        if config.llm.scheduler.enabled:
+            self.scheduler = LLMScheduler(config.llm.scheduler)
+            self.interactive_llm = ScheduledLLM(
+                llm_client, self.scheduler, config.llm, INTERACTIVE
+            )
+            self.batch_llm = ScheduledLLM(llm_client, self.scheduler, config.llm, BATCH)
+        self.client_setup_seconds = self.clock() - start
+        # Summed over all chain builds so `stats` can report the mean build duration
+        self.chain_setup_seconds_total = 0.0
+        self.requests_served = 0
+        self.streams_served = 0
+        self.chain_builds = 0
+        self._prompt_template: Optional[PromptTemplate] = None
+        self._chain: Optional[RunnableSerializable] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Config] = None) -> "AnalysisChainProvider":
+        """Build a provider wired to the shared bar cache and LLM response cache."""
+        if config is None:
+            config = get_config()
+        return cls(
+            config,
+            bar_cache=get_bar_cache(config),
+            response_cache=get_llm_response_cache(config),
+        )
+
+    def get_chain(self) -> RunnableSerializable:
+        """Return the compiled chain, recompiling it only if the prompt file changed."""
+        start = self.clock()
+        prompt_template = self.prompt_loader.get()
+        with self._lock:
+            if self._chain is None or prompt_template is not self._prompt_template:
+                self._chain = build_stock_analysis_chain_with_retry(
+                    self.interactive_llm,
+                    prompt_template,
+                    config=self.config,
+                    bar_cache=self.bar_cache,
+                    response_cache=self.response_cache,
+                    executor=self.executor,
+                    flights=self.flights,
+                    token_stats=self.prompt_tokens,
+                )
+                self._prompt_template = prompt_template
+                self.chain_builds += 1
+                self.chain_setup_seconds_total += self.clock() - start
+            self.requests_served += 1
+            return self._chain
+
+    def stream_report(self, stock_id: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream one analysis (see `astream_stock_analysis`) on the shared resources."""
+        prompt_template = self.prompt_loader.get()
+        with self._lock:
+            self.streams_served += 1
+        return astream_stock_analysis(
+            stock_id,
+            self.interactive_llm,
+            prompt_template,
+            bar_cache=self.bar_cache,
+            response_cache=self.response_cache,
+            executor=self.executor,
+            flights=self.flights,
+            signal_format=self.config.llm.signal_format,
+            token_stats=self.prompt_tokens,
+        )
+
+    async def aanalyze_batch(
+        self, signals: Dict[str, Dict[str, Any]]
+    ) -> BatchAnalysisResult:
+        """Analyze many tickers' signals with batched completions on the shared client."""
+        return await aanalyze_signals_batched(
+            signals,
+            self.batch_llm,
+            self.batch_prompt_loader.get(),
+            self.config.llm,
+            response_cache=self.response_cache,
+            max_concurrency=self.config.analysis.max_workers,
+            token_stats=self.prompt_tokens,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Reuse counters. `setup_seconds` is the measured client setup time plus the mean
+        chain build time over `chain_builds`; `setup_seconds_saved` multiplies it by the
+        number of requests that reused the chain instead of rebuilding it.
+        """
+        with self._lock:
+            chain_seconds = self.chain_setup_seconds_total / max(self.chain_builds, 1)
+            setup_seconds = self.client_setup_seconds + chain_seconds
+            reused = max(self.requests_served - self.chain_builds, 0)
+            return {
+                "requests_served": self.requests_served,
+                "streams_served": self.streams_served,
+                "chain_builds": self.chain_builds,
+                "prompt_reloads": self.prompt_loader.reloads,
+                "setup_seconds": setup_seconds,
+                "setup_seconds_saved": setup_seconds * reused,
+            }
+
+    def update_metrics(self) -> None:
+        """Refresh the point-in-time gauges; call right before rendering metrics."""
+        with self._lock:
+            REQUESTS_SERVED.set(self.requests_served, mode="invoke")
+            REQUESTS_SERVED.set(self.streams_served, mode="stream")
+        PROMPT_TOKENS.set(self.prompt_tokens.stats()["total_tokens"])
+        for name, flight_stats in self.flights.stats().items():
+            FLIGHTS_IN_FLIGHT.set(flight_stats["in_flight"], flight=name)
+        if self.scheduler is not None:
+            SCHEDULER_LIMIT.set(self.scheduler.limit)
+            SCHEDULER_IN_FLIGHT.set(self.scheduler.in_flight)
+            for priority, depth in self.scheduler.queue_depth().items():
+                SCHEDULER_QUEUE_DEPTH.set(depth, priority=priority)
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections."""
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
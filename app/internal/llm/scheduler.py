@@ -0,0 +1,357 @@
+"""
+Rate-aware scheduler in front of the LLM client.
+Calls wait in a priority queue (interactive before batch) and are dispatched when
+- a concurrency slot is free; the limit adapts AIMD-style: +1/limit per success, times
+  `decrease_factor` on a 429 or a call slower than `latency_target_seconds`, and
+- the requests-per-minute and tokens-per-minute buckets hold enough budget.
+A 429 pauses dispatch for its Retry-After delay and the call is re-queued, so throttling
+is absorbed here instead of every caller retrying blindly. Transient failures (5xx,
+timeouts, connection resets) are re-queued after an exponential backoff, standing in for
+the SDK retries that are turned off while the scheduler is enabled.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+
+from app.configs.config import LLMConfig, LLMSchedulerConfig
+from app.internal.llm.serialization import estimate_tokens
+from app.utils.logger import log
+from app.utils.metrics import metrics
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# Buckets hold this many seconds of budget, so a full minute cannot be spent in a burst
+BURST_SECONDS = 10.0
+
+# Statuses the OpenAI SDK retries by default, besides 429
+TRANSIENT_STATUSES = frozenset({408, 409, 500, 502, 503, 504})
+
+THROTTLED_CALLS = metrics.counter(
+    "llm_throttled_total", "LLM calls rejected with HTTP 429 (each is re-queued)."
+)
+TRANSIENT_RETRIES = metrics.counter(
+    "llm_transient_retries_total",
+    "LLM calls re-queued after a 5xx, timeout or connection error.",
+)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return getattr(error, "status_code", None) or getattr(response, "status_code", None)
+
+
+def throttle_delay(error: BaseException, default: float) -> Optional[float]:
+    """
+    Return the Retry-After delay in seconds if `error` is an HTTP 429, else None.
+    Understands openai/httpx errors carrying `status_code` and a `response`.
+    """
+    if _status_code(error) != 429:
+        return None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return default
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True for errors worth retrying after a backoff: 5xx/408/409, timeouts, resets."""
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError)):
+        return True
+    return _status_code(error) in TRANSIENT_STATUSES
+
+
+class TokenBucket:
+    """Continuously refilled budget of `per_minute` units, bursting up to BURST_SECONDS."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float]):
+        self.rate = per_minute / 60.0
+        self.capacity = max(self.rate * BURST_SECONDS, 1.0)
+        self.level = self.capacity
+        self.clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` (capped at capacity) is available; 0 if it is now."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) / self.rate if self.rate > 0 else math.inf
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class LLMScheduler:
+    """
+    Priority queue + AIMD concurrency limit + RPM/TPM buckets for LLM calls.
+    Bound to one event loop (the app's); use `run` for calls and `slot` for streams.
+    """
+
+    def __init__(
+        self, config: LLMSchedulerConfig, clock: Callable[[], float] = time.monotonic
+    ):
+        self.config = config
+        self.clock = clock
+        self.limit = float(config.initial_concurrency)
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.transient_retries = 0
+        self.slow_calls = 0
+        self.requests_bucket = TokenBucket(config.requests_per_minute, clock)
+        self.tokens_bucket = TokenBucket(config.tokens_per_minute, clock)
+        self._queue: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._last_decrease = -math.inf
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _dispatch(self) -> None:
+        """Grant slots to queued calls in priority order while limits allow."""
+        while self._queue:
+            priority, _, tokens, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            if self.in_flight >= max(int(self.limit), 1):
+                return
+            wait = max(
+                self._paused_until - self.clock(),
+                self.requests_bucket.wait_time(1),
+                self.tokens_bucket.wait_time(tokens),
+            )
+            if wait > 0:
+                self._wake_after(wait)
+                return
+            heapq.heappop(self._queue)
+            self.requests_bucket.take(1)
+            self.tokens_bucket.take(tokens)
+            self.in_flight += 1
+            self.requests += 1
+            future.set_result(None)
+
+    def _wake_after(self, delay: float) -> None:
+        if self._timer is not None and not self._timer.cancelled():
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    async def _acquire(self, tokens: float, priority: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the caller went away: hand the slot back
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _decrease(self) -> None:
+        now = self.clock()
+        if now - self._last_decrease < self.config.decrease_cooldown_seconds:
+            return
+        self._last_decrease = now
+        self.limit = max(
+            float(self.config.min_concurrency), self.limit * self.config.decrease_factor
+        )
+
+    def _on_success(self, latency: float) -> None:
+        if latency > self.config.latency_target_seconds:
+            self.slow_calls += 1
+            self._decrease()
+        else:
+            self.limit = min(
+                float(self.config.max_concurrency), self.limit + 1 / self.limit
+            )
+
+    def _on_throttle(self, delay: float) -> None:
+        self.throttled += 1
+        THROTTLED_CALLS.inc()
+        self._paused_until = max(self._paused_until, self.clock() + delay)
+        self._decrease()
+        log.warning(
+            f"[LLMScheduler] Throttled; pausing {delay:.2f}s, "
+            f"concurrency limit {self.limit:.1f}"
+        )
+
+    @asynccontextmanager
+    async def slot(
+        self, tokens: float, priority: int = INTERACTIVE
+    ) -> AsyncIterator[None]:
+        """
+        Hold one dispatch slot for the body. The body's outcome feeds the AIMD limit:
+        a 429 pauses dispatch and shrinks the limit, a fast success grows it.
+        """
+        await self._acquire(tokens, priority)
+        start = self.clock()
+        try:
+            yield
+        except BaseException as e:
+            delay = throttle_delay(e, self.config.default_retry_after_seconds)
+            if delay is not None:
+                self._on_throttle(delay)
+            raise
+        else:
+            self._on_success(self.clock() - start)
+        finally:
+            self._release()
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        tokens: float,
+        priority: int = INTERACTIVE,
+    ) -> Any:
+        """
+        Run `call()` in a slot, re-queueing it after a 429 (up to `max_throttle_retries`)
+        or a transient error (up to `max_transient_retries`, with backoff).
+        """
+        retries = {"throttle": 0, "transient": 0}
+        while True:
+            try:
+                async with self.slot(tokens, priority):
+                    result = await call()
+            except Exception as e:
+                delay = self.retry_delay(e, retries)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._settle(tokens, result)
+            return result
+
+    def retry_delay(
+        self, error: BaseException, retries: Dict[str, int]
+    ) -> Optional[float]:
+        """
+        Seconds to wait before re-queueing a failed call, or None to give up.
+        `retries` counts the attempts per kind so far and is updated in place.
+        A 429 is re-queued at once: the slot already paused dispatch for Retry-After.
+        """
+        if throttle_delay(error, 0.0) is not None:
+            if retries["throttle"] >= self.config.max_throttle_retries:
+                return None
+            retries["throttle"] += 1
+            return 0.0
+        if not is_transient_error(error):
+            return None
+        if retries["transient"] >= self.config.max_transient_retries:
+            return None
+        delay = self.config.transient_backoff_seconds * 2 ** retries["transient"]
+        retries["transient"] += 1
+        self.transient_retries += 1
+        TRANSIENT_RETRIES.inc()
+        log.warning(
+            f"[LLMScheduler] Transient error ({error}); retrying in {delay:.2f}s"
+        )
+        return delay
+
+    def _settle(self, estimated: float, result: Any) -> None:
+        """Refund the token budget reserved beyond the call's reported usage."""
+        usage = getattr(result, "usage_metadata", None) or {}
+        used = usage.get("total_tokens")
+        if used is not None and used < estimated:
+            self.tokens_bucket.give(estimated - used)
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, future in self._queue:
+            if not future.done():
+                depth[PRIORITY_NAMES[priority]] += 1
+        return depth
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth(),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "transient_retries": self.transient_retries,
+            "slow_calls": self.slow_calls,
+            "paused_seconds": max(self._paused_until - self.clock(), 0.0),
+        }
+
+
+class ScheduledLLM:
+    """
+    Chat-model wrapper routing `ainvoke` and `astream` through an LLMScheduler at a fixed
+    priority. A call reserves its estimated prompt tokens plus `max_tokens`, as Azure
+    OpenAI does for its TPM limit. Sync `invoke` bypasses the scheduler.
+    """
+
+    def __init__(
+        self,
+        llm_client: Any,
+        scheduler: LLMScheduler,
+        llm_config: LLMConfig,
+        priority: int = INTERACTIVE,
+    ):
+        self.llm_client = llm_client
+        self.scheduler = scheduler
+        self.llm_config = llm_config
+        self.priority = priority
+
+    def _tokens(self, prompt: Any) -> int:
+        return estimate_tokens(str(prompt)) + self.llm_config.max_tokens
+
+    def invoke(self, prompt: Any, *args, **kwargs) -> Any:
+        return self.llm_client.invoke(prompt, *args, **kwargs)
+
+    async def ainvoke(self, prompt: Any, *args, **kwargs) -> Any:
+        return await self.scheduler.run(
+            lambda: self.llm_client.ainvoke(prompt, *args, **kwargs),
+            self._tokens(prompt),
+            self.priority,
+        )
+
+    async def astream(self, prompt: Any, *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Stream in one slot; a 429 or transient error is retried only before the first
+        chunk arrives.
+        """
+        tokens = self._tokens(prompt)
+        retries = {"throttle": 0, "transient": 0}
+        while True:
+            started = False
+            try:
+                async with self.scheduler.slot(tokens, self.priority):
+                    async for chunk in self.llm_client.astream(prompt, *args, **kwargs):
+                        started = True
+                        yield chunk
+                return
+            except Exception as e:
+                delay = None if started else self.scheduler.retry_delay(e, retries)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
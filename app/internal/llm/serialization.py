@@ -0,0 +1,128 @@
+"""
+Prompt serialization of signal dicts.
+"json" is the full signal dict pretty-printed. "compact" rounds numbers, drops booleans that
+`trend_categories` already summarizes and renames keys to short aliases explained by
+`SIGNAL_LEGEND`, which cuts the signal's share of prompt tokens by about 4x; the saving
+matters most for batched prompts, where signals dominate the prompt.
+"""
+
+import json
+import math
+import threading
+from typing import Any, Dict
+
+SIGNAL_FORMATS = ("json", "compact")
+CHARS_PER_TOKEN = 4
+SIGNIFICANT_DIGITS = 4
+
+# Booleans restated by `trend_categories`, plus the status (always "ok" when prompted)
+REDUNDANT_FIELDS = {
+    "macd_bullish",
+    "recent_high",
+    "sustained_highs_enough",
+    "trend_momentum",
+    "volume_spike",
+    "momentum_kbar",
+    "rsi_overbought",
+    "rsi_oversold",
+    "signal_status",
+}
+
+SHORT_KEYS = {
+    "signal_line": "sig",
+    "vma_short": "vs",
+    "vma_long": "vl",
+    "volume": "vol",
+    "bollinger_upper": "bbu",
+    "bollinger_lower": "bbl",
+    "bollinger_breakout": "bb",
+    "sustained_highs": "sh",
+    "trend_categories": "cat",
+}
+
+SIGNAL_LEGEND = (
+    "Indicator keys: sig=MACD signal line, vs/vl=short/long volume moving average, "
+    "vol=last volume, bbu/bbl=Bollinger upper/lower band, bb=Bollinger breakout side, "
+    "sh=recent breakout highs, cat=active trend signals (flags not listed are off)."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (~4 characters per token for JSON/English)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def round_number(value: float) -> Any:
+    """Round to `SIGNIFICANT_DIGITS` significant digits; large values become ints."""
+    if not math.isfinite(value):
+        return None
+    if abs(value) >= 10 ** (SIGNIFICANT_DIGITS - 1):
+        return int(round(value))
+    rounded = float(f"{value:.{SIGNIFICANT_DIGITS}g}")
+    return int(rounded) if rounded.is_integer() else rounded
+
+
+def compact_signal(signal: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the token-lean form of a signal dict (see module docstring)."""
+    compact: Dict[str, Any] = {}
+    for key, value in signal.items():
+        if key in REDUNDANT_FIELDS:
+            continue
+        if key == "bollinger_breakout" and value == "none":
+            continue
+        if isinstance(value, float):
+            value = round_number(value)
+        compact[SHORT_KEYS.get(key, key)] = value
+    return compact
+
+
+def serialize_signal(signal: Dict[str, Any], signal_format: str = "json") -> str:
+    """Serialize a signal dict for a prompt in one of `SIGNAL_FORMATS`."""
+    if signal_format == "json":
+        return json.dumps(signal, ensure_ascii=False, indent=2)
+    if signal_format == "compact":
+        return json.dumps(
+            compact_signal(signal), ensure_ascii=False, separators=(",", ":")
+        )
+    raise ValueError(f"Unknown signal format: {signal_format!r}")
+
+
+def with_legend(prompt: str, signal_format: str) -> str:
+    """Append the key legend to a prompt whose signals use the compact format."""
+    if signal_format == "compact":
+        return f"{prompt}\n\n{SIGNAL_LEGEND}"
+    return prompt
+
+
+def format_prompt_version(prompt_version: str, signal_format: str) -> str:
+    """Prompt version including the serialization, so cached answers never mix formats."""
+    if signal_format == "json":
+        return prompt_version
+    return f"{prompt_version}-{signal_format}"
+
+
+class PromptTokenStats:
+    """Thread-safe counter of estimated prompt tokens."""
+
+    def __init__(self):
+        self.prompts = 0
+        self.total_tokens = 0
+        self.last_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, tokens: int) -> None:
+        with self._lock:
+            self.prompts += 1
+            self.total_tokens += tokens
+            self.last_tokens = tokens
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "prompts": self.prompts,
+                "total_tokens": self.total_tokens,
+                "last_tokens": self.last_tokens,
+                "mean_tokens": self.total_tokens / self.prompts
+                if self.prompts
+                else 0.0,
+            }
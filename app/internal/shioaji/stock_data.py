@@ -4,10 +4,65 @@ All functions are pure and use dependency injection for API and constants.
 Do NOT initialize or login Shioaji API in this module; inject api/sj from outside.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from operator import attrgetter
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
 import pandas as pd
 
 from app.utils.logger import log
 
+# Shioaji exchange -> yfinance ticker suffix
+EXCHANGE_SUFFIXES = {"TSE": ".TW", "OTC": ".TWO"}
+
+# Broker limit on contracts per `api.snapshots` call
+SNAPSHOT_CHUNK_LIMIT = 500
+
+# Snapshot columns used by `filter_snapshots`
+SCREENING_SNAPSHOT_FIELDS = (
+    "ts",
+    "code",
+    "exchange",
+    "change_rate",
+    "total_volume",
+    "yesterday_volume",
+)
+
+
+def _column(records: Sequence[Any], field: str) -> np.ndarray:
+    """One attribute of every record as an array; numbers go straight into a typed array."""
+    values = list(map(attrgetter(field), records))
+    first = values[0]
+    if isinstance(first, (int, float)) and not isinstance(first, bool):
+        column = np.array(values)
+        if column.dtype.kind in "iuf":
+            return column
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def records_to_frame(
+    records: Sequence[Any], fields: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """
+    Build a DataFrame column by column from Shioaji response objects, reading each field
+    straight into one array instead of materializing a dict per object.
+    Args:
+        records: Shioaji objects (scanner items, snapshots, contracts).
+        fields (Sequence[str], optional): Attributes to keep; all attributes of the
+            first record if None.
+    Returns:
+        pd.DataFrame: One row per record.
+    """
+    if not records:
+        return pd.DataFrame()
+    if fields is None:
+        fields = list(vars(records[0]))
+    return pd.DataFrame({field: _column(records, field) for field in fields})
+
 
 def get_shioaji_scanners(api, sj, count: int = 200) -> pd.DataFrame:
     """
@@ -25,7 +80,7 @@ def get_shioaji_scanners(api, sj, count: int = 200) -> pd.DataFrame:
     if not scanners:
         log.warning("[Shioaji] scanners is empty.")
         return pd.DataFrame()
-    df_scanners = pd.DataFrame(s.__dict__ for s in scanners)
+    df_scanners = records_to_frame(scanners)
     if df_scanners.empty:
         log.warning("[Shioaji] df_scanners is empty.")
         return pd.DataFrame()
@@ -33,30 +88,119 @@ def get_shioaji_scanners(api, sj, count: int = 200) -> pd.DataFrame:
     return df_scanners
 
 
-def get_shioaji_snapshots(api, contracts) -> pd.DataFrame:
+def get_market_contracts(
+    api, exchanges: Sequence[str] = tuple(EXCHANGE_SUFFIXES), common_only: bool = True
+) -> List[Any]:
+    """
+    List stock contracts of whole exchanges, for scans beyond the scanner's top-N.
+    Args:
+        api: Shioaji API instance (injected).
+        exchanges (Sequence[str]): Exchanges under `api.Contracts.Stocks` (TSE, OTC).
+        common_only (bool): Keep only 4-digit codes (drops warrants and other products).
+    Returns:
+        List: Shioaji stock contracts.
+    """
+    contracts = []
+    for exchange in exchanges:
+        for contract in getattr(api.Contracts.Stocks, exchange, None) or []:
+            if common_only and not (
+                len(contract.code) == 4 and contract.code.isdigit()
+            ):
+                continue
+            contracts.append(contract)
+    if not contracts:
+        log.warning("[Shioaji] No market contracts available.")
+    return contracts
+
+
+def get_shioaji_snapshots(
+    api,
+    contracts,
+    chunk_size: int = SNAPSHOT_CHUNK_LIMIT,
+    max_workers: int = 1,
+    fields: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
     """
     Retrieve snapshot data from Shioaji API.
+    Contracts are requested in chunks of at most `SNAPSHOT_CHUNK_LIMIT`, up to
+    `max_workers` chunks at a time; a failed chunk is logged and skipped.
     Args:
         api: Shioaji API instance (injected).
         contracts: List of Shioaji contracts.
+        chunk_size (int): Contracts per `api.snapshots` call.
+        max_workers (int): Concurrent snapshot requests.
+        fields (Sequence[str], optional): Snapshot columns to keep; all if None.
     Returns:
-        pd.DataFrame: Snapshot data.
+        pd.DataFrame: Snapshot data, in contract order.
     """
     if not contracts:
         log.warning("[Shioaji] contracts is empty.")
         return pd.DataFrame()
-    snapshots = api.snapshots(contracts)
+    chunk_size = max(1, min(chunk_size, SNAPSHOT_CHUNK_LIMIT))
+    chunks = [
+        contracts[i : i + chunk_size] for i in range(0, len(contracts), chunk_size)
+    ]
+
+    def fetch(chunk) -> List[Any]:
+        try:
+            return api.snapshots(chunk) or []
+        except Exception as e:
+            log.error(f"[Shioaji] snapshots failed for {len(chunk)} contracts: {e}")
+            return []
+
+    if max_workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            results = list(executor.map(fetch, chunks))
+    else:
+        results = [fetch(chunk) for chunk in chunks]
+    snapshots = list(chain.from_iterable(results))
     if not snapshots:
         log.warning("[Shioaji] snapshots is empty.")
         return pd.DataFrame()
-    df_snapshots = pd.DataFrame(s.__dict__ for s in snapshots)
-    if df_snapshots.empty:
-        log.warning("[Shioaji] df_snapshots is empty.")
-        return pd.DataFrame()
-    df_snapshots["ts"] = pd.to_datetime(df_snapshots["ts"])
+    df_snapshots = records_to_frame(snapshots, fields)
+    if "ts" in df_snapshots:
+        df_snapshots["ts"] = pd.to_datetime(df_snapshots["ts"])
     return df_snapshots
 
 
+def to_yf_codes(codes: pd.Series, exchanges: pd.Series) -> pd.Series:
+    """
+    Map Shioaji codes to yfinance tickers by exchange (TSE -> .TW, OTC -> .TWO),
+    vectorized. Codes on other exchanges map to None.
+    """
+    codes = codes.astype(str)
+    conditions = [exchanges == exchange for exchange in EXCHANGE_SUFFIXES]
+    choices = [codes + suffix for suffix in EXCHANGE_SUFFIXES.values()]
+    return pd.Series(
+        np.select(conditions, choices, default=None), index=codes.index, dtype=object
+    )
+
+
+def filter_snapshots(
+    df_snapshots: pd.DataFrame, df_scanners: pd.DataFrame, volume_ratio: float = 1.1
+) -> pd.DataFrame:
+    """
+    Keep snapshots whose total volume is at least `volume_ratio` x yesterday's, mapped to
+    yfinance codes and named from the scanner rows.
+    Returns:
+        pd.DataFrame: Columns [yf_code, name, change_rate]; empty if nothing matched.
+    """
+    mask = df_snapshots["total_volume"].to_numpy() >= volume_ratio * (
+        df_snapshots["yesterday_volume"].to_numpy()
+    )
+    filtered_df = df_snapshots.loc[mask, ["code", "exchange", "change_rate"]]
+    if filtered_df.empty:
+        return pd.DataFrame(columns=["yf_code", "name", "change_rate"])
+    names = df_scanners.drop_duplicates("code").set_index("code")["name"]
+    return pd.DataFrame(
+        {
+            "yf_code": to_yf_codes(filtered_df["code"], filtered_df["exchange"]),
+            "name": filtered_df["code"].map(names),
+            "change_rate": filtered_df["change_rate"],
+        }
+    ).reset_index(drop=True)
+
+
 def get_filtered_stocks(api, sj) -> pd.DataFrame:
     """
     Filter stocks using Shioaji API and return a DataFrame of filtered stock info.
@@ -75,36 +219,16 @@ def get_filtered_stocks(api, sj) -> pd.DataFrame:
         if not contracts:
             log.warning("[Shioaji] No contracts available.")
             return pd.DataFrame()
-        df_snapshots = get_shioaji_snapshots(api, contracts)
+        df_snapshots = get_shioaji_snapshots(
+            api, contracts, fields=SCREENING_SNAPSHOT_FIELDS
+        )
         if df_snapshots.empty:
             log.warning("[Shioaji] No snapshot data available.")
             return pd.DataFrame()
-        filtered_df = df_snapshots[
-            (df_snapshots["total_volume"] >= 1.1 * df_snapshots["yesterday_volume"])
-        ].copy()
-        if filtered_df.empty:
-            log.warning("[Shioaji] No stocks matched filter condition.")
-            return pd.DataFrame()
-
-        def determine_yf_code(row):
-            if row["exchange"] == "TSE":
-                return f"{row['code']}.TW"
-            elif row["exchange"] == "OTC":
-                return f"{row['code']}.TWO"
-            else:
-                return None
-
-        filtered_df["yf_code"] = filtered_df.apply(determine_yf_code, axis=1)
-        result_df = pd.merge(
-            filtered_df, df_scanners[["code", "name"]], on="code", how="left"
-        )
+        result_df = filter_snapshots(df_snapshots, df_scanners)
         if result_df.empty:
-            log.warning("[Shioaji] No merged result data.")
+            log.warning("[Shioaji] No stocks matched filter condition.")
             return pd.DataFrame()
-        # Ensure result_df is always a DataFrame
-        if isinstance(result_df, pd.Series):
-            result_df = result_df.to_frame().T
-        result_df = result_df[["yf_code", "name", "change_rate"]].copy()
         return result_df
     except Exception as e:
         log.error(f"Error in get_filtered_stocks: {e}")
@@ -0,0 +1,296 @@
+"""
+Shioaji real-time tick ingestion: subscribes to stock tick callbacks and aggregates ticks
+into 1-minute and daily bars stored in compact NumPy ring buffers.
+Bar-close events are pushed to an injected callback, outside the stream lock.
+Do NOT initialize or login Shioaji API in this module; inject api/sj from outside.
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.utils.logger import log
+
+
+@dataclass(frozen=True)
+class Bar:
+    """One OHLCV bar; `timestamp` is the bar's start (minute or session date)."""
+
+    timestamp: pd.Timestamp
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+@dataclass(frozen=True)
+class BarCloseEvent:
+    """
+    Emitted when a bar closes. `session_bar` is the still-forming daily bar at the time
+    of a 1-minute close (None for daily closes).
+    """
+
+    code: str
+    interval: str
+    bar: Bar
+    session_bar: Optional[Bar] = None
+
+
+class BarRingBuffer:
+    """Fixed-capacity OHLCV ring buffer backed by contiguous NumPy arrays."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype="datetime64[ns]")
+        self.values = np.zeros((capacity, 5), dtype=np.float64)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, bar: Bar) -> None:
+        slot = self.count % self.capacity
+        self.timestamps[slot] = np.datetime64(bar.timestamp.asm8, "ns")
+        self.values[slot] = (bar.open, bar.high, bar.low, bar.close, bar.volume)
+        self.count += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the buffered bars in chronological order."""
+        size = len(self)
+        order = (np.arange(size) + self.count - size) % self.capacity
+        return pd.DataFrame(
+            self.values[order],
+            index=pd.DatetimeIndex(self.timestamps[order], name="timestamp"),
+            columns=["open", "high", "low", "close", "volume"],
+        )
+
+
+class _FormingBar:
+    __slots__ = ("start", "open", "high", "low", "close", "volume")
+
+    def __init__(self, start: datetime, price: float, volume: float):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = volume
+
+    def add(self, price: float, volume: float) -> None:
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+
+    def freeze(self) -> Bar:
+        return Bar(
+            pd.Timestamp(self.start),
+            self.open,
+            self.high,
+            self.low,
+            self.close,
+            self.volume,
+        )
+
+
+class TickBarAggregator:
+    """
+    Aggregates one symbol's ticks into 1-minute and daily bars.
+    A bar closes when the first tick of the next minute/session arrives, or on `flush()`.
+    """
+
+    def __init__(
+        self,
+        code: str,
+        on_bar_close: Callable[[BarCloseEvent], None],
+        minute_capacity: int = 300,
+        daily_capacity: int = 60,
+    ):
+        self.code = code
+        self.on_bar_close = on_bar_close
+        self.buffers = {
+            "1m": BarRingBuffer(minute_capacity),
+            "1d": BarRingBuffer(daily_capacity),
+        }
+        self.minute_bar: Optional[_FormingBar] = None
+        self.session_bar: Optional[_FormingBar] = None
+
+    def add_tick(self, timestamp: datetime, price: float, volume: float) -> None:
+        # Plain datetime arithmetic keeps the per-tick path free of pandas overhead
+        minute = timestamp.replace(second=0, microsecond=0)
+        session = minute.replace(hour=0, minute=0)
+        if self.session_bar is not None and session != self.session_bar.start:
+            self._close_minute()
+            self._close_session()
+        if self.minute_bar is not None and minute != self.minute_bar.start:
+            self._close_minute()
+        if self.minute_bar is None:
+            self.minute_bar = _FormingBar(minute, price, volume)
+        else:
+            self.minute_bar.add(price, volume)
+        if self.session_bar is None:
+            self.session_bar = _FormingBar(session, price, volume)
+        else:
+            self.session_bar.add(price, volume)
+
+    def flush(self) -> None:
+        """Close any forming bars, e.g. at the end of the trading session."""
+        self._close_minute()
+        self._close_session()
+
+    def current_session_bar(self) -> Optional[Bar]:
+        return self.session_bar.freeze() if self.session_bar is not None else None
+
+    def _close_minute(self) -> None:
+        if self.minute_bar is None:
+            return
+        bar = self.minute_bar.freeze()
+        self.minute_bar = None
+        self.buffers["1m"].append(bar)
+        self.on_bar_close(
+            BarCloseEvent(self.code, "1m", bar, self.current_session_bar())
+        )
+
+    def _close_session(self) -> None:
+        if self.session_bar is None:
+            return
+        bar = self.session_bar.freeze()
+        self.session_bar = None
+        self.buffers["1d"].append(bar)
+        self.on_bar_close(BarCloseEvent(self.code, "1d", bar))
+
+
+class ShioajiTickStream:
+    """
+    Subscribes to Shioaji stock tick (v1) quotes and routes them to per-code aggregators.
+    Simulated (pre-open matching) ticks are ignored.
+    Bar closes are collected while the stream lock is held and handed to `on_bar_close`
+    after it is released, so slow consumers (e.g. trend scoring) never block ingestion.
+    """
+
+    def __init__(
+        self,
+        api,
+        sj,
+        on_bar_close: Callable[[BarCloseEvent], None],
+        minute_capacity: int = 300,
+        daily_capacity: int = 60,
+    ):
+        self.api = api
+        self.sj = sj
+        self.on_bar_close = on_bar_close
+        self.minute_capacity = minute_capacity
+        self.daily_capacity = daily_capacity
+        self.aggregators: Dict[str, TickBarAggregator] = {}
+        self.tick_count = 0
+        self._lock = threading.Lock()
+        self._pending: List[BarCloseEvent] = []
+        self._callback_registered = False
+
+    def subscribe(self, codes: Iterable[str]) -> List[str]:
+        """
+        Subscribe to tick quotes for the given stock codes.
+        Returns the codes that were subscribed; unknown contracts are skipped.
+        """
+        if not self._callback_registered:
+            self.api.quote.set_on_tick_stk_v1_callback(self.handle_tick)
+            self._callback_registered = True
+        subscribed = []
+        for code in codes:
+            try:
+                contract = self.api.Contracts.Stocks[code]
+            except (KeyError, IndexError):
+                contract = None
+            if contract is None:
+                log.warning(f"[Shioaji] Unknown contract {code}, skipping subscribe.")
+                continue
+            self.api.quote.subscribe(
+                contract,
+                quote_type=self.sj.constant.QuoteType.Tick,
+                version=self.sj.constant.QuoteVersion.v1,
+            )
+            with self._lock:
+                self.aggregators.setdefault(code, self._new_aggregator(code))
+            subscribed.append(code)
+        return subscribed
+
+    def unsubscribe(self, codes: Iterable[str]) -> None:
+        """Unsubscribe tick quotes and close the codes' forming bars."""
+        for code in codes:
+            self.api.quote.unsubscribe(
+                self.api.Contracts.Stocks[code],
+                quote_type=self.sj.constant.QuoteType.Tick,
+                version=self.sj.constant.QuoteVersion.v1,
+            )
+            with self._lock:
+                aggregator = self.aggregators.pop(code, None)
+                if aggregator is not None:
+                    aggregator.flush()
+                events = self._take_pending()
+            self._dispatch(events)
+
+    def handle_tick(self, exchange: Any, tick: Any) -> None:
+        """Shioaji tick callback: feed one tick into its code's aggregator."""
+        if getattr(tick, "simtrade", False):
+            return
+        with self._lock:
+            aggregator = self.aggregators.get(tick.code)
+            if aggregator is None:
+                aggregator = self._new_aggregator(tick.code)
+                self.aggregators[tick.code] = aggregator
+            self.tick_count += 1
+            try:
+                aggregator.add_tick(
+                    tick.datetime, float(tick.close), float(tick.volume)
+                )
+            except Exception as e:
+                log.error(f"[Shioaji] Failed to process tick for {tick.code}: {e}")
+            events = self._take_pending()
+        self._dispatch(events)
+
+    def flush(self) -> None:
+        """Close all forming bars (call at the end of the session)."""
+        with self._lock:
+            for aggregator in self.aggregators.values():
+                aggregator.flush()
+            events = self._take_pending()
+        self._dispatch(events)
+
+    def _take_pending(self) -> List[BarCloseEvent]:
+        # Caller holds self._lock
+        events, self._pending = self._pending, []
+        return events
+
+    def _dispatch(self, events: List[BarCloseEvent]) -> None:
+        for event in events:
+            try:
+                self.on_bar_close(event)
+            except Exception as e:
+                log.error(
+                    f"[Shioaji] on_bar_close failed for {event.code} "
+                    f"{event.interval}: {e}"
+                )
+
+    def bars(self, code: str, interval: str = "1m") -> pd.DataFrame:
+        """Return the buffered closed bars for a code and interval."""
+        with self._lock:
+            aggregator = self.aggregators.get(code)
+            if aggregator is None:
+                return pd.DataFrame()
+            return aggregator.buffers[interval].to_frame()
+
+    def _pending_append(self, event: BarCloseEvent) -> None:
+        # Called by aggregators while self._lock is held
+        self._pending.append(event)
+
+    def _new_aggregator(self, code: str) -> TickBarAggregator:
+        return TickBarAggregator(
+            code,
+            self._pending_append,
+            minute_capacity=self.minute_capacity,
+            daily_capacity=self.daily_capacity,
+        )
@@ -0,0 +1,236 @@
+"""
+Append-only, memory-mapped columnar archive for long OHLCV histories.
+Each (interval, ticker) is a directory holding one raw little-endian file per field:
+`timestamp.bin` (int64 ns, tz-naive; UTC for tz-aware intraday bars) and
+`open/high/low/close/volume.bin` (float64). Reads map the files read-only and slice them
+by date with a binary search, so frames are built on the mapped pages without parsing or
+copying; indicator functions append their columns next to the mapped OHLCV columns.
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.configs.config import Config, get_config
+from app.internal.yfinance.stock_data import (
+    KlineBatch,
+    fetch_kline_data_many,
+    to_naive_ns,
+)
+from app.utils.logger import log
+
+# (yf_codes, start, interval, chunk_size) -> KlineBatch, e.g. fetch_kline_data_many
+BulkDownloader = Callable[[List[str], Optional[pd.Timestamp], str, int], KlineBatch]
+
+BAR_FIELDS = ["open", "high", "low", "close", "volume"]
+_TIMESTAMP = "timestamp"
+_ITEM_SIZE = 8
+
+
+@dataclass
+class ArchiveSyncResult:
+    """
+    Attributes:
+        appended (Dict[str, int]): New bars written per ticker.
+        failures (Dict[str, str]): Tickers whose download failed, with the reason.
+    """
+
+    appended: Dict[str, int] = field(default_factory=dict)
+    failures: Dict[str, str] = field(default_factory=dict)
+
+
+def _download(
+    yf_codes: List[str], start: Optional[pd.Timestamp], interval: str, chunk_size: int
+) -> KlineBatch:
+    return fetch_kline_data_many(yf_codes, start, interval, chunk_size)
+
+
+class BarArchive:
+    """
+    Memory-mapped bar store keyed by (ticker, interval).
+    Appends only add bars newer than the last archived one; the timestamp file is written
+    last, so its length is the committed bar count and a torn append is discarded.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, yf_code: str, interval: str) -> Path:
+        if not yf_code or yf_code in (".", "..") or os.sep in yf_code:
+            raise ValueError(f"Invalid ticker for archive: {yf_code!r}")
+        return self.root / interval / yf_code
+
+    @staticmethod
+    def _count(directory: Path) -> int:
+        path = directory / f"{_TIMESTAMP}.bin"
+        return path.stat().st_size // _ITEM_SIZE if path.exists() else 0
+
+    @staticmethod
+    def _map(path: Path, dtype: type, n: int) -> np.ndarray:
+        return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+    def bar_count(self, yf_code: str, interval: str = "1d") -> int:
+        """Return the number of archived bars for a ticker."""
+        return self._count(self._dir(yf_code, interval))
+
+    def last_timestamp(
+        self, yf_code: str, interval: str = "1d"
+    ) -> Optional[pd.Timestamp]:
+        """Return the timestamp of the last archived bar, or None if there is none."""
+        directory = self._dir(yf_code, interval)
+        n = self._count(directory)
+        if n == 0:
+            return None
+        timestamps = self._map(directory / f"{_TIMESTAMP}.bin", np.int64, n)
+        return pd.Timestamp(int(timestamps[-1]), unit="ns")
+
+    def append(self, yf_code: str, bars: pd.DataFrame, interval: str = "1d") -> int:
+        """
+        Append bars newer than the last archived bar.
+        Args:
+            yf_code (str): yfinance ticker code (e.g., '2330.TW').
+            bars (pd.DataFrame): Frame with [open, high, low, close, volume] and a
+                datetime index.
+            interval (str): Bar interval (e.g., '1d', '1m').
+        Returns:
+            int: Number of bars written.
+        """
+        if bars is None or bars.empty:
+            return 0
+        directory = self._dir(yf_code, interval)
+        timestamps = to_naive_ns(bars.index).asi8
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        # Keep the last row of duplicated timestamps
+        keep = np.append(timestamps[1:] != timestamps[:-1], True)
+        values = bars[BAR_FIELDS].to_numpy(dtype=np.float64)[order]
+        timestamps, values = timestamps[keep], values[keep]
+        with self._lock:
+            directory.mkdir(parents=True, exist_ok=True)
+            n = self._count(directory)
+            if n:
+                last = self._map(directory / f"{_TIMESTAMP}.bin", np.int64, n)[-1]
+                newer = timestamps > last
+                timestamps, values = timestamps[newer], values[newer]
+            if len(timestamps) == 0:
+                return 0
+            for i, name in enumerate(BAR_FIELDS):
+                with open(directory / f"{name}.bin", "ab") as f:
+                    # Drop bytes left behind by an append that never committed
+                    f.truncate(n * _ITEM_SIZE)
+                    f.write(np.ascontiguousarray(values[:, i]).tobytes())
+            with open(directory / f"{_TIMESTAMP}.bin", "ab") as f:
+                f.write(timestamps.tobytes())
+        return len(timestamps)
+
+    def read(
+        self,
+        yf_code: str,
+        interval: str = "1d",
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        """
+        Return archived bars with `start <= timestamp <= end` as a frame whose columns
+        and index are read-only views of the mapped files.
+        Args:
+            yf_code (str): yfinance ticker code (e.g., '2330.TW').
+            interval (str): Bar interval (e.g., '1d', '1m').
+            start (pd.Timestamp, optional): First bar to return. Defaults to the oldest.
+            end (pd.Timestamp, optional): Last bar to return. Defaults to the newest.
+        Returns:
+            pd.DataFrame: DataFrame with columns [open, high, low, close, volume].
+        """
+        directory = self._dir(yf_code, interval)
+        n = self._count(directory)
+        if n == 0:
+            return pd.DataFrame()
+        timestamps = self._map(directory / f"{_TIMESTAMP}.bin", np.int64, n)
+        first = 0
+        last = n
+        if start is not None:
+            first = int(np.searchsorted(timestamps, _bound(start), side="left"))
+        if end is not None:
+            last = int(np.searchsorted(timestamps, _bound(end), side="right"))
+        if last <= first:
+            return pd.DataFrame()
+        index = pd.DatetimeIndex(
+            timestamps[first:last].view("datetime64[ns]"), copy=False, name="timestamp"
+        )
+        columns = {
+            name: self._map(directory / f"{name}.bin", np.float64, n)[first:last]
+            for name in BAR_FIELDS
+        }
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def tickers(self, interval: str = "1d") -> List[str]:
+        """Return the tickers with archived bars for an interval."""
+        folder = self.root / interval
+        if not folder.is_dir():
+            return []
+        return sorted(
+            path.name
+            for path in folder.iterdir()
+            if path.is_dir() and self._count(path) > 0
+        )
+
+    def sync(
+        self,
+        yf_codes: List[str],
+        interval: str = "1d",
+        start: Optional[pd.Timestamp] = None,
+        chunk_size: int = 100,
+        downloader: Optional[BulkDownloader] = None,
+    ) -> ArchiveSyncResult:
+        """
+        Extend the archive for many tickers with bulk downloads. Tickers already in the
+        archive resume from their last bar; new tickers start at `start`. Tickers sharing
+        a resume date are downloaded together.
+        Note: an in-progress session bar is archived as-is and never rewritten, so sync
+        daily bars after the close.
+        """
+        downloader = downloader or _download
+        groups: Dict[Optional[pd.Timestamp], List[str]] = {}
+        for yf_code in dict.fromkeys(yf_codes):
+            last_bar = self.last_timestamp(yf_code, interval)
+            resume = start if last_bar is None else last_bar.normalize()
+            groups.setdefault(resume, []).append(yf_code)
+        result = ArchiveSyncResult()
+        for resume, codes in groups.items():
+            batch = downloader(codes, resume, interval, chunk_size)
+            result.failures.update(batch.failures)
+            for yf_code, bars in batch.frames.items():
+                result.appended[yf_code] = self.append(yf_code, bars, interval)
+        log.info(
+            f"[BarArchive] Appended {sum(result.appended.values())} bars for "
+            f"{len(result.appended)} tickers ({len(result.failures)} failed)"
+        )
+        return result
+
+
+def _bound(timestamp: pd.Timestamp) -> np.int64:
+    """Convert a query bound to the archive's tz-naive ns timestamps."""
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tz is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return np.int64(timestamp.as_unit("ns").value)
+
+
+@lru_cache()
+def _build_bar_archive(path: str) -> BarArchive:
+    return BarArchive(path)
+
+
+def get_bar_archive(config: Optional[Config] = None) -> BarArchive:
+    """Return the shared BarArchive at the configured path."""
+    if config is None:
+        config = get_config()
+    return _build_bar_archive(config.analysis.bar_archive.path)
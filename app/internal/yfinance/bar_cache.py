@@ -0,0 +1,279 @@
+"""
+Persistent local OHLCV bar cache backed by SQLite.
+Bars are keyed by (ticker, interval). Cached bars are returned immediately while fresh;
+stale entries are topped up by downloading only the trailing bars since the last cached one.
+The downloader is injected so the cache logic can run offline in tests.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from app.configs.config import BarCacheConfig, Config, get_config
+from app.internal.yfinance.stock_data import download_kline_data, to_naive_ns
+from app.utils.logger import log
+from app.utils.metrics import metrics
+
+# (yf_code, start, interval) -> normalized [open, high, low, close, volume] frame;
+# must raise on download errors and return an empty frame only when there are no bars
+Downloader = Callable[[str, Optional[pd.Timestamp], str], pd.DataFrame]
+
+_BAR_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+BAR_CACHE_READS = metrics.counter(
+    "bar_cache_reads_total",
+    "Bar cache reads: fresh, topped_up (downloaded new bars) or stale (top-up failed).",
+    ["result"],
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (ticker, interval, ts)
+);
+CREATE TABLE IF NOT EXISTS fetch_log (
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    PRIMARY KEY (ticker, interval)
+);
+"""
+
+
+def _default_downloader(
+    yf_code: str, start: Optional[pd.Timestamp], interval: str
+) -> pd.DataFrame:
+    # Errors must propagate: an outage is not "no new bars"
+    return download_kline_data(yf_code, start=start, interval=interval)
+
+
+class BarCache:
+    """
+    SQLite OHLCV store with incremental top-up and market-hours staleness rules.
+
+    Staleness:
+        - During market hours on a weekday, cached bars expire after `intraday_ttl_seconds`.
+        - Outside market hours, cached bars are fresh if they were fetched after the most
+          recent session close. Exchange holidays are not modelled.
+    """
+
+    def __init__(
+        self,
+        config: BarCacheConfig,
+        downloader: Optional[Downloader] = None,
+        clock: Optional[Callable[[], pd.Timestamp]] = None,
+    ):
+        self.config = config
+        self.path = Path(config.path)
+        self.downloader = downloader or _default_downloader
+        self.clock = clock or (lambda: pd.Timestamp.now(tz=config.timezone))
+        self.market_open = time.fromisoformat(config.market_open)
+        self.market_close = time.fromisoformat(config.market_close)
+        # Top-ups are serialized per (ticker, interval) only, so one ticker's download
+        # never blocks reads or downloads of other tickers
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _key_lock(self, yf_code: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((yf_code, interval), threading.Lock())
+
+    def _now(self) -> pd.Timestamp:
+        now = pd.Timestamp(self.clock())
+        if now.tz is None:
+            return now.tz_localize(self.config.timezone)
+        return now.tz_convert(self.config.timezone)
+
+    def last_session_close(self, now: pd.Timestamp) -> pd.Timestamp:
+        """Return the most recent weekday market close at or before `now`."""
+        day = now.normalize()
+        close = day + pd.Timedelta(
+            hours=self.market_close.hour, minutes=self.market_close.minute
+        )
+        if now < close or day.weekday() >= 5:
+            close -= pd.Timedelta(days=1)
+        while close.weekday() >= 5:
+            close -= pd.Timedelta(days=1)
+        return close
+
+    def is_market_open(self, now: pd.Timestamp) -> bool:
+        """Return True if `now` falls inside weekday trading hours."""
+        return now.weekday() < 5 and self.market_open <= now.time() < self.market_close
+
+    def is_stale(self, fetched_at: Optional[pd.Timestamp], now: pd.Timestamp) -> bool:
+        """Apply the staleness rules to the last fetch time of a cache entry."""
+        if fetched_at is None:
+            return True
+        if self.is_market_open(now):
+            age = (now - fetched_at).total_seconds()
+            return age > self.config.intraday_ttl_seconds
+        return fetched_at < self.last_session_close(now)
+
+    def _fetched_at(self, yf_code: str, interval: str) -> Optional[pd.Timestamp]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fetched_at FROM fetch_log WHERE ticker = ? AND interval = ?",
+                (yf_code, interval),
+            ).fetchone()
+        if row is None:
+            return None
+        return pd.Timestamp(row[0], unit="ns", tz="UTC").tz_convert(
+            self.config.timezone
+        )
+
+    def _last_bar(self, yf_code: str, interval: str) -> Optional[pd.Timestamp]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(ts) FROM bars WHERE ticker = ? AND interval = ?",
+                (yf_code, interval),
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return pd.Timestamp(row[0], unit="ns")
+
+    def _store(
+        self, yf_code: str, interval: str, bars: pd.DataFrame, now: pd.Timestamp
+    ) -> None:
+        timestamps = to_naive_ns(bars.index).asi8
+        rows = [
+            (yf_code, interval, int(ts), *values)
+            for ts, values in zip(
+                timestamps, bars[_BAR_COLUMNS].astype(float).itertuples(index=False)
+            )
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._mark_fetched(conn, yf_code, interval, now)
+
+    @staticmethod
+    def _mark_fetched(
+        conn: sqlite3.Connection, yf_code: str, interval: str, now: pd.Timestamp
+    ) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO fetch_log VALUES (?, ?, ?)",
+            (yf_code, interval, now.tz_convert("UTC").value),
+        )
+
+    def _load(
+        self, yf_code: str, interval: str, start: Optional[pd.Timestamp]
+    ) -> pd.DataFrame:
+        min_ts = start.value if start is not None else -(2**63)
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                "SELECT ts, open, high, low, close, volume FROM bars "
+                "WHERE ticker = ? AND interval = ? AND ts >= ? ORDER BY ts",
+                conn,
+                params=(yf_code, interval, min_ts),
+            )
+        if df.empty:
+            return pd.DataFrame()
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("ts"), unit="ns"))
+        df.index.name = "timestamp"
+        return df
+
+    def get(self, yf_code: str, interval: str = "1d") -> pd.DataFrame:
+        """
+        Return the trailing `lookback_months` of bars for a ticker, downloading only
+        the bars missing since the last cached one when the entry is stale.
+        Args:
+            yf_code (str): yfinance ticker code (e.g., '2330.TW').
+            interval (str): Bar interval (e.g., '1d').
+        Returns:
+            pd.DataFrame: DataFrame with columns [open, high, low, close, volume].
+        """
+        now = self._now()
+        window_start = now.tz_localize(None).normalize() - pd.DateOffset(
+            months=self.config.lookback_months
+        )
+        result = "fresh"
+        with self._key_lock(yf_code, interval):
+            if self.is_stale(self._fetched_at(yf_code, interval), now):
+                result = "stale"
+                last_bar = self._last_bar(yf_code, interval)
+                # Re-download the last cached bar: it may have been a partial session
+                start = window_start if last_bar is None else last_bar.normalize()
+                try:
+                    bars = self.downloader(yf_code, start, interval)
+                    downloaded = True
+                except Exception as e:
+                    log.error(f"[BarCache] Top-up failed for ({yf_code}): {e}")
+                    bars, downloaded = pd.DataFrame(), False
+                if bars is not None and not bars.empty:
+                    self._store(yf_code, interval, bars, now)
+                    result = "topped_up"
+                    log.info(
+                        f"[BarCache] Stored {len(bars)} bars for ({yf_code}, {interval})"
+                    )
+                elif downloaded:
+                    # A real empty response (holiday, no trade, unknown ticker) counts as
+                    # a fetch, so it is retried by the staleness rules, not on every call
+                    with self._connect() as conn:
+                        self._mark_fetched(conn, yf_code, interval, now)
+                    if last_bar is not None:
+                        log.warning(
+                            f"[BarCache] No new bars for ({yf_code}); serving cached data"
+                        )
+            BAR_CACHE_READS.inc(result=result)
+            return self._load(yf_code, interval, window_start)
+
+    def history(
+        self,
+        yf_code: str,
+        interval: str = "1d",
+        start: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        """
+        Return all stored bars for a ticker since `start` without downloading,
+        e.g. to replay long histories in backtests.
+        """
+        return self._load(yf_code, interval, start)
+
+    def tickers(self, interval: str = "1d") -> List[str]:
+        """Return the tickers with stored bars for an interval."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT ticker FROM bars WHERE interval = ? ORDER BY ticker",
+                (interval,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+@lru_cache()
+def _build_bar_cache(config_json: str) -> BarCache:
+    return BarCache(BarCacheConfig.model_validate_json(config_json))
+
+
+def get_bar_cache(config: Optional[Config] = None) -> Optional[BarCache]:
+    """Return the shared BarCache, or None when the cache is disabled in config."""
+    if config is None:
+        config = get_config()
+    if not config.analysis.bar_cache.enabled:
+        return None
+    return _build_bar_cache(config.analysis.bar_cache.model_dump_json())
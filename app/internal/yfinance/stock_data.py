@@ -3,62 +3,193 @@ YFinance data retrieval service for stock OHLCV and info.
 All functions are pure and suitable for dependency injection.
 """
 
-from typing import Dict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
 import pandas as pd
 
 import yfinance as yf
 from app.utils.logger import log
 
+KLINE_COLUMN_MAPPING = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+}
 
-def fetch_kline_data(yf_code: str) -> pd.DataFrame:
+
+def normalize_kline_frame(data: pd.DataFrame, yf_code: str) -> pd.DataFrame:
+    """
+    Normalize a raw single-ticker yfinance frame to [open, high, low, close, volume].
+    Args:
+        data (pd.DataFrame): Raw yfinance OHLCV frame with flat columns.
+        yf_code (str): yfinance ticker code, used for logging.
+    Returns:
+        pd.DataFrame: Normalized frame, or an empty DataFrame if columns are missing.
+    """
+    expected_columns = list(KLINE_COLUMN_MAPPING.keys())
+    missing_columns = [col for col in expected_columns if col not in data.columns]
+    if missing_columns:
+        log.warning(f"Missing expected columns {missing_columns} in data for {yf_code}")
+        return pd.DataFrame()
+    data = data.rename(columns=KLINE_COLUMN_MAPPING)
+    data.index.name = "timestamp"
+    data = data[["open", "high", "low", "close", "volume"]]
+    # If data is a Series, convert to DataFrame
+    if isinstance(data, pd.Series):
+        data = data.to_frame().T
+    data["volume"] = data["volume"] // 1000
+    data["open"] = data["open"] // 1
+    data["high"] = data["high"] // 1
+    data["low"] = data["low"] // 1
+    data["close"] = data["close"] // 1
+    return data
+
+
+def to_naive_ns(index: pd.Index) -> pd.DatetimeIndex:
+    """Convert a bar index to tz-naive ns timestamps (UTC for tz-aware intraday bars)."""
+    timestamps = pd.DatetimeIndex(index)
+    if timestamps.tz is not None:
+        timestamps = timestamps.tz_convert("UTC").tz_localize(None)
+    return timestamps.as_unit("ns")
+
+
+def download_kline_data(
+    yf_code: str, start: Optional[pd.Timestamp] = None, interval: str = "1d"
+) -> pd.DataFrame:
+    """
+    Like `fetch_kline_data`, but download errors propagate to the caller, so an outage
+    can be told apart from an empty response (no new bars).
+    Returns:
+        pd.DataFrame: DataFrame with columns [open, high, low, close, volume]; empty if
+            yfinance returned no bars.
+    """
+    if start is None:
+        data = yf.download(
+            tickers=yf_code, period="3mo", interval=interval, auto_adjust=True
+        )
+    else:
+        data = yf.download(
+            tickers=yf_code, start=start, interval=interval, auto_adjust=True
+        )
+    if data is None or data.empty:
+        log.warning(f"No data returned for ({yf_code})")
+        return pd.DataFrame()
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.droplevel(1)
+    return normalize_kline_frame(data, yf_code)
+
+
+def fetch_kline_data(
+    yf_code: str, start: Optional[pd.Timestamp] = None, interval: str = "1d"
+) -> pd.DataFrame:
     """
     Fetch K-line (OHLCV) data from yfinance and return as a DataFrame.
     Args:
         yf_code (str): yfinance ticker code (e.g., '2330.TW').
+        start (pd.Timestamp, optional): First bar to download. Defaults to the last 3 months.
+        interval (str): yfinance bar interval (e.g., '1d', '1m').
     Returns:
         pd.DataFrame: DataFrame with columns [open, high, low, close, volume].
     """
     try:
-        data = yf.download(
-            tickers=yf_code, period="3mo", interval="1d", auto_adjust=True
-        )
-        if data is None or data.empty:
-            log.warning(f"No data returned for ({yf_code})")
-            return pd.DataFrame()
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.droplevel(1)
-        column_mapping = {
-            "Open": "open",
-            "High": "high",
-            "Low": "low",
-            "Close": "close",
-            "Volume": "volume",
-        }
-        expected_columns = list(column_mapping.keys())
-        missing_columns = [col for col in expected_columns if col not in data.columns]
-        if missing_columns:
-            log.warning(
-                f"Missing expected columns {missing_columns} in data for {yf_code}"
-            )
-            return pd.DataFrame()
-        data = data.rename(columns=column_mapping)
-        data.index.name = "timestamp"
-        data = data[["open", "high", "low", "close", "volume"]]
-        # If data is a Series, convert to DataFrame
-        if isinstance(data, pd.Series):
-            data = data.to_frame().T
-        data["volume"] = data["volume"] // 1000
-        data["open"] = data["open"] // 1
-        data["high"] = data["high"] // 1
-        data["low"] = data["low"] // 1
-        data["close"] = data["close"] // 1
-        return data
+        return download_kline_data(yf_code, start=start, interval=interval)
     except Exception as e:
         log.error(f"Error fetching data for ({yf_code}): {e}")
         return pd.DataFrame()
 
 
+@dataclass
+class KlineBatch:
+    """
+    Result of a bulk K-line download.
+    Attributes:
+        frames (Dict[str, pd.DataFrame]): Normalized frames keyed by ticker, in request order.
+        failures (Dict[str, str]): Reason keyed by ticker for tickers without usable data.
+    """
+
+    frames: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    failures: Dict[str, str] = field(default_factory=dict)
+
+
+def _split_bulk_frame(
+    data: pd.DataFrame, yf_codes: List[str], batch: KlineBatch
+) -> None:
+    """Split one bulk yfinance result into normalized per-ticker frames."""
+    multi_index = isinstance(data.columns, pd.MultiIndex)
+    downloaded = set(data.columns.get_level_values(0)) if multi_index else set()
+    for yf_code in yf_codes:
+        if multi_index:
+            if yf_code not in downloaded:
+                batch.failures[yf_code] = "no data returned"
+                continue
+            ticker_data = data[yf_code]
+        else:
+            # yfinance returns flat columns when only one ticker was requested
+            ticker_data = data
+        ticker_data = ticker_data.dropna(how="all")
+        if ticker_data.empty:
+            batch.failures[yf_code] = "no data returned"
+            continue
+        frame = normalize_kline_frame(ticker_data.copy(), yf_code)
+        if frame.empty:
+            batch.failures[yf_code] = "missing OHLCV columns"
+            continue
+        batch.frames[yf_code] = frame
+
+
+def fetch_kline_data_many(
+    yf_codes: List[str],
+    start: Optional[pd.Timestamp] = None,
+    interval: str = "1d",
+    chunk_size: int = 100,
+) -> KlineBatch:
+    """
+    Fetch K-line (OHLCV) data for many tickers in chunked, threaded yfinance bulk calls.
+    Each chunk is a single `yf.download` request; a failing chunk only fails its tickers.
+    Args:
+        yf_codes (List[str]): yfinance ticker codes (e.g., ['2330.TW', '2317.TW']).
+        start (pd.Timestamp, optional): First bar to download. Defaults to the last 3 months.
+        interval (str): yfinance bar interval (e.g., '1d', '1m').
+        chunk_size (int): Maximum number of tickers per bulk request.
+    Returns:
+        KlineBatch: Normalized frames keyed by ticker and per-ticker failure reasons.
+    """
+    batch = KlineBatch()
+    yf_codes = list(dict.fromkeys(yf_codes))
+    period_kwargs = {"period": "3mo"} if start is None else {"start": start}
+    for offset in range(0, len(yf_codes), max(1, chunk_size)):
+        chunk = yf_codes[offset : offset + max(1, chunk_size)]
+        try:
+            data = yf.download(
+                tickers=chunk,
+                interval=interval,
+                auto_adjust=True,
+                group_by="ticker",
+                threads=True,
+                **period_kwargs,
+            )
+        except Exception as e:
+            log.error(f"Error fetching bulk data for {len(chunk)} tickers: {e}")
+            batch.failures.update(
+                {yf_code: f"download failed: {e}" for yf_code in chunk}
+            )
+            continue
+        if data is None or data.empty:
+            log.warning(f"No bulk data returned for {len(chunk)} tickers")
+            batch.failures.update({yf_code: "no data returned" for yf_code in chunk})
+            continue
+        _split_bulk_frame(data, chunk, batch)
+    if batch.failures:
+        log.warning(
+            f"Bulk download: {len(batch.frames)} ok, {len(batch.failures)} failed "
+            f"({', '.join(list(batch.failures)[:10])})"
+        )
+    return batch
+
+
 def fetch_stock_info(yf_code: str) -> Dict[str, str]:
     """
     Fetch sector and industry info for a stock from yfinance.
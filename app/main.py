@@ -2,20 +2,36 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.api.v1.endpoints import router as v1_router
 from app.configs.config import get_config
-from app.utils.logger import log
+from app.internal.llm.provider import AnalysisChainProvider
+from app.utils.logger import Loggers, log
+from app.utils.metrics import metrics
 
 config = get_config()
 
-# Loggers.init_config(log_level=config.app.log_level) # Initialize logging configuration(If needed)
+if config.logging.enabled:
+    Loggers.init_config(log_level=config.app.log_level, options=config.logging)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    metrics.enabled = config.metrics.enabled
+    # Build the LLM client and analysis chain once and reuse them across requests
+    app.state.analysis_chain_provider = AnalysisChainProvider.from_config(config)
+    yield
+    await app.state.analysis_chain_provider.aclose()
+
 
 app = FastAPI(
     title=config.app.name,
     description=config.app.description,
     version=config.app.version,
+    lifespan=lifespan,
 )
 
 app.include_router(v1_router, prefix="/api/v1", tags=["llm-analysis"])
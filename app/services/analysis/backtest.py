@@ -0,0 +1,271 @@
+"""
+Historical backtest of `trend_categories`.
+Trend flags are evaluated for every date and ticker in one pass (see `trend_signal_flags`),
+then each category is traded with simple fixed-horizon rules and summarised by hit rate
+and returns. Tickers are processed in chunks on a thread pool.
+Bars come from the local bar store (`BarCache.history`), the memory-mapped archive
+(`BarArchive.read`) or a directory of CSV fixtures.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.internal.analysis.panel_indicators import (
+    build_ohlcv_panel_from_frames,
+    calculate_panel_indicators,
+)
+from app.internal.yfinance.bar_archive import BarArchive
+from app.internal.yfinance.bar_cache import BarCache
+from app.services.analysis.trend_analysis import (
+    BOOLEAN_SIGNALS,
+    TREND_CATEGORIES,
+    trend_signal_flags,
+)
+from app.utils.logger import log
+
+SUMMARY_COLUMNS = [
+    "trades",
+    "hit_rate",
+    "mean_return",
+    "median_return",
+    "std_return",
+    "mean_holding_bars",
+]
+
+
+@dataclass(frozen=True)
+class BacktestRules:
+    """
+    Entry/exit rules applied to every category flag.
+    Attributes:
+        holding_period (int): Bars to hold after entering at the signal bar's close.
+        stop_loss (float, optional): Exit early when close falls this fraction below entry.
+        take_profit (float, optional): Exit early when close rises this fraction above entry.
+        rising_edge_only (bool): Enter only when a flag turns on, not on every flagged bar.
+    """
+
+    holding_period: int = 5
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+    rising_edge_only: bool = True
+
+
+@dataclass
+class BacktestResult:
+    """
+    Attributes:
+        summary (pd.DataFrame): Per-category statistics, indexed by category.
+        returns (Dict[str, np.ndarray]): Every completed trade's return per category.
+    """
+
+    summary: pd.DataFrame
+    returns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+def load_bars_from_csv(
+    directory: str, tickers: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Load `<ticker>.csv` fixtures with columns [timestamp, open, high, low, close, volume].
+    Args:
+        directory (str): Folder holding one CSV file per ticker.
+        tickers (Iterable[str], optional): Tickers to load. Defaults to every CSV file.
+    Returns:
+        Dict[str, pd.DataFrame]: OHLCV frames indexed by timestamp, keyed by ticker.
+    """
+    folder = Path(directory)
+    if tickers is None:
+        paths = sorted(folder.glob("*.csv"))
+    else:
+        paths = [folder / f"{ticker}.csv" for ticker in tickers]
+    frames = {}
+    for path in paths:
+        try:
+            frames[path.stem] = pd.read_csv(
+                path, index_col="timestamp", parse_dates=["timestamp"]
+            )
+        except Exception as e:
+            log.error(f"[Backtest] Failed to load {path}: {e}")
+    return frames
+
+
+def load_bars_from_bar_cache(
+    bar_cache: BarCache,
+    tickers: Optional[Iterable[str]] = None,
+    interval: str = "1d",
+    start: Optional[pd.Timestamp] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Load stored bars from the local bar store without downloading."""
+    if tickers is None:
+        tickers = bar_cache.tickers(interval)
+    frames = {}
+    for ticker in tickers:
+        df = bar_cache.history(ticker, interval, start)
+        if not df.empty:
+            frames[ticker] = df
+    return frames
+
+
+def load_bars_from_archive(
+    archive: BarArchive,
+    tickers: Optional[Iterable[str]] = None,
+    interval: str = "1d",
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Map archived bars for a date range; frames are views of the archive files."""
+    if tickers is None:
+        tickers = archive.tickers(interval)
+    frames = {}
+    for ticker in tickers:
+        df = archive.read(ticker, interval, start, end)
+        if not df.empty:
+            frames[ticker] = df
+    return frames
+
+
+def category_flags(flags: Mapping[str, pd.DataFrame]) -> Dict[str, np.ndarray]:
+    """Boolean (dates x tickers) array per `trend_categories` entry."""
+    arrays = {name: flags[name].to_numpy(dtype=bool) for name in BOOLEAN_SIGNALS}
+    arrays["bollinger_breakout"] = flags["bollinger_breakout"].to_numpy() != "none"
+    return arrays
+
+
+def simulate_trades(
+    close: np.ndarray, entries: np.ndarray, rules: BacktestRules
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate fixed-horizon trades entered at the close of every `entries` bar.
+    Args:
+        close (np.ndarray): (dates x tickers) close prices.
+        entries (np.ndarray): Boolean (dates x tickers) entry bars.
+        rules (BacktestRules): Holding period and optional stop-loss / take-profit.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Return and bars held of every completed trade.
+        Trades whose horizon runs past the last bar are dropped.
+    """
+    horizon = rules.holding_period
+    n_dates = close.shape[0]
+    dates, tickers = np.nonzero(entries[: max(n_dates - horizon, 0)])
+    # Returns are undefined for non-positive entry prices
+    tradable = close[dates, tickers] > 0
+    dates, tickers = dates[tradable], tickers[tradable]
+    if len(dates) == 0:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    entry_price = close[dates, tickers]
+    # Close path after each entry: shape (trades, horizon)
+    offsets = np.arange(1, horizon + 1)
+    path = close[dates[:, None] + offsets, tickers[:, None]] / entry_price[:, None]
+    exit_hit = np.zeros(path.shape, dtype=bool)
+    if rules.stop_loss is not None:
+        exit_hit |= path <= 1 - rules.stop_loss
+    if rules.take_profit is not None:
+        exit_hit |= path >= 1 + rules.take_profit
+    exit_hit[:, -1] = True
+    exit_offset = exit_hit.argmax(axis=1)
+    returns = path[np.arange(len(path)), exit_offset] - 1
+    completed = np.isfinite(returns)
+    return returns[completed], exit_offset[completed] + 1
+
+
+def backtest_panel(
+    panel: Mapping[str, pd.DataFrame],
+    rules: BacktestRules = BacktestRules(),
+    trend_lookback_period: int = 60,
+    breakout_window: int = 10,
+    sustained_breakout_days: int = 3,
+) -> Dict[str, tuple[np.ndarray, np.ndarray]]:
+    """
+    Backtest every category on one OHLCV panel.
+    Returns (returns, bars held) of the completed trades per category.
+    """
+    enriched = calculate_panel_indicators(panel)
+    flags = trend_signal_flags(
+        enriched, trend_lookback_period, breakout_window, sustained_breakout_days
+    )
+    close = enriched["close"].to_numpy(dtype=float)
+    trades = {}
+    for category, flagged in category_flags(flags).items():
+        entries = flagged
+        if rules.rising_edge_only:
+            entries = flagged & ~np.vstack([np.zeros_like(flagged[:1]), flagged[:-1]])
+        trades[category] = simulate_trades(close, entries, rules)
+    return trades
+
+
+def summarize_trades(
+    trades: Mapping[str, tuple[np.ndarray, np.ndarray]],
+) -> pd.DataFrame:
+    """Per-category trade count, hit rate (share of positive returns) and return stats."""
+    rows = {}
+    for category in TREND_CATEGORIES:
+        returns, held = trades.get(category, (np.empty(0), np.empty(0)))
+        if len(returns) == 0:
+            rows[category] = [0, np.nan, np.nan, np.nan, np.nan, np.nan]
+            continue
+        rows[category] = [
+            len(returns),
+            float(np.mean(returns > 0)),
+            float(np.mean(returns)),
+            float(np.median(returns)),
+            float(np.std(returns, ddof=1)) if len(returns) > 1 else np.nan,
+            float(np.mean(held)),
+        ]
+    summary = pd.DataFrame.from_dict(rows, orient="index", columns=SUMMARY_COLUMNS)
+    summary["trades"] = summary["trades"].astype(int)
+    summary.index.name = "category"
+    return summary
+
+
+def run_backtest(
+    frames: Mapping[str, pd.DataFrame],
+    rules: BacktestRules = BacktestRules(),
+    chunk_size: int = 200,
+    max_workers: int = 4,
+    trend_lookback_period: int = 60,
+    breakout_window: int = 10,
+    sustained_breakout_days: int = 3,
+) -> BacktestResult:
+    """
+    Backtest `trend_categories` over many tickers.
+    Args:
+        frames (Mapping[str, pd.DataFrame]): OHLCV history per ticker (e.g. from
+            `load_bars_from_bar_cache` or `load_bars_from_csv`).
+        rules (BacktestRules): Entry/exit rules.
+        chunk_size (int): Tickers per panel; bounds memory use.
+        max_workers (int): Chunks processed concurrently.
+    Returns:
+        BacktestResult: Per-category summary and trade returns.
+    """
+    tickers = list(frames)
+    chunks = [
+        tickers[offset : offset + max(1, chunk_size)]
+        for offset in range(0, len(tickers), max(1, chunk_size))
+    ]
+
+    def run_chunk(chunk: List[str]) -> Dict[str, tuple[np.ndarray, np.ndarray]]:
+        panel = build_ohlcv_panel_from_frames({t: frames[t] for t in chunk})
+        return backtest_panel(
+            panel,
+            rules,
+            trend_lookback_period,
+            breakout_window,
+            sustained_breakout_days,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = list(executor.map(run_chunk, chunks))
+    trades = {
+        category: (
+            np.concatenate([r[category][0] for r in results] or [np.empty(0)]),
+            np.concatenate([r[category][1] for r in results] or [np.empty(0)]),
+        )
+        for category in TREND_CATEGORIES
+    }
+    returns = {category: trades[category][0] for category in TREND_CATEGORIES}
+    return BacktestResult(summary=summarize_trades(trades), returns=returns)
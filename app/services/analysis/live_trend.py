@@ -0,0 +1,109 @@
+"""
+Live trend monitor: consumes bar-close events from the Shioaji tick stream and keeps each
+symbol's trend signals and `trend_categories` up to date intraday.
+Daily closes advance the per-symbol streaming indicator state; 1-minute closes score the
+still-forming daily bar on a copy of that state. The tick stream dispatches from whichever
+Shioaji thread closed the bar, so events at or before the last applied bar are dropped.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from app.internal.analysis.streaming_indicators import StreamingIndicatorState
+from app.internal.shioaji.tick_stream import Bar, BarCloseEvent
+from app.services.analysis.stock_trend_pipeline import convert_numpy_types
+from app.services.analysis.trend_analysis import (
+    MIN_SIGNAL_BARS,
+    generate_trend_signals_from_state,
+)
+from app.utils.logger import log
+
+
+def _normalize_bar(bar: Bar) -> tuple[float, float, float, float, float]:
+    """Floor prices like `fetch_kline_data` so live bars match seeded yfinance history."""
+    return (bar.open // 1, bar.high // 1, bar.low // 1, bar.close // 1, bar.volume)
+
+
+class LiveTrendMonitor:
+    """
+    Holds a `StreamingIndicatorState` per symbol and re-scores it on every bar close.
+    Use `on_bar_close` as the callback of a `ShioajiTickStream`.
+    """
+
+    def __init__(
+        self,
+        history_size: int = 60,
+        on_signal: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ):
+        self.history_size = history_size
+        self.on_signal = on_signal
+        self.states: Dict[str, StreamingIndicatorState] = {}
+        self.signals: Dict[str, Dict[str, Any]] = {}
+        # Last applied bar timestamp per (code, interval)
+        self._last_applied: Dict[tuple[str, str], pd.Timestamp] = {}
+        self._lock = threading.Lock()
+
+    def _is_stale(self, event: BarCloseEvent) -> bool:
+        """True if a bar at or after this event's bar was already applied (call under `_lock`)."""
+        last = self._last_applied.get((event.code, event.interval))
+        return last is not None and event.bar.timestamp <= last
+
+    def seed(self, code: str, df: pd.DataFrame) -> None:
+        """Warm up a symbol's state from historical daily bars (e.g. `fetch_kline_data`)."""
+        state = StreamingIndicatorState.from_frame(df, history_size=self.history_size)
+        with self._lock:
+            self.states[code] = state
+
+    def on_bar_close(self, event: BarCloseEvent) -> None:
+        """Bar-close callback: update state on daily closes, preview on minute closes."""
+        with self._lock:
+            if self._is_stale(event):
+                log.debug(
+                    f"[LiveTrend] Dropping out-of-order {event.interval} bar for "
+                    f"{event.code} at {event.bar.timestamp}"
+                )
+                return
+            state = self.states.get(event.code)
+            if state is None:
+                state = StreamingIndicatorState(history_size=self.history_size)
+                self.states[event.code] = state
+            if event.interval == "1d":
+                state.update(*_normalize_bar(event.bar), timestamp=event.bar.timestamp)
+                scored = state.copy()
+            elif event.interval == "1m" and event.session_bar is not None:
+                session_bar = event.session_bar
+                scored = state.preview(
+                    *_normalize_bar(session_bar), timestamp=session_bar.timestamp
+                )
+            else:
+                return
+            self._last_applied[(event.code, event.interval)] = event.bar.timestamp
+        if len(scored.history) < MIN_SIGNAL_BARS:
+            return
+        try:
+            signal = convert_numpy_types(generate_trend_signals_from_state(scored))
+        except Exception as e:
+            log.error(f"[LiveTrend] Failed to score {event.code}: {e}")
+            return
+        signal["interval"] = event.interval
+        signal["as_of"] = event.bar.timestamp.isoformat()
+        with self._lock:
+            # A newer bar may have been scored while this one was outside the lock
+            if (
+                self._last_applied.get((event.code, event.interval))
+                != event.bar.timestamp
+            ):
+                return
+            self.signals[event.code] = signal
+        if self.on_signal is not None:
+            self.on_signal(event.code, signal)
+
+    def trend_categories(self) -> Dict[str, List[str]]:
+        """Latest `trend_categories` per symbol."""
+        with self._lock:
+            return {
+                code: list(signal.get("trend_categories", []))
+                for code, signal in self.signals.items()
+            }
@@ -0,0 +1,163 @@
+"""
+Process-pool backend for CPU-bound indicator enrichment and signal scoring.
+OHLCV bars for all tickers are packed into one shared-memory block; workers receive only
+the block name and per-ticker row ranges, build their frames on top of the shared buffer,
+and return compact signal dicts. No DataFrame is pickled in either direction.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.analysis.stock_trend_pipeline import compute_trend_signal
+from app.utils.logger import log
+
+BAR_FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+@dataclass(frozen=True)
+class SharedBarsSpec:
+    """Picklable handle to a shared-memory bar block: (rows, fields) float64 values."""
+
+    name: str
+    n_rows: int
+
+
+# (ticker, first row, last row + 1) inside the shared block
+TickerSlice = Tuple[str, int, int]
+
+
+class SharedBarBlock:
+    """
+    Owner of a shared-memory block holding the OHLCV values of many tickers back to back.
+    Use as a context manager; the block is unlinked on exit.
+    """
+
+    def __init__(self, frames: Mapping[str, pd.DataFrame]):
+        self.slices: List[TickerSlice] = []
+        offset = 0
+        for ticker, frame in frames.items():
+            self.slices.append((ticker, offset, offset + len(frame)))
+            offset += len(frame)
+        n_rows = max(offset, 1)
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=n_rows * len(BAR_FIELDS) * 8
+        )
+        self.spec = SharedBarsSpec(self.shm.name, n_rows)
+        values = np.ndarray(
+            (n_rows, len(BAR_FIELDS)), dtype=np.float64, buffer=self.shm.buf
+        )
+        for (ticker, start, end), frame in zip(self.slices, frames.values()):
+            if end > start:
+                values[start:end] = frame[BAR_FIELDS].to_numpy(dtype=np.float64)
+        del values
+
+    def shards(self, n_shards: int) -> List[List[TickerSlice]]:
+        """Split tickers into contiguous shards with roughly equal bar counts."""
+        n_shards = max(1, n_shards)
+        total = max(self.spec.n_rows, 1)
+        shards: List[List[TickerSlice]] = [[] for _ in range(n_shards)]
+        for ticker_slice in self.slices:
+            shards[min(ticker_slice[1] * n_shards // total, n_shards - 1)].append(
+                ticker_slice
+            )
+        return [shard for shard in shards if shard]
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> "SharedBarBlock":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def score_shared_shard(
+    spec: SharedBarsSpec, shard: List[TickerSlice], compact: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Worker entry point: attach to the shared block and score each ticker in the shard.
+    Frames are built on read-only views of the shared buffer.
+    """
+    shm = shared_memory.SharedMemory(name=spec.name)
+    try:
+        values = np.ndarray(
+            (spec.n_rows, len(BAR_FIELDS)), dtype=np.float64, buffer=shm.buf
+        )
+        values.flags.writeable = False
+        signals = {}
+        for ticker, start, end in shard:
+            block = values[start:end]
+            df = pd.DataFrame(
+                {field: block[:, i] for i, field in enumerate(BAR_FIELDS)}, copy=False
+            )
+            try:
+                signals[ticker] = compute_trend_signal(df, ticker, compact)
+            except Exception as e:
+                signals[ticker] = {"signal_status": "invalid", "reason": str(e)}
+            del df, block
+        del values
+        return signals
+    finally:
+        shm.close()
+
+
+@lru_cache()
+def get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Shared process pool for indicator work. Workers are spawned (not forked) so the pool
+    is safe to create from a multi-threaded server process.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def compute_trend_signals_in_processes(
+    frames: Mapping[str, pd.DataFrame],
+    max_workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    shards_per_worker: int = 4,
+    compact: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Enrich and score many tickers on a process pool, sharing bars via shared memory.
+    Args:
+        frames (Mapping[str, pd.DataFrame]): OHLCV frames keyed by ticker.
+        max_workers (int, optional): Pool size when `executor` is not given.
+            Defaults to the number of CPU cores.
+        executor (Executor, optional): Process pool to use instead of the shared one.
+        shards_per_worker (int): Shards per worker, to balance uneven tickers.
+        compact (bool): Enrich into compact float32 frames in the workers.
+    Returns:
+        Dict[str, Dict[str, Any]]: Signal dict per ticker, in input order.
+    """
+    frames = {
+        ticker: df if df is not None else pd.DataFrame()
+        for ticker, df in frames.items()
+    }
+    if not frames:
+        return {}
+    max_workers = max_workers or os.cpu_count() or 1
+    if executor is None:
+        executor = get_process_pool(max_workers)
+    signals: Dict[str, Dict[str, Any]] = {}
+    with SharedBarBlock(frames) as block:
+        shards = block.shards(max_workers * shards_per_worker)
+        futures = [
+            executor.submit(score_shared_shard, block.spec, shard, compact)
+            for shard in shards
+        ]
+        for future in futures:
+            signals.update(future.result())
+    log.info(f"[ProcessPool] Scored {len(signals)} tickers in {len(shards)} shards")
+    return {ticker: signals[ticker] for ticker in frames}
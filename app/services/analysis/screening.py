@@ -0,0 +1,216 @@
+"""
+Market screening job: Shioaji AmountRank (or full-market) scan → snapshot volume filter →
+yfinance bars → indicators and trend signals → LLM reports for the top-N tickers.
+Stages are pipelined per chunk: as soon as one snapshot chunk is filtered, its bars are
+downloaded and scored on the executor while other chunks are still being requested.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from app.configs.config import ScreeningConfig
+from app.internal.llm.batch import BatchAnalysisResult
+from app.internal.shioaji.stock_data import (
+    SCREENING_SNAPSHOT_FIELDS,
+    filter_snapshots,
+    get_market_contracts,
+    get_shioaji_scanners,
+    get_shioaji_snapshots,
+    records_to_frame,
+)
+from app.internal.yfinance.stock_data import KlineBatch, fetch_kline_data_many
+from app.services.analysis.stock_trend_pipeline import compute_trend_signal
+from app.utils.logger import log
+from app.utils.metrics import span
+
+# (yf_codes, chunk_size) -> KlineBatch, as `fetch_kline_data_many`
+BarFetcher = Callable[..., KlineBatch]
+BatchAnalyzer = Callable[[Dict[str, Dict[str, Any]]], Awaitable[BatchAnalysisResult]]
+
+
+@dataclass
+class ScreeningResult:
+    """
+    Attributes:
+        candidates (pd.DataFrame): Filtered stocks [yf_code, name, change_rate].
+        signals (Dict[str, Dict[str, Any]]): Signal dict per scored candidate.
+        top (List[str]): Candidates sent to the LLM, best first (see `rank_signals`).
+        reports (Dict[str, Dict[str, str]]): {suggestion, reason} per top ticker.
+        failures (Dict[str, str]): Candidates without bars, signal or report.
+        seconds (float): End-to-end wall time.
+        first_signal_seconds (Optional[float]): Time until the first signal was scored.
+    """
+
+    candidates: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=["yf_code", "name", "change_rate"])
+    )
+    signals: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    top: List[str] = field(default_factory=list)
+    reports: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    failures: Dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+    first_signal_seconds: Optional[float] = None
+
+
+def rank_signals(
+    signals: Dict[str, Dict[str, Any]],
+    change_rates: Dict[str, float],
+    top_n: int,
+) -> List[str]:
+    """
+    Order valid signals by the number of active `trend_categories`, then by today's
+    change rate, and return the best `top_n` tickers.
+    """
+    scored = [
+        (
+            len(signal.get("trend_categories", [])),
+            change_rates.get(yf_code, 0.0),
+            yf_code,
+        )
+        for yf_code, signal in signals.items()
+        if signal.get("signal_status") == "ok"
+    ]
+    scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    return [yf_code for _, _, yf_code in scored[: max(top_n, 0)]]
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    size = max(1, size)
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+async def ascreen_market(
+    api,
+    sj,
+    analyze: Optional[BatchAnalyzer] = None,
+    config: Optional[ScreeningConfig] = None,
+    executor: Optional[Executor] = None,
+    fetch_bars: BarFetcher = fetch_kline_data_many,
+    download_chunk_size: int = 100,
+    compact: bool = False,
+) -> ScreeningResult:
+    """
+    Run the screening job end to end.
+    Args:
+        api: Shioaji API instance (injected, logged in).
+        sj: Shioaji module/constant (injected).
+        analyze (BatchAnalyzer, optional): Async LLM analyzer for the top-N signals, e.g.
+            `AnalysisChainProvider.aanalyze_batch`; skipped if None.
+        config (ScreeningConfig, optional): Scan size, snapshot chunking and
+            concurrency, filter and top-N.
+        executor (Executor, optional): Runs the blocking API, download and pandas work
+            (the event loop's default executor if None).
+        fetch_bars (BarFetcher): Bulk bar downloader.
+        download_chunk_size (int): Tickers per bar download.
+        compact (bool): Enrich into float32 frames (see `enrich_with_all_indicators`).
+    Returns:
+        ScreeningResult: Candidates, signals, ranked top-N, LLM reports and timings.
+    """
+    if config is None:
+        config = ScreeningConfig()
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    result = ScreeningResult()
+
+    with span("screen_scan"):
+        if config.full_market:
+            contracts = await loop.run_in_executor(executor, get_market_contracts, api)
+            df_scanners = records_to_frame(contracts, ["code", "name"])
+        else:
+            df_scanners = await loop.run_in_executor(
+                executor, get_shioaji_scanners, api, sj, config.scanner_count
+            )
+            contracts = [
+                api.Contracts.Stocks[code] for code in df_scanners.get("code", [])
+            ]
+    if df_scanners.empty:
+        log.warning("[Screening] No scanner data available.")
+        result.seconds = time.perf_counter() - start
+        return result
+
+    async def score(yf_code: str, frame: pd.DataFrame) -> None:
+        signal = await loop.run_in_executor(
+            executor, compute_trend_signal, frame, yf_code, compact
+        )
+        if result.first_signal_seconds is None:
+            result.first_signal_seconds = time.perf_counter() - start
+        if signal.get("signal_status") == "ok":
+            result.signals[yf_code] = signal
+        else:
+            result.failures[yf_code] = signal.get("reason", "invalid signal")
+
+    async def fetch_and_score(yf_codes: List[str]) -> None:
+        with span("screen_fetch"):
+            batch = await loop.run_in_executor(
+                executor, lambda: fetch_bars(yf_codes, chunk_size=len(yf_codes))
+            )
+        result.failures.update(
+            {
+                yf_code: f"No kbar data: {reason}"
+                for yf_code, reason in batch.failures.items()
+            }
+        )
+        await asyncio.gather(
+            *(score(yf_code, frame) for yf_code, frame in batch.frames.items())
+        )
+
+    snapshot_slots = asyncio.Semaphore(max(1, config.snapshot_concurrency))
+    fetch_tasks: List[asyncio.Task] = []
+
+    async def snapshot_and_filter(contract_chunk: List[Any]) -> pd.DataFrame:
+        async with snapshot_slots:
+            with span("screen_snapshots"):
+                df_snapshots = await loop.run_in_executor(
+                    executor,
+                    lambda: get_shioaji_snapshots(
+                        api,
+                        contract_chunk,
+                        chunk_size=config.snapshot_chunk_size,
+                        fields=SCREENING_SNAPSHOT_FIELDS,
+                    ),
+                )
+        if df_snapshots.empty:
+            return pd.DataFrame(columns=["yf_code", "name", "change_rate"])
+        candidates = filter_snapshots(
+            df_snapshots, df_scanners, config.volume_ratio
+        ).dropna(subset=["yf_code"])
+        for yf_codes in _chunks(candidates["yf_code"].tolist(), download_chunk_size):
+            fetch_tasks.append(asyncio.create_task(fetch_and_score(yf_codes)))
+        return candidates
+
+    snapshot_tasks = [
+        asyncio.create_task(snapshot_and_filter(contract_chunk))
+        for contract_chunk in _chunks(contracts, config.snapshot_chunk_size)
+    ]
+    try:
+        candidate_chunks = await asyncio.gather(*snapshot_tasks)
+        await asyncio.gather(*fetch_tasks)
+    finally:
+        for task in snapshot_tasks + fetch_tasks:
+            task.cancel()
+
+    candidate_chunks = [chunk for chunk in candidate_chunks if not chunk.empty]
+    if candidate_chunks:
+        result.candidates = pd.concat(candidate_chunks, ignore_index=True)
+    change_rates = dict(
+        zip(result.candidates["yf_code"], result.candidates["change_rate"])
+    )
+    result.top = rank_signals(result.signals, change_rates, config.top_n)
+    if analyze is not None and result.top:
+        with span("screen_llm"):
+            analysis = await analyze(
+                {yf_code: result.signals[yf_code] for yf_code in result.top}
+            )
+        result.reports = analysis.reports
+        result.failures.update(analysis.failures)
+    result.seconds = time.perf_counter() - start
+    log.info(
+        f"[Screening] {len(result.candidates)} candidates, {len(result.signals)} scored, "
+        f"{len(result.reports)} reports in {result.seconds:.2f}s"
+    )
+    return result
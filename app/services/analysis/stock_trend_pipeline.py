@@ -3,8 +3,10 @@ Stock trend analysis pipeline: fetch kbar, calculate indicators, and generate st
 All functions are pure, testable, and follow SRP.
 """
 
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
 from app.internal.analysis.indicators import (
@@ -19,45 +21,102 @@ from app.internal.analysis.indicators import (
     calculate_rsi,
     calculate_vma,
 )
-from app.internal.yfinance.stock_data import fetch_kline_data
-from app.services.analysis.trend_analysis import generate_trend_signals
+from app.internal.analysis.panel_indicators import (
+    build_ohlcv_panel_from_frames,
+    calculate_panel_indicators,
+)
+from app.internal.yfinance.bar_cache import BarCache
+from app.internal.yfinance.stock_data import fetch_kline_data, fetch_kline_data_many
+from app.services.analysis.trend_analysis import (
+    REQUIRED_COLUMNS,
+    generate_trend_signals,
+    generate_trend_signals_panel,
+)
+from app.utils.metrics import INDICATOR_SECONDS, span, timed
 
 
-def fetch_and_prepare_kline(stock_id: str) -> pd.DataFrame:
+def fetch_and_prepare_kline(
+    stock_id: str, bar_cache: Optional[BarCache] = None
+) -> pd.DataFrame:
     """
     Fetch kbar data for a given stock_id and return a DataFrame.
+    Reads through the local bar cache when one is given.
     Returns empty DataFrame if data is unavailable.
     """
-    df = fetch_kline_data(stock_id)
+    with span("fetch"):
+        if bar_cache is not None:
+            df = bar_cache.get(stock_id)
+        else:
+            df = fetch_kline_data(stock_id)
     if df is None or df.empty:
         return pd.DataFrame()
     return df
 
 
-def enrich_with_all_indicators(df: pd.DataFrame) -> pd.DataFrame:
+INDICATOR_STEPS = [
+    calculate_moving_averages,
+    calculate_macd,
+    calculate_vma,
+    calculate_cci,
+    calculate_rsi,
+    calculate_bollinger_bands,
+    calculate_atr,
+    calculate_kdj,
+    calculate_obv,
+    calculate_adx,
+]
+
+
+def apply_indicator_steps(df: pd.DataFrame) -> pd.DataFrame:
+    """Run every `INDICATOR_STEPS` function in order, timing each one."""
+    for step in INDICATOR_STEPS:
+        with timed(INDICATOR_SECONDS, indicator=step.__name__):
+            df = step(df)
+    return df
+
+
+def enrich_with_all_indicators(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
     """
     Calculate and append all required technical indicators to the DataFrame.
     Returns the enriched DataFrame.
+    With `compact=True`, returns a new frame holding only the columns the signal
+    generator needs (`REQUIRED_COLUMNS`) as float32 (volume as int32 when integral),
+    and releases the float64 working frame with its intermediate columns.
     """
-    df = calculate_moving_averages(df)
-    df = calculate_macd(df)
-    df = calculate_vma(df)
-    df = calculate_cci(df)
-    df = calculate_rsi(df)
-    df = calculate_bollinger_bands(df)
-    df = calculate_atr(df)
-    df = calculate_kdj(df)
-    df = calculate_obv(df)
-    df = calculate_adx(df)
-    return df
+    with span("enrich"):
+        if not compact:
+            return apply_indicator_steps(df)
+        # Indicators are computed in float64 on a working copy; only the result is narrowed
+        work = df[["open", "high", "low", "close", "volume"]].astype(np.float64)
+        return to_compact_frame(apply_indicator_steps(work))
+
+
+def to_compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep `REQUIRED_COLUMNS` only, narrowed to float32 / int32."""
+    columns = {}
+    for name in REQUIRED_COLUMNS:
+        values = df[name].to_numpy()
+        if (
+            name == "volume"
+            and np.isfinite(values).all()
+            and (values == np.round(values)).all()
+            and np.abs(values).max(initial=0) <= np.iinfo(np.int32).max
+        ):
+            columns[name] = values.astype(np.int32)
+        else:
+            columns[name] = values.astype(np.float32)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_usage_bytes(df: pd.DataFrame) -> int:
+    """Total memory held by a frame, including its index."""
+    return int(df.memory_usage(index=True, deep=True).sum())
 
 
 def convert_numpy_types(obj):
     """
     Recursively convert numpy types in a dict/list to native Python types for serialization and readability.
     """
-    import numpy as np
-
     if isinstance(obj, dict):
         return {k: convert_numpy_types(v) for k, v in obj.items()}
     elif isinstance(obj, list):
@@ -67,17 +126,118 @@ def convert_numpy_types(obj):
     return obj
 
 
-def analyze_stock_trend_signal(stock_id: str) -> dict[str, Any]:
+def compute_trend_signal(
+    df: pd.DataFrame, stock_id: str, compact: bool = False
+) -> dict[str, Any]:
     """
-    Main pipeline: fetch kbar, enrich with indicators, and generate structured trend signals.
+    Enrich a kbar DataFrame with indicators and generate structured trend signals.
     Returns a signal dict for LLM or downstream use.
     """
-    df = fetch_and_prepare_kline(stock_id)
-    if df.empty:
+    if df is None or df.empty:
         return {"signal_status": "invalid", "reason": f"No kbar data for {stock_id}"}
-    enriched_df = enrich_with_all_indicators(df)
-    signal = generate_trend_signals(enriched_df)
+    enriched_df = enrich_with_all_indicators(df, compact=compact)
+    with span("signals"):
+        signal = generate_trend_signals(enriched_df)
     # Ensure the result is a dict at the top level
     if not isinstance(signal, dict):
         return {"signal_status": "invalid", "reason": "Signal is not a dict"}
     return convert_numpy_types(signal)
+
+
+def analyze_stock_trend_signal(
+    stock_id: str, bar_cache: Optional[BarCache] = None
+) -> dict[str, Any]:
+    """
+    Main pipeline: fetch kbar, enrich with indicators, and generate structured trend signals.
+    Returns a signal dict for LLM or downstream use.
+    """
+    df = fetch_and_prepare_kline(stock_id, bar_cache)
+    return compute_trend_signal(df, stock_id)
+
+
+def analyze_stock_trend_signals_batch(
+    stock_ids: List[str],
+    max_workers: int = 4,
+    chunk_size: int = 100,
+    backend: str = "thread",
+    compact: bool = False,
+) -> Dict[str, dict[str, Any]]:
+    """
+    Batch pipeline: bulk-download kbars for all stock_ids in chunked requests, then enrich
+    and score each ticker concurrently.
+    `backend` is "thread" (thread pool) or "process" (process pool over shared memory,
+    for large universes where the GIL would serialize the pandas work).
+    `compact` enriches into float32 frames (see `enrich_with_all_indicators`).
+    Returns a dict of signal dicts keyed by stock_id, in input order.
+    """
+    unique_ids = list(dict.fromkeys(stock_ids))
+    if not unique_ids:
+        return {}
+    batch = fetch_kline_data_many(unique_ids, chunk_size=chunk_size)
+    failed = {
+        stock_id: {
+            "signal_status": "invalid",
+            "reason": f"No kbar data for {stock_id}: {reason}",
+        }
+        for stock_id, reason in batch.failures.items()
+    }
+    frames = {
+        stock_id: batch.frames.get(stock_id, pd.DataFrame())
+        for stock_id in unique_ids
+        if stock_id not in failed
+    }
+    if backend == "process":
+        from app.services.analysis.process_pool import (
+            compute_trend_signals_in_processes,
+        )
+
+        signals = compute_trend_signals_in_processes(
+            frames, max_workers, compact=compact
+        )
+    elif backend == "thread":
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            signals = dict(
+                zip(
+                    frames,
+                    executor.map(
+                        lambda stock_id: compute_trend_signal(
+                            frames[stock_id], stock_id, compact
+                        ),
+                        frames,
+                    ),
+                )
+            )
+    else:
+        raise ValueError(f"Unknown analysis backend: {backend}")
+    signals.update(failed)
+    return {stock_id: signals[stock_id] for stock_id in unique_ids}
+
+
+def analyze_stock_trend_signals_panel(
+    stock_ids: List[str], chunk_size: int = 100
+) -> pd.DataFrame:
+    """
+    Universe pipeline: bulk-download kbars, compute indicators and trend signals for all
+    stock_ids at once on a (date x ticker) panel.
+    Returns a columnar signal table indexed by stock_id; tickers that failed to download
+    are included with signal_status "invalid".
+    """
+    unique_ids = list(dict.fromkeys(stock_ids))
+    batch = fetch_kline_data_many(unique_ids, chunk_size=chunk_size)
+    if batch.frames:
+        table = generate_trend_signals_panel(
+            calculate_panel_indicators(build_ohlcv_panel_from_frames(batch.frames))
+        )
+    else:
+        table = pd.DataFrame(columns=["signal_status"])
+    failed = pd.DataFrame(
+        {
+            "signal_status": "invalid",
+            "reason": [
+                f"No kbar data for {stock_id}: {reason}"
+                for stock_id, reason in batch.failures.items()
+            ],
+        },
+        index=pd.Index(list(batch.failures), name="ticker"),
+    )
+    return pd.concat([table, failed]).reindex(unique_ids)
@@ -3,10 +3,13 @@ Trend analysis service for stock market data.
 Provides pure, stateless functions for technical trend detection and signal generation.
 """
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Mapping
 
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
+from app.internal.analysis.streaming_indicators import StreamingIndicatorState
 from app.utils.logger import log
 
 REQUIRED_COLUMNS = [
@@ -210,3 +213,237 @@ def generate_trend_signals(
     ]
     signal["signal_status"] = "ok"
     return signal
+
+
+def generate_trend_signals_from_state(
+    state: StreamingIndicatorState,
+    trend_lookback_period: int = 60,
+    breakout_window: int = 10,
+    sustained_breakout_days: int = 3,
+) -> Dict[str, Any]:
+    """
+    Generate the same signal dict as `generate_trend_signals` from a streaming indicator
+    state, using only its buffered bars instead of recomputing over the full history.
+    """
+    if (
+        state.history.maxlen is not None
+        and state.history.maxlen < trend_lookback_period
+    ):
+        log.warning(
+            f"[Streaming] history_size {state.history.maxlen} is shorter than "
+            f"trend_lookback_period {trend_lookback_period}"
+        )
+    return generate_trend_signals(
+        state.to_frame(),
+        trend_lookback_period=trend_lookback_period,
+        breakout_window=breakout_window,
+        sustained_breakout_days=sustained_breakout_days,
+    )
+
+
+BOOLEAN_SIGNALS = [
+    "macd_bullish",
+    "recent_high",
+    "sustained_highs_enough",
+    "trend_momentum",
+    "volume_spike",
+    "momentum_kbar",
+    "rsi_overbought",
+    "rsi_oversold",
+]
+
+# `generate_trend_signals` compares the latest bar with the two before it
+MIN_SIGNAL_BARS = 3
+
+# Names that can appear in `trend_categories`, in the order they are listed
+TREND_CATEGORIES = BOOLEAN_SIGNALS + ["bollinger_breakout"]
+
+# Latest-bar values copied into the panel signal table, as in `generate_trend_signals`
+VALUE_COLUMNS = [
+    "macd",
+    "signal_line",
+    "cci",
+    "vma_short",
+    "vma_long",
+    "volume",
+    "rsi",
+    "bollinger_upper",
+    "bollinger_lower",
+    "atr",
+]
+
+
+def _trailing_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """(dates, tickers, window) view of the trailing windows, NaN-padded at the start."""
+    padding = np.full((window - 1, values.shape[1]), np.nan)
+    return sliding_window_view(np.vstack([padding, values]), window, axis=0)
+
+
+def _trailing_nanmean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the non-NaN values in each trailing window (NaN if there are none)."""
+    observed = ~np.isnan(values)
+    padding = np.zeros((1, values.shape[1]))
+    sums = np.cumsum(np.vstack([padding, np.where(observed, values, 0.0)]), axis=0)
+    counts = np.cumsum(np.vstack([padding, observed]), axis=0)
+    start = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums[1:] - sums[start]) / (counts[1:] - counts[start])
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    shifted = np.full_like(values, np.nan)
+    shifted[periods:] = values[: len(values) - periods]
+    return shifted
+
+
+def trend_signal_flags(
+    panel: Mapping[str, pd.DataFrame],
+    trend_lookback_period: int = 60,
+    breakout_window: int = 10,
+    sustained_breakout_days: int = 3,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Evaluate the `generate_trend_signals` rules at every date for every ticker at once.
+    Args:
+        panel (Mapping[str, pd.DataFrame]): Enriched panel (see `calculate_panel_indicators`)
+            holding every column in REQUIRED_COLUMNS as a (dates x tickers) frame.
+    Returns:
+        Dict[str, pd.DataFrame]: Boolean frame per signal in BOOLEAN_SIGNALS, plus
+        "sustained_highs" (int) and "bollinger_breakout" (str). Bars before a ticker's
+        MIN_SIGNAL_BARS-th bar have every flag off.
+    Row s equals `generate_trend_signals(df.iloc[: s + 1])` as long as
+    trend_lookback_period >= max(20, breakout_window + sustained_breakout_days + 1),
+    except that exact ties between the averaged vma_short and vma_long may round
+    either way.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in panel]
+    if missing:
+        raise ValueError(f"Panel is missing columns: {missing}")
+    index, columns = panel["close"].index, panel["close"].columns
+    v = {name: panel[name].to_numpy(dtype=float) for name in REQUIRED_COLUMNS}
+    close, open_, high, low, volume = (
+        v["close"],
+        v["open"],
+        v["high"],
+        v["low"],
+        v["volume"],
+    )
+    # Position of each bar within its ticker's own history (leading gaps excluded)
+    position = np.cumsum(~np.isnan(close), axis=0) - 1
+    flags: Dict[str, np.ndarray] = {}
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        prev_5ma = _shift(v["5ma"], 1)
+        ma_slope = np.where(
+            prev_5ma != 0, (v["5ma"] - _shift(v["10ma"], 1)) / prev_5ma, 0
+        )
+        flags["macd_bullish"] = (
+            (v["macd"] - v["signal_line"] > 0.01)
+            & (v["5ma"] > v["10ma"])
+            & (v["10ma"] > v["20ma"])
+            & (ma_slope > 0)
+        )
+
+        flags["recent_high"] = close > np.fmax(_shift(close, 1), _shift(close, 2))
+
+        # Close at s against the breakout-window high ending at s - 2; an empty
+        # look-back slice (first two bars) counts as -inf like `sustained_highs_count`
+        prior_high = _shift(_trailing_windows(close, breakout_window).max(axis=-1), 2)
+        prior_high[position <= 1] = -np.inf
+        breakout = close > prior_high
+        run = np.ones_like(breakout)
+        sustained = np.zeros(close.shape, dtype=np.int64)
+        for lag in range(sustained_breakout_days):
+            shifted = np.zeros_like(breakout)
+            shifted[lag:] = breakout[: len(breakout) - lag]
+            run &= shifted
+            sustained += run
+        flags["sustained_highs"] = sustained
+        flags["sustained_highs_enough"] = sustained >= sustained_breakout_days
+
+        flags["trend_momentum"] = (v["cci"] > 100) & (
+            _trailing_nanmean(v["vma_short"], trend_lookback_period)
+            > _trailing_nanmean(v["vma_long"], trend_lookback_period)
+        )
+
+        volume_20ma = _trailing_windows(volume, 20).mean(axis=-1)
+        flags["volume_spike"] = volume > 2 * volume_20ma
+
+        # Mirrors `momentum_kbar_signal`, including how NaN comparisons fall through
+        total_length = high - low
+        body_top = np.where(open_ > close, open_, close)
+        body_bottom = np.where(open_ < close, open_, close)
+        shadow_ratio = (high - body_top + body_bottom - low) / total_length
+        recent_high = np.fmax.reduce([_shift(high, lag) for lag in (1, 2, 3)])
+        recent_low = np.fmin.reduce([_shift(low, lag) for lag in (1, 2, 3)])
+        flags["momentum_kbar"] = (
+            (position > 0)
+            & ~(volume <= _shift(volume, 1) * 2)
+            & ~(total_length == 0)
+            & ~(shadow_ratio > 0.2)
+            & ((close > recent_high) | (close < recent_low))
+        )
+
+        flags["rsi_overbought"] = v["rsi"] > 70
+        flags["rsi_oversold"] = v["rsi"] < 30
+
+        flags["bollinger_breakout"] = np.where(
+            close > v["bollinger_upper"],
+            "breakout_upper",
+            np.where(close < v["bollinger_lower"], "breakout_lower", "none"),
+        )
+    # Like `generate_trend_signals`, a ticker needs three bars before it is scored
+    unscored = position < MIN_SIGNAL_BARS - 1
+    for name in BOOLEAN_SIGNALS + ["sustained_highs"]:
+        flags[name][unscored] = 0
+    flags["bollinger_breakout"][unscored] = "none"
+    return {
+        name: pd.DataFrame(values, index=index, columns=columns)
+        for name, values in flags.items()
+    }
+
+
+def generate_trend_signals_panel(
+    panel: Mapping[str, pd.DataFrame],
+    trend_lookback_period: int = 60,
+    breakout_window: int = 10,
+    sustained_breakout_days: int = 3,
+) -> pd.DataFrame:
+    """
+    Panel-mode `generate_trend_signals`: score every ticker's latest bar in one pass.
+    Args:
+        panel (Mapping[str, pd.DataFrame]): Enriched panel (see `calculate_panel_indicators`).
+    Returns:
+        pd.DataFrame: One row per ticker with the same fields as the single-ticker signal
+        dict. Tickers without a bar on the panel's last date get signal_status "invalid".
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in panel]
+    if missing:
+        log.error(f"[Error] Missing columns: {missing}")
+        tickers = next(iter(panel.values())).columns if panel else []
+        return pd.DataFrame(
+            {"signal_status": "invalid", "reason": "缺少必要欄位"},
+            index=pd.Index(tickers, name="ticker"),
+        )
+    # Same trailing `trend_lookback_period` slice that `generate_trend_signals` scores
+    window = {
+        name: panel[name].iloc[-trend_lookback_period:] for name in REQUIRED_COLUMNS
+    }
+    flags = trend_signal_flags(
+        window, trend_lookback_period, breakout_window, sustained_breakout_days
+    )
+    table = pd.DataFrame(
+        {name: window[name].iloc[-1].astype(float) for name in VALUE_COLUMNS}
+    )
+    for name in BOOLEAN_SIGNALS + ["sustained_highs", "bollinger_breakout"]:
+        table[name] = flags[name].iloc[-1]
+    categories = table[BOOLEAN_SIGNALS].assign(
+        bollinger_breakout=table["bollinger_breakout"] != "none"
+    )
+    table["trend_categories"] = [
+        list(categories.columns[row]) for row in categories.to_numpy()
+    ]
+    listed = window["close"].iloc[-1].notna()
+    table["signal_status"] = np.where(listed, "ok", "invalid")
+    table.index.name = "ticker"
+    return table
@@ -1,10 +1,26 @@
+"""
+Loguru setup. In queued mode (`logging.queued`) records are formatted on the calling
+thread but written by a background thread per sink, so slow stdout/disk I/O stays off
+the request path; high-volume events are sampled before formatting.
+Config and metrics are imported only by `init_config`, so importing `log` stays cheap
+and cannot cycle back into modules that log.
+"""
+
+import atexit
+import collections
 import logging
 import sys
+import threading
 import typing as t
+from functools import lru_cache
 from types import FrameType
 
 from loguru import logger
 
+if t.TYPE_CHECKING:
+    from app.configs.config import LoggingConfig
+    from app.utils.metrics import Counter
+
 _LOGGERS_MOVE_TO_LOGURU = [
     "uvicorn.asgi",
     "uvicorn.access",
@@ -14,6 +30,12 @@ _LOGGERS_MOVE_TO_LOGURU = [
 ]
 
 
+DROP_POLICIES = ("drop_new", "drop_oldest")
+
+# Bound on cached call-site depths in InterceptHandler
+_MAX_CACHED_DEPTHS = 4096
+
+
 class EndpointFilter(logging.Filter):
     def __init__(self, path: str, *args: t.Any, **kwargs: t.Any):
         super().__init__(*args, **kwargs)
@@ -23,47 +45,311 @@ class EndpointFilter(logging.Filter):
         return record.getMessage().find(self._path) == -1
 
 
+@lru_cache(maxsize=None)
+def _loguru_level(levelname: str, levelno: int) -> str:
+    try:
+        return logger.level(levelname).name
+    except ValueError:
+        return str(levelno)
+
+
 class InterceptHandler(logging.Handler):
+    """
+    Forward stdlib records to loguru, attributed to the caller's frame.
+    The number of `logging` frames above `emit` is fixed per call site, so the frame walk
+    runs once per (file, line) and its depth is reused afterwards.
+    """
+
+    def __init__(self, level: int = logging.NOTSET):
+        super().__init__(level)
+        self._depths: t.Dict[t.Tuple[str, int], int] = {}
+
+    def _depth(self, record: logging.LogRecord) -> int:
+        key = (record.pathname, record.lineno)
+        depth = self._depths.get(key)
+        if depth is None:
+            # Walk up from emit (skipping this frame) past the logging module's frames;
+            # the depth is relative to emit, where loguru is called
+            frame, depth = sys._getframe(1), 0
+            while frame and (
+                depth == 0 or frame.f_code.co_filename == logging.__file__
+            ):
+                frame = t.cast(FrameType, frame.f_back)
+                depth += 1
+            if len(self._depths) >= _MAX_CACHED_DEPTHS:
+                self._depths.clear()
+            self._depths[key] = depth
+        return depth
+
     def emit(self, record: logging.LogRecord) -> None:
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = str(record.levelno)
-        frame, depth = logging.currentframe(), 2
-        while frame and frame.f_code.co_filename == logging.__file__:
-            frame = t.cast(FrameType, frame.f_back)
-            depth += 1
-        logger.opt(depth=depth, exception=record.exc_info).log(
+        level = _loguru_level(record.levelname, record.levelno)
+        logger.opt(depth=self._depth(record), exception=record.exc_info).log(
             level,
             record.getMessage(),
         )
 
 
+class QueuedSink:
+    """
+    Loguru sink that hands formatted lines to a background writer thread.
+    At most `queue_size` lines wait; when full, "drop_new" discards the incoming line and
+    "drop_oldest" the oldest queued one. The writer wakes once `batch_size` lines are
+    queued or every `flush_interval` seconds, writes them in batches and flushes once.
+    `stop()` (called by loguru when the handler is removed) drains the queue; later lines
+    are written synchronously, or counted as dropped once the stream is closed.
+    """
+
+    def __init__(
+        self,
+        stream: t.TextIO,
+        name: str = "stream",
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        drop_policy: str = "drop_new",
+        close_stream: bool = False,
+        dropped_counter: t.Optional["Counter"] = None,
+    ):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy!r}")
+        self.stream = stream
+        self.name = name
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.close_stream = close_stream
+        self.dropped_counter = dropped_counter
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.flushes = 0
+        # deque appends/pops are atomic, so the hot path takes no lock; a full
+        # "drop_oldest" deque discards its oldest line on append
+        self._lines: t.Deque[str] = collections.deque(
+            maxlen=self.queue_size if drop_policy == "drop_oldest" else None
+        )
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-writer-{name}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        if self._stopped:
+            self._write_after_stop(message)
+            return
+        lines = self._lines
+        if len(lines) >= self.queue_size:
+            self._count_dropped()
+            if self.drop_policy == "drop_new":
+                return
+        lines.append(message)
+        if len(lines) >= self.batch_size:
+            self._wakeup.set()
+
+    def _count_dropped(self) -> None:
+        self.dropped += 1
+        if self.dropped_counter is not None:
+            self.dropped_counter.inc(sink=self.name)
+
+    def _write_after_stop(self, message: str) -> None:
+        if getattr(self.stream, "closed", False):
+            self._count_dropped()
+            return
+        self._write_batch([message])
+        self._flush()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            stopping = self._stopping
+            if self._drain():
+                self._flush()
+            if stopping:
+                return
+
+    def _drain(self) -> bool:
+        """Write all queued lines in `batch_size` chunks; return whether any were."""
+        drained = False
+        while self._lines:
+            batch: t.List[str] = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._lines.popleft())
+            except IndexError:
+                pass
+            self._write_batch(batch)
+            drained = True
+        return drained
+
+    def _write_batch(self, batch: t.List[str]) -> None:
+        try:
+            self.stream.write("".join(batch))
+        except Exception as e:
+            sys.stderr.write(f"[QueuedSink] Write to {self.name} failed: {e}\n")
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def _flush(self) -> None:
+        flush = getattr(self.stream, "flush", None)
+        if callable(flush):
+            try:
+                flush()
+                self.flushes += 1
+            except Exception:
+                pass
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write out the queued lines and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._stopped = True
+        if not self._thread.is_alive() and self._drain():
+            # Lines queued while the writer was finishing its last pass
+            self._flush()
+        if self.close_stream:
+            self.stream.close()
+
+    def stats(self) -> t.Dict[str, int]:
+        return {
+            "queued": len(self._lines),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "flushes": self.flushes,
+        }
+
+
+class SamplingFilter:
+    """
+    Loguru filter keeping one in `every` records whose message mentions an event
+    (e.g. {"health_check": 100}); all other records pass.
+    """
+
+    def __init__(
+        self,
+        sample_every: t.Mapping[str, int],
+        sampled_out_counter: t.Optional["Counter"] = None,
+    ):
+        self.sample_every = {
+            event: every for event, every in sample_every.items() if every > 1
+        }
+        self.sampled_out_counter = sampled_out_counter
+        self._seen: t.Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record: t.Dict[str, t.Any]) -> bool:
+        if not self.sample_every:
+            return True
+        message = record["message"]
+        for event, every in self.sample_every.items():
+            if event in message:
+                with self._lock:
+                    seen = self._seen.get(event, 0)
+                    self._seen[event] = seen + 1
+                if seen % every:
+                    if self.sampled_out_counter is not None:
+                        self.sampled_out_counter.inc(event=event)
+                    return False
+                return True
+        return True
+
+
 class Logger:
     def __init__(self):
         self.logger = logger
         self.logger.remove()
+        self.sinks: t.List[QueuedSink] = []
+        self._shutdown_registered = False
+
+    def init_config(
+        self,
+        log_level="INFO",
+        log_path: t.Optional[str] = None,
+        options: t.Optional["LoggingConfig"] = None,
+    ):
+        """
+        Route stdlib logging through loguru and log to stdout and a JSON-lines file.
+        With `options.queued`, both sinks write from background threads (`QueuedSink`).
+        Dropped and sampled-out records are counted in the metrics registry.
+        """
+        from app.configs.config import LoggingConfig
+        from app.utils.metrics import metrics
 
-    def init_config(self, log_level="INFO", log_path="app.log"):
+        if options is None:
+            options = LoggingConfig()
+        dropped_counter = metrics.counter(
+            "log_lines_dropped_total",
+            "Log lines dropped by a full queued sink.",
+            ["sink"],
+        )
+        sampled_out_counter = metrics.counter(
+            "log_records_sampled_out_total",
+            "Log records skipped by sampling.",
+            ["event"],
+        )
+        if log_path is None:
+            log_path = options.path
         logging.getLogger("uvicorn.access").addFilter(EndpointFilter(path="/health"))
         logging.getLogger().handlers = [InterceptHandler()]
         for logger_name in _LOGGERS_MOVE_TO_LOGURU:
-            logging.getLogger(logger_name).handlers = [InterceptHandler()]
+            stdlib_logger = logging.getLogger(logger_name)
+            stdlib_logger.handlers = [InterceptHandler()]
+            # The root logger intercepts too; propagating would log every record twice
+            stdlib_logger.propagate = False
+        stdout_sink: t.Any = sys.stdout
+        file_sink: t.Any = log_path
+        self.sinks = []
+        if options.queued:
+            queue_options = {
+                "queue_size": options.queue_size,
+                "batch_size": options.batch_size,
+                "flush_interval": options.flush_interval_seconds,
+                "drop_policy": options.drop_policy,
+                "dropped_counter": dropped_counter,
+            }
+            stdout_sink = QueuedSink(sys.stdout, name="stdout", **queue_options)
+            file_sink = QueuedSink(
+                open(log_path, "a", encoding="utf-8"),
+                name="file",
+                close_stream=True,
+                **queue_options,
+            )
+            self.sinks = [stdout_sink, file_sink]
+            if not self._shutdown_registered:
+                atexit.register(self.shutdown)
+                self._shutdown_registered = True
         logger.configure(
             handlers=[
                 {
-                    "sink": sys.stdout,
+                    "sink": stdout_sink,
                     "level": log_level,
                     "serialize": False,  # Enable JSON lines
+                    # One filter per sink: loguru runs each handler's filter separately
+                    "filter": SamplingFilter(options.sample_every, sampled_out_counter),
                 },
                 {
-                    "sink": log_path,
+                    "sink": file_sink,
                     "level": log_level,
                     "serialize": True,  # Enable JSON lines
+                    "filter": SamplingFilter(options.sample_every, sampled_out_counter),
                 },
             ]
         )
 
+    def shutdown(self):
+        """Remove the handlers, draining queued sinks."""
+        self.logger.remove()
+        self.sinks = []
+
     def get_logger(self):
         return self.logger
 
@@ -0,0 +1,103 @@
+"""
+Single-flight call deduplication: concurrent calls with the same key share one in-flight
+execution and its result (or exception). Nothing is cached once the call completes.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from app.utils.metrics import metrics
+
+T = TypeVar("T")
+
+COALESCED_CALLS = metrics.counter(
+    "single_flight_coalesced_total",
+    "Calls that waited on another caller's in-flight execution.",
+    ["flight"],
+)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls per key, for threads (`do`) and coroutines (`ado`).
+    Counters: `calls` made, `executions` actually run, `coalesced` calls that waited on
+    another caller's execution instead.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._threads: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run `fn()` unless a thread is already running it for `key`; then wait for it."""
+        with self._lock:
+            self.calls += 1
+            call = self._threads.get(key)
+            leader = call is None
+            if leader:
+                call = self._threads[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            COALESCED_CALLS.inc(flight=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._threads[key]
+            call.done.set()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await `fn()` unless it is already in flight for `key` on this event loop; then
+        await the same task. The task is shielded, so a cancelled caller does not cancel
+        it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.calls += 1
+            task = self._tasks.get(key)
+            if task is None or task.get_loop() is not loop:
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda done: self._forget(key, done))
+                self.executions += 1
+            else:
+                self.coalesced += 1
+                COALESCED_CALLS.inc(flight=self.name)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._threads) + len(self._tasks),
+            }
@@ -0,0 +1 @@
+# __init__ for benchmarks module
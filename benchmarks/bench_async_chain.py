@@ -0,0 +1,66 @@
+"""
+Load test for the async analysis chain: N concurrent `ainvoke` calls with a blocking
+fetch stage and an async LLM, compared with running the same requests one by one.
+
+Usage:
+    uv run python -m benchmarks.bench_async_chain [--requests 32] [--workers 8]
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+from langchain_core.prompts import PromptTemplate
+
+from app.internal.llm import chain as llm_chain
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--fetch-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    def blocking_fetch(stock_id, bar_cache=None):
+        time.sleep(args.fetch_latency)
+        return pd.DataFrame()
+
+    class FakeLLM:
+        async def ainvoke(self, prompt):
+            await asyncio.sleep(args.llm_latency)
+            return SimpleNamespace(content='{"suggestion": "Wait", "reason": "x"}')
+
+    llm_chain.fetch_and_prepare_kline = blocking_fetch
+    llm_chain.compute_trend_signal = lambda df, stock_id: {"signal_status": "ok"}
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"], template="{stock_id} {signal_json}"
+    )
+    chain = llm_chain.build_stock_analysis_chain(
+        FakeLLM(), prompt, executor=ThreadPoolExecutor(max_workers=args.workers)
+    )
+    stock_ids = [f"{2300 + i}.TW" for i in range(args.requests)]
+
+    async def serial():
+        for stock_id in stock_ids:
+            await chain.ainvoke(stock_id)
+
+    async def concurrent():
+        await asyncio.gather(*(chain.ainvoke(stock_id) for stock_id in stock_ids))
+
+    for name, scenario in (("serialized", serial), ("concurrent", concurrent)):
+        start = time.perf_counter()
+        asyncio.run(scenario())
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<11} {args.requests} requests: {elapsed:6.2f}s "
+            f"({args.requests / elapsed:5.1f} req/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
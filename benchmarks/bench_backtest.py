@@ -0,0 +1,59 @@
+"""
+Backtest throughput: one-pass panel replay (run_backtest) over a large universe versus
+re-slicing the last 60 bars and calling generate_trend_signals for every historical day.
+
+Usage:
+    uv run python -m benchmarks.bench_backtest [--tickers 2000] [--years 10]
+"""
+
+import argparse
+import time
+
+from app.services.analysis.backtest import BacktestRules, run_backtest
+from app.services.analysis.stock_trend_pipeline import enrich_with_all_indicators
+from app.services.analysis.trend_analysis import generate_trend_signals
+from benchmarks.synthetic import make_ohlcv, make_universe
+
+TRADING_DAYS_PER_YEAR = 250
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument(
+        "--replay-days",
+        type=int,
+        default=250,
+        help="Days timed in the per-day replay (extrapolated to the universe)",
+    )
+    args = parser.parse_args()
+    n_bars = args.years * TRADING_DAYS_PER_YEAR
+
+    enriched = enrich_with_all_indicators(make_ohlcv(n_bars))
+    start = time.perf_counter()
+    for end in range(n_bars - args.replay_days, n_bars):
+        generate_trend_signals(enriched.iloc[:end].iloc[-60:])
+    per_day = (time.perf_counter() - start) / args.replay_days
+    replay_seconds = per_day * n_bars * args.tickers
+
+    universe = make_universe(args.tickers, n_bars)
+    start = time.perf_counter()
+    result = run_backtest(
+        universe,
+        BacktestRules(holding_period=5),
+        chunk_size=args.chunk_size,
+        max_workers=args.max_workers,
+    )
+    backtest_seconds = time.perf_counter() - start
+
+    print(f"universe: {args.tickers} tickers x {n_bars} bars")
+    print(f"per-day replay (extrapolated): {replay_seconds:10.1f} s")
+    print(f"run_backtest:                  {backtest_seconds:10.1f} s")
+    print(result.summary.to_string(float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
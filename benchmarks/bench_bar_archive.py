@@ -0,0 +1,90 @@
+"""
+Loading a long multi-ticker history (1M+ bars by default) from the memory-mapped
+BarArchive versus the SQLite BarCache and versus re-downloading it in bulk.
+Re-downloads use the offline yfinance fake from bench_bulk_download, so they measure
+request latency plus frame parsing only.
+
+Usage:
+    uv run python -m benchmarks.bench_bar_archive [--tickers 400] [--bars 2500]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+from app.configs.config import BarCacheConfig
+from app.internal.yfinance.bar_archive import BarArchive
+from app.internal.yfinance.bar_cache import BarCache
+from app.internal.yfinance.stock_data import fetch_kline_data_many
+from app.services.analysis.backtest import (
+    load_bars_from_archive,
+    load_bars_from_bar_cache,
+)
+from benchmarks.bench_bulk_download import make_fake_download
+from benchmarks.synthetic import make_universe
+
+
+def timed(func) -> tuple[float, dict]:
+    start = time.perf_counter()
+    frames = func()
+    # Touch every close so lazily mapped pages are actually read
+    sum(float(df["close"].sum()) for df in frames.values())
+    return time.perf_counter() - start, frames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=400)
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    args = parser.parse_args()
+
+    universe = make_universe(args.tickers, args.bars)
+    tickers = list(universe)
+    total_bars = args.tickers * args.bars
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = BarArchive(str(Path(tmp) / "archive"))
+        start = time.perf_counter()
+        for ticker, frame in universe.items():
+            archive.append(ticker, frame)
+        archive_write = time.perf_counter() - start
+
+        cache = BarCache(
+            BarCacheConfig(enabled=True, path=str(Path(tmp) / "bars.sqlite3")),
+            downloader=lambda code, start, interval: universe[code],
+        )
+        for ticker in tickers:
+            cache.get(ticker)
+
+        archive_read, _ = timed(lambda: load_bars_from_archive(archive, tickers))
+        sqlite_read, _ = timed(lambda: load_bars_from_bar_cache(cache, tickers))
+        with patch(
+            "app.internal.yfinance.stock_data.yf.download",
+            make_fake_download(args.bars, args.latency),
+        ):
+            download, _ = timed(
+                lambda: (
+                    fetch_kline_data_many(
+                        tickers, pd.Timestamp("2000-01-01"), chunk_size=args.chunk_size
+                    ).frames
+                )
+            )
+
+    print(f"history: {args.tickers} tickers x {args.bars} bars = {total_bars:,} bars")
+    print(f"archive append:          {archive_write:8.2f} s")
+    print(f"{'source':<24}{'seconds':>8}{'Mbars/s':>10}")
+    for source, seconds in (
+        ("BarArchive (mmap)", archive_read),
+        ("BarCache (SQLite)", sqlite_read),
+        (f"re-download ({args.latency}s/req)", download),
+    ):
+        print(f"{source:<24}{seconds:>8.3f}{total_bars / seconds / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Wall time of fetching a ticker universe one by one with fetch_kline_data versus chunked
+bulk requests with fetch_kline_data_many. yfinance is replaced by an offline fake that
+sleeps `--latency` seconds per HTTP request, so the numbers isolate request overhead.
+
+Usage:
+    uv run python -m benchmarks.bench_bulk_download [--tickers 50 200] [--latency 0.02]
+"""
+
+import argparse
+import time
+from typing import List
+from unittest.mock import patch
+
+import pandas as pd
+
+from app.internal.yfinance.stock_data import fetch_kline_data, fetch_kline_data_many
+from benchmarks.synthetic import make_universe
+
+RAW_COLUMNS = {
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "volume": "Volume",
+}
+
+
+def make_fake_download(n_bars: int, latency: float):
+    """
+    Return a `yf.download` stand-in; a list of tickers costs one request. Column layout
+    follows yfinance: (ticker, field) with group_by="ticker", else (field, ticker).
+    """
+
+    def fake_download(tickers, group_by="column", **kwargs) -> pd.DataFrame:
+        time.sleep(latency)
+        codes: List[str] = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = [
+            frame.rename(columns=RAW_COLUMNS)
+            for frame in make_universe(len(codes), n_bars).values()
+        ]
+        data = pd.concat(dict(zip(codes, frames)), axis=1)
+        if group_by != "ticker":
+            data = data.swaplevel(0, 1, axis=1)
+        return data
+
+    return fake_download
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--bars", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    args = parser.parse_args()
+
+    fake_download = make_fake_download(args.bars, args.latency)
+    print(f"{'tickers':>8}{'one-by-one (s)':>16}{'bulk (s)':>10}{'speedup':>9}")
+    for n_tickers in args.tickers:
+        codes = [f"{1000 + i}.TW" for i in range(n_tickers)]
+        with patch("yfinance.download", side_effect=fake_download):
+            start = time.perf_counter()
+            single = {code: fetch_kline_data(code) for code in codes}
+            loop_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch = fetch_kline_data_many(codes, chunk_size=args.chunk_size)
+            bulk_seconds = time.perf_counter() - start
+        assert all(not frame.empty for frame in single.values())
+        assert len(batch.frames) == n_tickers
+        print(
+            f"{n_tickers:>8}{loop_seconds:>16.3f}{bulk_seconds:>10.3f}"
+            f"{loop_seconds / bulk_seconds:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
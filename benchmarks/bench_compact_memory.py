@@ -0,0 +1,54 @@
+"""
+Memory footprint of enriched frames: standard float64 enrichment (every indicator and
+intermediate column) versus compact mode (REQUIRED_COLUMNS only, float32 / int32).
+
+Usage:
+    uv run python -m benchmarks.bench_compact_memory [--tickers 500] [--bars 250]
+"""
+
+import argparse
+import time
+
+from app.services.analysis.stock_trend_pipeline import (
+    enrich_with_all_indicators,
+    memory_usage_bytes,
+)
+from benchmarks.synthetic import make_universe
+
+
+def measure(universe, compact: bool) -> tuple[float, float]:
+    """Mean bytes per enriched ticker and total enrichment seconds."""
+    start = time.perf_counter()
+    total = 0
+    for frame in universe.values():
+        total += memory_usage_bytes(
+            enrich_with_all_indicators(frame.copy(), compact=compact)
+        )
+    return total / len(universe), time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=250)
+    args = parser.parse_args()
+
+    universe = make_universe(args.tickers, args.bars)
+    standard_bytes, standard_seconds = measure(universe, compact=False)
+    compact_bytes, compact_seconds = measure(universe, compact=True)
+
+    print(f"universe: {args.tickers} tickers x {args.bars} bars")
+    print(f"{'mode':>10}{'KiB/ticker':>14}{'universe MiB':>16}{'seconds':>10}")
+    for mode, per_ticker, seconds in (
+        ("standard", standard_bytes, standard_seconds),
+        ("compact", compact_bytes, compact_seconds),
+    ):
+        print(
+            f"{mode:>10}{per_ticker / 1024:>14.1f}"
+            f"{per_ticker * args.tickers / 2**20:>16.1f}{seconds:>10.2f}"
+        )
+    print(f"reduction: {standard_bytes / compact_bytes:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Per-call timing of calculate_obv and calculate_cci against their legacy
+implementations (Python row loop / rolling().apply).
+
+Usage:
+    uv run python -m benchmarks.bench_indicators [--sizes 100 10000 1000000]
+"""
+
+import argparse
+import time
+from typing import Callable
+
+import pandas as pd
+
+from app.internal.analysis.indicators import calculate_cci, calculate_obv
+from benchmarks.synthetic import make_ohlcv
+
+
+def legacy_obv(df: pd.DataFrame) -> pd.DataFrame:
+    obv = [0]
+    for i in range(1, len(df)):
+        if df["close"].iloc[i] > df["close"].iloc[i - 1]:
+            obv.append(obv[-1] + df["volume"].iloc[i])
+        elif df["close"].iloc[i] < df["close"].iloc[i - 1]:
+            obv.append(obv[-1] - df["volume"].iloc[i])
+        else:
+            obv.append(obv[-1])
+    df["obv"] = obv
+    return df
+
+
+def legacy_cci(df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
+    typical_price = (df["high"] + df["low"] + df["close"]) / 3
+    moving_avg = typical_price.rolling(window=window).mean()
+    mean_deviation = typical_price.rolling(window=window).apply(
+        lambda x: abs(x - x.mean()).mean(), raw=True
+    )
+    df["cci"] = (typical_price - moving_avg) / (0.015 * mean_deviation)
+    return df
+
+
+def time_call(func: Callable[[pd.DataFrame], pd.DataFrame], df: pd.DataFrame) -> float:
+    """Return the best-of-N wall time in seconds, with N scaled to the input size."""
+    repeats = 5 if len(df) <= 10_000 else 1
+    best = float("inf")
+    for _ in range(repeats):
+        frame = df.copy()
+        start = time.perf_counter()
+        func(frame)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--legacy-max",
+        type=int,
+        default=10_000,
+        help="Largest size at which the slow legacy versions are timed",
+    )
+    args = parser.parse_args()
+
+    print(f"{'function':<16}{'bars':>10}{'legacy (ms)':>14}{'vectorized (ms)':>18}")
+    for size in args.sizes:
+        df = make_ohlcv(size)
+        for name, legacy, vectorized in (
+            ("calculate_obv", legacy_obv, calculate_obv),
+            ("calculate_cci", legacy_cci, calculate_cci),
+        ):
+            new_ms = time_call(vectorized, df) * 1000
+            if size <= args.legacy_max:
+                legacy_ms = f"{time_call(legacy, df) * 1000:.2f}"
+            else:
+                legacy_ms = "skipped"
+            print(f"{name:<16}{size:>10}{legacy_ms:>14}{new_ms:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
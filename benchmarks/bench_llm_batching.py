@@ -0,0 +1,101 @@
+"""
+Requests, estimated prompt tokens and wall time for a nightly scan: one completion per
+ticker (stock_analyzer_prompt.md) versus batched completions
+(stock_batch_analyzer_prompt.md). The fake LLM answers after `--latency` seconds per
+request, with `--concurrency` requests in flight; the per-ticker time is derived from
+the same latency model rather than measured.
+
+Usage:
+    uv run python -m benchmarks.bench_llm_batching [--tickers 300] [--max-tokens 4096]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.configs.config import LLMConfig
+from app.internal.llm.batch import (
+    aanalyze_signals_batched,
+    estimate_tokens,
+    load_batch_prompt_template,
+)
+from app.internal.llm.chain import load_prompt_template
+from app.services.analysis.stock_trend_pipeline import compute_trend_signal
+from benchmarks.synthetic import make_universe
+
+PROMPT = Path("app/prompts/stock_analyzer_prompt.md")
+BATCH_PROMPT = Path("app/prompts/stock_batch_analyzer_prompt.md")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=300)
+    parser.add_argument("--max-tokens", type=int, default=4096)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    signals = {
+        ticker: compute_trend_signal(frame, ticker)
+        for ticker, frame in make_universe(args.tickers, 120).items()
+    }
+    single_template = load_prompt_template(PROMPT)
+    single_tokens = sum(
+        estimate_tokens(
+            single_template.format(
+                stock_id=stock_id, signal_json=json.dumps(signal, indent=2)
+            )
+        )
+        for stock_id, signal in signals.items()
+    )
+    single_seconds = math.ceil(args.tickers / args.concurrency) * args.latency
+
+    class FakeBatchLLM:
+        prompt_tokens = 0
+
+        async def ainvoke(self, prompt):
+            self.prompt_tokens += estimate_tokens(prompt)
+            await asyncio.sleep(args.latency)
+            ids = re.findall(r'"stock_id": "([^"]+)"', prompt.split("```json")[-1])
+            answers = [
+                {"stock_id": i, "suggestion": "Wait", "reason": "flat"} for i in ids
+            ]
+            return SimpleNamespace(content=json.dumps(answers))
+
+    llm = FakeBatchLLM()
+    config = LLMConfig(
+        stock_analyzer_prompt_path=str(PROMPT),
+        temperature=0.0,
+        max_tokens=args.max_tokens,
+        retry=3,
+    )
+    start = time.perf_counter()
+    result = asyncio.run(
+        aanalyze_signals_batched(
+            signals,
+            llm,
+            load_batch_prompt_template(BATCH_PROMPT),
+            config,
+            max_concurrency=args.concurrency,
+        )
+    )
+    batch_seconds = time.perf_counter() - start
+
+    print(f"{args.tickers} tickers, max_tokens={args.max_tokens}")
+    print(f"{'mode':<10}{'requests':>10}{'prompt tokens':>16}{'seconds':>10}")
+    print(
+        f"{'single':<10}{args.tickers:>10}{single_tokens:>16,}{single_seconds:>10.2f}"
+    )
+    print(
+        f"{'batched':<10}{result.requests:>10}{llm.prompt_tokens:>16,}"
+        f"{batch_seconds:>10.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Latency of the analysis chain's LLM stage on a cache miss (simulated LLM latency)
+vs. a cache hit, for the in-memory and SQLite backends.
+
+Usage:
+    uv run python -m benchmarks.bench_llm_cache [--llm-latency 1.0]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from langchain_core.prompts import PromptTemplate
+
+from app.internal.llm.cache import (
+    DiskCacheBackend,
+    InMemoryCacheBackend,
+    LLMResponseCache,
+)
+from app.internal.llm.chain import (
+    build_cached_llm_chain,
+    build_json_output_parsing_chain,
+    build_llm_call_chain,
+    build_prompt_formatting_chain,
+)
+
+
+class SleepyLLM:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, prompt):
+        time.sleep(self.latency)
+        return SimpleNamespace(content='{"suggestion": "Wait", "reason": "flat"}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--hits", type=int, default=1000)
+    args = parser.parse_args()
+
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"],
+        template="{stock_id}\n{signal_json}",
+    )
+    llm_chain = (
+        build_prompt_formatting_chain(prompt)
+        | build_llm_call_chain(SleepyLLM(args.llm_latency))
+        | build_json_output_parsing_chain()
+    )
+    request = {
+        "stock_id": "2330.TW",
+        "signal": {"signal_status": "ok", "rsi": 51.2, "trend_categories": []},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": InMemoryCacheBackend(1024, 3600),
+            "disk": DiskCacheBackend(str(Path(tmp) / "cache.sqlite3"), 1024, 3600),
+        }
+        for name, backend in backends.items():
+            chain = build_cached_llm_chain(llm_chain, LLMResponseCache(backend), "v1")
+            start = time.perf_counter()
+            chain.invoke(request)
+            miss_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for _ in range(args.hits):
+                chain.invoke(request)
+            hit_ms = (time.perf_counter() - start) / args.hits * 1000
+            print(f"{name:<8} miss: {miss_ms:8.1f} ms   hit: {hit_ms:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+A scan firing many LLM calls at a throttling endpoint: unscheduled calls with the SDK's
+blind retries versus the AIMD / rate-aware LLMScheduler. The endpoint is the offline
+fake Azure server from the tests (429 above `--capacity` concurrent calls).
+
+Usage:
+    uv run python -m benchmarks.bench_llm_scheduler [--calls 200] [--capacity 8]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.configs.config import LLMSchedulerConfig
+from app.internal.llm.chain import get_llm_client
+from app.internal.llm.scheduler import LLMScheduler, ScheduledLLM
+from tests.fakes import FakeAzureServer, make_config
+
+
+async def scan(llm, calls: int) -> tuple[int, int]:
+    results = await asyncio.gather(
+        *(llm.ainvoke(f"prompt {i}") for i in range(calls)), return_exceptions=True
+    )
+    failed = sum(isinstance(r, Exception) for r in results)
+    return calls - failed, failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument(
+        "--rpm", type=int, default=60000, help="Scheduler requests-per-minute budget"
+    )
+    args = parser.parse_args()
+
+    print(f"{args.calls} calls, server capacity {args.capacity}")
+    print(f"{'mode':<12}{'ok':>6}{'failed':>8}{'429s':>7}{'seconds':>9}")
+    for mode in ("unscheduled", "scheduled"):
+        server = FakeAzureServer(args.capacity, args.latency)
+        config = make_config("prompt.md")
+        config.llm.scheduler = LLMSchedulerConfig(
+            enabled=mode == "scheduled", requests_per_minute=args.rpm
+        )
+
+        async def run():
+            transport = httpx.MockTransport(server)
+            async with httpx.AsyncClient(transport=transport) as http:
+                llm = get_llm_client(config, http_async_client=http)
+                if mode == "scheduled":
+                    llm = ScheduledLLM(
+                        llm, LLMScheduler(config.llm.scheduler), config.llm
+                    )
+                return await scan(llm, args.calls)
+
+        start = time.perf_counter()
+        ok, failed = asyncio.run(run())
+        seconds = time.perf_counter() - start
+        print(f"{mode:<12}{ok:>6}{failed:>8}{server.throttled:>7}{seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Time to first byte of the streaming analysis (signal event, then completed suggestion)
+versus waiting for the full non-streaming chain. The data stage blocks for
+`--fetch-latency` seconds and the fake LLM emits `--chunks` deltas `--chunk-latency` apart.
+
+Usage:
+    uv run python -m benchmarks.bench_llm_streaming [--fetch-latency 0.3]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+from langchain_core.messages import AIMessageChunk
+from langchain_core.prompts import PromptTemplate
+
+from app.internal.llm import chain as llm_chain
+
+REPORT = json.dumps(
+    {
+        "suggestion": "Long",
+        "reason": "Price above all moving averages with a bullish MACD crossover. " * 4,
+    }
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fetch-latency", type=float, default=0.3)
+    parser.add_argument("--chunks", type=int, default=60)
+    parser.add_argument("--chunk-latency", type=float, default=0.03)
+    args = parser.parse_args()
+    size = -(-len(REPORT) // args.chunks)
+
+    class FakeStreamingLLM:
+        async def astream(self, prompt):
+            for offset in range(0, len(REPORT), size):
+                await asyncio.sleep(args.chunk_latency)
+                yield AIMessageChunk(content=REPORT[offset : offset + size])
+
+        async def ainvoke(self, prompt):
+            text = "".join([chunk.content async for chunk in self.astream(prompt)])
+            return SimpleNamespace(content=text)
+
+    def blocking_fetch(stock_id, bar_cache=None):
+        time.sleep(args.fetch_latency)
+        return pd.DataFrame()
+
+    llm_chain.fetch_and_prepare_kline = blocking_fetch
+    llm_chain.compute_trend_signal = lambda df, stock_id: {"signal_status": "ok"}
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"], template="{stock_id} {signal_json}"
+    )
+    llm = FakeStreamingLLM()
+
+    async def blocking() -> float:
+        start = time.perf_counter()
+        await llm_chain.build_stock_analysis_chain(llm, prompt).ainvoke("2330.TW")
+        return time.perf_counter() - start
+
+    async def streaming() -> dict:
+        start = time.perf_counter()
+        first = {}
+        async for event, _ in llm_chain.astream_stock_analysis("2330.TW", llm, prompt):
+            first.setdefault(event, time.perf_counter() - start)
+        return first
+
+    blocking_seconds = asyncio.run(blocking())
+    arrivals = asyncio.run(streaming())
+    print(f"non-streaming response:   {blocking_seconds:6.2f} s")
+    print(f"stream: signal event      {arrivals['signal']:6.2f} s")
+    print(f"stream: first token       {arrivals['token']:6.2f} s")
+    print(f"stream: suggestion        {arrivals['suggestion']:6.2f} s")
+    print(f"stream: full report       {arrivals['report']:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
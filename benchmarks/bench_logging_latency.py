@@ -0,0 +1,96 @@
+"""
+Request-path latency cost of logging: p50/p99 of a simulated request that logs three
+records, with logging off, with synchronous sinks (the previous `init_config`) and with
+queued sinks. stdout is replaced by a stream whose writes take `--stdout-latency-ms`,
+standing in for a pipe to a slow log collector; the JSON-lines file is real.
+
+Usage:
+    uv run python -m benchmarks.bench_logging_latency [--requests 5000] [--stdout-latency-ms 0.2]
+"""
+
+import argparse
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.configs.config import LoggingConfig
+from app.utils.logger import Loggers, log
+
+
+class SlowStream(io.StringIO):
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def write(self, text):
+        time.sleep(self.latency)
+        return len(text)
+
+
+SIGNAL = {"signal_status": "ok", "close": 612.0, "macd": 3.2, "rsi": 61.5}
+
+
+def handle_request(i: int) -> str:
+    log.info(f"[API] analysis request {i}")
+    body = json.dumps({"stock_id": f"{1000 + i % 500}.TW", "signal": SIGNAL})
+    log.debug(f"[API] signal {body}")
+    log.info({"event": "analysis_done", "request": i})
+    return body
+
+
+def measure(requests: int) -> np.ndarray:
+    latencies = np.empty(requests)
+    for i in range(requests):
+        start = time.perf_counter()
+        handle_request(i)
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def run_mode(mode: str, args, log_dir: Path) -> np.ndarray:
+    stdout = sys.stdout
+    sys.stdout = SlowStream(args.stdout_latency_ms / 1000)
+    try:
+        if mode != "off":
+            Loggers.init_config(
+                log_level="INFO",
+                log_path=str(log_dir / f"{mode}.log"),
+                options=LoggingConfig(queued=mode == "queued"),
+            )
+        latencies = measure(args.requests)
+        drain_start = time.perf_counter()
+        Loggers.shutdown()
+        drain = time.perf_counter() - drain_start
+    finally:
+        sys.stdout = stdout
+    print(
+        f"{mode:>8}{np.percentile(latencies, 50) * 1e6:>10.1f}"
+        f"{np.percentile(latencies, 99) * 1e6:>10.1f}"
+        f"{latencies.max() * 1e3:>10.2f}{drain:>10.2f}"
+    )
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--stdout-latency-ms", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(
+        f"{args.requests} requests, 2 INFO records each, "
+        f"stdout write latency {args.stdout_latency_ms} ms"
+    )
+    print(f"{'logging':>8}{'p50 us':>10}{'p99 us':>10}{'max ms':>10}{'drain s':>10}")
+    with tempfile.TemporaryDirectory() as log_dir:
+        for mode in ("off", "sync", "queued"):
+            run_mode(mode, args, Path(log_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Cost of the latency instrumentation: `compute_trend_signal` (enrich + per-indicator
+timings + signals) over a synthetic universe with metrics enabled versus disabled, plus
+the per-call cost of one `span`.
+
+Usage:
+    uv run python -m benchmarks.bench_metrics_overhead [--tickers 300] [--bars 250]
+"""
+
+import argparse
+import time
+
+from app.services.analysis.stock_trend_pipeline import (
+    INDICATOR_STEPS,
+    compute_trend_signal,
+)
+from app.utils.metrics import metrics, span
+from benchmarks.synthetic import make_universe
+
+
+def score(universe, enabled: bool) -> float:
+    """Seconds to score the universe once."""
+    metrics.enabled = enabled
+    start = time.perf_counter()
+    for stock_id, frame in universe.items():
+        compute_trend_signal(frame, stock_id)
+    return time.perf_counter() - start
+
+
+def measure(universe, rounds: int) -> tuple[float, float]:
+    """Best-of-`rounds` (disabled, enabled) seconds; modes alternate to cancel drift."""
+    disabled = enabled = float("inf")
+    for _ in range(rounds):
+        disabled = min(disabled, score(universe, False))
+        enabled = min(enabled, score(universe, True))
+    return disabled, enabled
+
+
+def span_cost(calls: int) -> float:
+    """Mean seconds per empty `span` block."""
+    metrics.enabled = True
+    start = time.perf_counter()
+    for _ in range(calls):
+        with span("bench"):
+            pass
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=300)
+    parser.add_argument("--bars", type=int, default=250)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    universe = make_universe(args.tickers, args.bars)
+    score(universe, True)  # warm-up
+    disabled, enabled = measure(universe, args.rounds)
+
+    print(f"universe: {args.tickers} tickers x {args.bars} bars")
+    print(f"{'metrics':>10}{'seconds':>10}{'ms/ticker':>12}")
+    for mode, seconds in (("disabled", disabled), ("enabled", enabled)):
+        print(f"{mode:>10}{seconds:>10.3f}{seconds / args.tickers * 1e3:>12.3f}")
+    print(f"measured overhead: {(enabled / disabled - 1) * 100:+.2f}%")
+    # enrich + signals spans plus one timing per indicator
+    timings = len(INDICATOR_STEPS) + 2
+    cost = span_cost(100_000)
+    print(
+        f"span cost: {cost * 1e6:.2f} us; {timings} timings/ticker = "
+        f"{timings * cost / (disabled / args.tickers) * 100:.2f}% of scoring time"
+    )
+
+
+if __name__ == "__main__":
+    main()
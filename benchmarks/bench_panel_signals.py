@@ -0,0 +1,64 @@
+"""
+Scoring a full-market universe: per-ticker enrich_with_all_indicators + generate_trend_signals
+loop versus calculate_panel_indicators + generate_trend_signals_panel on one panel.
+
+Usage:
+    uv run python -m benchmarks.bench_panel_signals [--tickers 1800] [--bars 60]
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from app.internal.analysis.panel_indicators import (
+    build_ohlcv_panel_from_frames,
+    calculate_panel_indicators,
+)
+from app.services.analysis.stock_trend_pipeline import enrich_with_all_indicators
+from app.services.analysis.trend_analysis import (
+    generate_trend_signals,
+    generate_trend_signals_panel,
+)
+from benchmarks.synthetic import make_universe
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=1800)
+    parser.add_argument("--bars", type=int, default=60)
+    parser.add_argument(
+        "--loop-sample",
+        type=int,
+        default=200,
+        help="Tickers timed in the per-ticker loop (extrapolated to the universe)",
+    )
+    args = parser.parse_args()
+
+    universe = make_universe(args.tickers, args.bars)
+    sample = list(universe.items())[: args.loop_sample]
+    start = time.perf_counter()
+    for _, frame in sample:
+        generate_trend_signals(enrich_with_all_indicators(frame.copy()))
+    loop_seconds = (time.perf_counter() - start) / len(sample) * args.tickers
+
+    start = time.perf_counter()
+    panel = build_ohlcv_panel_from_frames(universe)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    enriched = calculate_panel_indicators(panel)
+    indicator_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    table = generate_trend_signals_panel(enriched)
+    signal_seconds = time.perf_counter() - start
+    assert isinstance(table, pd.DataFrame) and len(table) == args.tickers
+
+    print(f"universe: {args.tickers} tickers x {args.bars} bars")
+    print(f"per-ticker loop (extrapolated): {loop_seconds:8.3f} s")
+    print(f"panel build:                    {build_seconds:8.3f} s")
+    print(f"panel indicators:               {indicator_seconds:8.3f} s")
+    print(f"panel signals:                  {signal_seconds:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
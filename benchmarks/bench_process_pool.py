@@ -0,0 +1,57 @@
+"""
+Scaling of indicator enrichment + signal scoring over a large universe: thread pool
+versus the shared-memory process pool, for 1..N workers.
+
+Usage:
+    uv run python -m benchmarks.bench_process_pool [--tickers 2000] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+from app.services.analysis.process_pool import compute_trend_signals_in_processes
+from app.services.analysis.stock_trend_pipeline import compute_trend_signal
+from benchmarks.synthetic import make_universe
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--bars", type=int, default=250)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+    )
+    args = parser.parse_args()
+
+    universe = make_universe(args.tickers, args.bars)
+    print(
+        f"universe: {args.tickers} tickers x {args.bars} bars, {os.cpu_count()} cores"
+    )
+    print(f"{'workers':>8}{'threads (s)':>14}{'processes (s)':>16}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(compute_trend_signal, universe.values(), universe))
+        thread_seconds = time.perf_counter() - start
+
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("spawn")
+        ) as pool:
+            # Warm the pool so worker start-up (imports) is not timed
+            compute_trend_signals_in_processes(
+                dict(list(universe.items())[:workers]), workers, pool
+            )
+            start = time.perf_counter()
+            compute_trend_signals_in_processes(universe, workers, pool)
+            process_seconds = time.perf_counter() - start
+        print(f"{workers:>8}{thread_seconds:>14.2f}{process_seconds:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Prompt size and latency of the "json" versus "compact" signal serialization, using the
+real stock analyzer prompt and signals computed from synthetic bars. The fake LLM's
+latency grows with prompt length (`--base-latency` + `--seconds-per-1k-tokens`), a
+simple model of prefill cost.
+
+Usage:
+    uv run python -m benchmarks.bench_prompt_tokens [--tickers 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.internal.llm import chain as llm_chain
+from app.internal.llm.serialization import (
+    SIGNAL_FORMATS,
+    PromptTokenStats,
+    estimate_tokens,
+)
+from app.services.analysis.stock_trend_pipeline import compute_trend_signal
+from benchmarks.synthetic import make_universe
+
+PROMPT = Path("app/prompts/stock_analyzer_prompt.md")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--base-latency", type=float, default=0.05)
+    parser.add_argument("--seconds-per-1k-tokens", type=float, default=0.2)
+    args = parser.parse_args()
+
+    signals = {
+        ticker: compute_trend_signal(frame, ticker)
+        for ticker, frame in make_universe(args.tickers, 120).items()
+    }
+
+    class PrefillLLM:
+        async def ainvoke(self, prompt):
+            tokens = estimate_tokens(prompt)
+            await asyncio.sleep(
+                args.base_latency + tokens / 1000 * args.seconds_per_1k_tokens
+            )
+            return SimpleNamespace(content='{"suggestion": "Wait", "reason": "flat"}')
+
+    llm_chain.fetch_and_prepare_kline = lambda stock_id, bar_cache=None: pd.DataFrame()
+    llm_chain.compute_trend_signal = lambda df, stock_id: signals[stock_id]
+    template = llm_chain.load_prompt_template(PROMPT)
+
+    print(f"{args.tickers} prompts with {PROMPT.name}")
+    print(
+        f"{'format':<9}{'mean tokens':>12}{'signal tokens':>15}"
+        f"{'format ms':>11}{'mean latency s':>16}"
+    )
+    for signal_format in SIGNAL_FORMATS:
+        token_stats = PromptTokenStats()
+        chain = llm_chain.build_stock_analysis_chain(
+            PrefillLLM(),
+            template,
+            signal_format=signal_format,
+            token_stats=token_stats,
+        )
+        formatter = llm_chain.build_prompt_formatting_chain(template, signal_format)
+        start = time.perf_counter()
+        for stock_id, signal in signals.items():
+            formatter.invoke({"stock_id": stock_id, "signal": signal})
+        format_ms = (time.perf_counter() - start) / len(signals) * 1000
+        signal_tokens = statistics.mean(
+            estimate_tokens(llm_chain.serialize_signal(signal, signal_format))
+            for signal in signals.values()
+        )
+
+        async def run():
+            latencies = []
+            for stock_id in signals:
+                start = time.perf_counter()
+                await chain.ainvoke(stock_id)
+                latencies.append(time.perf_counter() - start)
+            return statistics.mean(latencies)
+
+        latency = asyncio.run(run())
+        print(
+            f"{signal_format:<9}{token_stats.stats()['mean_tokens']:>12.0f}"
+            f"{signal_tokens:>15.0f}{format_ms:>11.3f}{latency:>16.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+End-to-end screening job with a fake Shioaji `api` and a fake bar downloader that both
+sleep like network calls: the pipelined `ascreen_market` (bars are fetched and scored
+while later snapshot chunks are still arriving) versus running the same stages one after
+another. Also times the vectorized yf_code mapping against the row-wise `apply` it replaced.
+
+Usage:
+    uv run python -m benchmarks.bench_screening [--stocks 1000] [--snapshot-ms 80] [--fetch-ms 300]
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.configs.config import ScreeningConfig
+from app.internal.shioaji.stock_data import (
+    filter_snapshots,
+    get_shioaji_scanners,
+    get_shioaji_snapshots,
+    to_yf_codes,
+)
+from app.services.analysis.screening import ascreen_market, rank_signals
+from app.services.analysis.stock_trend_pipeline import compute_trend_signal
+from tests.fakes import SJ, FakeMarketApi, make_fetcher
+
+
+def run_staged(api, fetch_bars, config, executor, download_chunk_size) -> float:
+    """Every stage waits for the previous one to finish for all tickers."""
+    start = time.perf_counter()
+    df_scanners = get_shioaji_scanners(api, SJ, config.scanner_count)
+    contracts = [api.Contracts.Stocks[code] for code in df_scanners["code"]]
+    size = config.snapshot_chunk_size
+    df_snapshots = pd.concat(
+        get_shioaji_snapshots(api, contracts[i : i + size])
+        for i in range(0, len(contracts), size)
+    )
+    candidates = filter_snapshots(df_snapshots, df_scanners, config.volume_ratio)
+    yf_codes = candidates["yf_code"].dropna().tolist()
+    frames = {}
+    for i in range(0, len(yf_codes), download_chunk_size):
+        frames.update(fetch_bars(yf_codes[i : i + download_chunk_size]).frames)
+    signals = dict(
+        zip(
+            frames,
+            executor.map(lambda code: compute_trend_signal(frames[code], code), frames),
+        )
+    )
+    rank_signals(
+        signals,
+        dict(zip(candidates["yf_code"], candidates["change_rate"])),
+        config.top_n,
+    )
+    return time.perf_counter() - start
+
+
+def yf_code_mapping(n: int) -> tuple[float, float]:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "code": [str(1000 + i) for i in range(n)],
+            "exchange": rng.choice(["TSE", "OTC", "OES"], n),
+        }
+    )
+
+    def determine_yf_code(row):
+        if row["exchange"] == "TSE":
+            return f"{row['code']}.TW"
+        elif row["exchange"] == "OTC":
+            return f"{row['code']}.TWO"
+        return None
+
+    start = time.perf_counter()
+    rowwise = df.apply(determine_yf_code, axis=1)
+    rowwise_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    vectorized = to_yf_codes(df["code"], df["exchange"])
+    vectorized_seconds = time.perf_counter() - start
+    assert rowwise.tolist() == vectorized.tolist()
+    return rowwise_seconds, vectorized_seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stocks", type=int, default=1000)
+    parser.add_argument("--snapshot-chunk", type=int, default=200)
+    parser.add_argument("--download-chunk", type=int, default=100)
+    parser.add_argument("--snapshot-ms", type=float, default=80.0)
+    parser.add_argument("--fetch-ms", type=float, default=300.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    config = ScreeningConfig(
+        scanner_count=args.stocks, snapshot_chunk_size=args.snapshot_chunk
+    )
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        api = FakeMarketApi(args.stocks, snapshot_latency=args.snapshot_ms / 1000)
+        staged = run_staged(
+            api,
+            make_fetcher(api, latency=args.fetch_ms / 1000),
+            config,
+            executor,
+            args.download_chunk,
+        )
+        api = FakeMarketApi(args.stocks, snapshot_latency=args.snapshot_ms / 1000)
+        result = asyncio.run(
+            ascreen_market(
+                api,
+                SJ,
+                config=config,
+                executor=executor,
+                fetch_bars=make_fetcher(api, latency=args.fetch_ms / 1000),
+                download_chunk_size=args.download_chunk,
+            )
+        )
+
+    print(
+        f"{args.stocks} stocks scanned, {len(result.candidates)} candidates, "
+        f"snapshot {args.snapshot_ms:.0f} ms/call, download {args.fetch_ms:.0f} ms/call"
+    )
+    print(f"staged:    {staged:.2f} s")
+    print(
+        f"pipelined: {result.seconds:.2f} s "
+        f"(first signal after {result.first_signal_seconds:.2f} s), "
+        f"{staged / result.seconds:.2f}x"
+    )
+    rowwise, vectorized = yf_code_mapping(args.stocks)
+    print(
+        f"yf_code mapping ({args.stocks} rows): apply {rowwise * 1e3:.2f} ms, "
+        f"vectorized {vectorized * 1e3:.2f} ms ({rowwise / vectorized:.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Snapshot retrieval for a full-market scan with a fake Shioaji `api` whose `snapshots`
+call sleeps like a broker round trip: one chunk at a time versus concurrent chunks, and
+building the DataFrame from per-object `__dict__`s versus column-wise from attributes.
+
+Usage:
+    uv run python -m benchmarks.bench_shioaji_snapshots [--stocks 2000] [--call-ms 150]
+"""
+
+import argparse
+import time
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from app.internal.shioaji.stock_data import (
+    SCREENING_SNAPSHOT_FIELDS,
+    get_shioaji_snapshots,
+    records_to_frame,
+)
+
+# Attributes of a Shioaji Snapshot
+FIELDS = (
+    "ts",
+    "code",
+    "exchange",
+    "open",
+    "high",
+    "low",
+    "close",
+    "tick_type",
+    "change_price",
+    "change_rate",
+    "change_type",
+    "average_price",
+    "volume",
+    "total_volume",
+    "amount",
+    "total_amount",
+    "yesterday_volume",
+    "buy_price",
+    "buy_volume",
+    "sell_price",
+    "sell_volume",
+    "volume_ratio",
+)
+
+
+def make_snapshots(n: int) -> list:
+    rng = np.random.default_rng(0)
+    values = rng.random((n, len(FIELDS)))
+    snapshots = []
+    for i, row in enumerate(values):
+        snapshot = SimpleNamespace(**dict(zip(FIELDS, row.tolist())))
+        snapshot.ts = 1_700_000_000_000_000_000 + i
+        snapshot.code = str(i)
+        snapshot.exchange = "TSE" if i % 3 else "OTC"
+        snapshots.append(snapshot)
+    return snapshots
+
+
+class LatencyApi:
+    def __init__(self, snapshots: list, latency: float):
+        self.by_code = {str(i): s for i, s in enumerate(snapshots)}
+        self.latency = latency
+
+    def snapshots(self, contracts):
+        time.sleep(self.latency)
+        return [self.by_code[contract.code] for contract in contracts]
+
+
+def measure(func) -> tuple[float, float]:
+    """Best-of-5 wall time and traced peak memory (MiB) of one call."""
+    seconds = min(timeit.repeat(func, number=1, repeat=5))
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stocks", type=int, default=2000)
+    parser.add_argument("--chunk", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--call-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    snapshots = make_snapshots(args.stocks)
+    print(f"DataFrame from {args.stocks} snapshots x {len(FIELDS)} fields:")
+    baseline = None
+    for label, func in (
+        ("__dict__ rows", lambda: pd.DataFrame(s.__dict__ for s in snapshots)),
+        ("column-wise", lambda: records_to_frame(snapshots)),
+        (
+            "screening cols",
+            lambda: records_to_frame(snapshots, SCREENING_SNAPSHOT_FIELDS),
+        ),
+    ):
+        seconds, peak = measure(func)
+        baseline = baseline or seconds
+        print(
+            f"  {label:<15} {seconds * 1e3:7.2f} ms, peak {peak:5.2f} MiB "
+            f"({baseline / seconds:.1f}x)"
+        )
+
+    api = LatencyApi(snapshots, args.call_ms / 1000)
+    contracts = [SimpleNamespace(code=str(i)) for i in range(args.stocks)]
+    print(
+        f"Snapshots for {args.stocks} contracts, {args.chunk} per call, "
+        f"{args.call_ms:.0f} ms per call:"
+    )
+    sequential = None
+    for workers in (1, 2, args.workers):
+        start = time.perf_counter()
+        df = get_shioaji_snapshots(
+            api, contracts, chunk_size=args.chunk, max_workers=workers
+        )
+        seconds = time.perf_counter() - start
+        assert len(df) == args.stocks
+        sequential = sequential or seconds
+        print(f"  {workers} concurrent: {seconds:.2f} s ({sequential / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
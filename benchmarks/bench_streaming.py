@@ -0,0 +1,42 @@
+"""
+Cost of scoring one new bar: streaming state update vs. a full
+enrich_with_all_indicators recompute, for growing history lengths.
+
+Usage:
+    uv run python -m benchmarks.bench_streaming [--sizes 60 1000 10000]
+"""
+
+import argparse
+import time
+
+from app.internal.analysis.streaming_indicators import StreamingIndicatorState
+from app.services.analysis.stock_trend_pipeline import enrich_with_all_indicators
+from benchmarks.synthetic import make_ohlcv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[60, 1_000, 10_000])
+    parser.add_argument("--new-bars", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'history':>10}{'recompute (ms/bar)':>22}{'streaming (us/bar)':>22}")
+    for size in args.sizes:
+        df = make_ohlcv(size + args.new_bars)
+        history, new_bars = df.iloc[:size], df.iloc[size:]
+
+        start = time.perf_counter()
+        enrich_with_all_indicators(df.iloc[: size + 1].copy())
+        recompute_ms = (time.perf_counter() - start) * 1000
+
+        state = StreamingIndicatorState.from_frame(history)
+        rows = list(new_bars.itertuples(index=False))
+        start = time.perf_counter()
+        for row in rows:
+            state.update(*row)
+        streaming_us = (time.perf_counter() - start) / len(rows) * 1e6
+        print(f"{size:>10}{recompute_ms:>22.2f}{streaming_us:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
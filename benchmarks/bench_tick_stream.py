@@ -0,0 +1,52 @@
+"""
+Throughput of the Shioaji tick stream: tick aggregation alone, and with the live
+trend monitor re-scoring every symbol on each 1-minute bar close.
+
+Usage:
+    uv run python -m benchmarks.bench_tick_stream [--codes 200] [--ticks 2000]
+"""
+
+import argparse
+import time
+
+from app.internal.shioaji.tick_stream import ShioajiTickStream
+from app.services.analysis.live_trend import LiveTrendMonitor
+from benchmarks.synthetic import FAKE_SJ, FakeShioajiApi, make_ohlcv, make_ticks
+
+
+def run(codes, ticks, monitor=None) -> float:
+    api = FakeShioajiApi(codes)
+    events = []
+    callback = monitor.on_bar_close if monitor is not None else events.append
+    stream = ShioajiTickStream(api, FAKE_SJ, callback)
+    stream.subscribe(codes)
+    start = time.perf_counter()
+    api.replay(ticks)
+    stream.flush()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--codes", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=2000, help="Ticks per code")
+    args = parser.parse_args()
+
+    codes = [str(1000 + i) for i in range(args.codes)]
+    ticks = make_ticks(codes, args.ticks)
+    elapsed = run(codes, ticks)
+    print(f"aggregation only: {len(ticks) / elapsed:,.0f} ticks/s ({elapsed:.2f}s)")
+
+    monitor = LiveTrendMonitor()
+    for i, code in enumerate(codes):
+        monitor.seed(code, make_ohlcv(60, seed=i))
+    elapsed = run(codes, ticks, monitor)
+    minute_closes = args.codes * 270
+    print(
+        f"with live scoring: {len(ticks) / elapsed:,.0f} ticks/s, "
+        f"{elapsed / minute_closes * 1000:.2f} ms per minute-bar re-score"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Fixtures for the pytest-benchmark suite: deterministic synthetic OHLCV frames at the
+sizes we track (60 bars, 10k bars, and a universe of `--universe-tickers` tickers).
+"""
+
+import pandas as pd
+import pytest
+
+from app.services.analysis.stock_trend_pipeline import INDICATOR_STEPS
+from benchmarks.synthetic import make_ohlcv, make_universe
+
+SIZES = {"60": 60, "10k": 10_000}
+UNIVERSE_BARS = 250
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--universe-tickers",
+        type=int,
+        default=2000,
+        help="Tickers in the synthetic universe benchmarks",
+    )
+
+
+@pytest.fixture(scope="session")
+def frames() -> dict[str, pd.DataFrame]:
+    """Single-ticker OHLCV frames keyed by size label."""
+    return {label: make_ohlcv(n_bars, seed=1) for label, n_bars in SIZES.items()}
+
+
+@pytest.fixture(scope="session")
+def enriched_frames(frames) -> dict[str, pd.DataFrame]:
+    """`frames` after every indicator step, as `generate_trend_signals` expects."""
+    enriched = {}
+    for label, frame in frames.items():
+        df = frame.copy()
+        for step in INDICATOR_STEPS:
+            df = step(df)
+        enriched[label] = df
+    return enriched
+
+
+@pytest.fixture(scope="session")
+def universe(request) -> dict[str, pd.DataFrame]:
+    return make_universe(
+        request.config.getoption("--universe-tickers"), UNIVERSE_BARS, seed=1
+    )
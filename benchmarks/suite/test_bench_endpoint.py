@@ -0,0 +1,37 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import router
+from app.internal.llm.provider import AnalysisChainProvider
+from app.services.analysis import stock_trend_pipeline
+from tests.fakes import FakeLLM, make_config, write_prompt
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, frames):
+    frame = frames["60"]
+    monkeypatch.setattr(
+        stock_trend_pipeline, "fetch_kline_data", lambda *_, **__: frame.copy()
+    )
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "{stock_id} {signal_json}", 1_000_000_000)
+    config = make_config(prompt_path)
+    # Measure the request path, not the scheduler's RPM budget
+    config.llm.scheduler.enabled = False
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.state.analysis_chain_provider = AnalysisChainProvider(
+        config, llm_client=FakeLLM()
+    )
+    with TestClient(app) as client:
+        yield client
+
+
+def test_llm_report_endpoint(benchmark, client):
+    benchmark.group = "endpoint"
+    response = benchmark(
+        client.post, "/api/v1/stock/llm-report", json={"stock_id": "2330.TW"}
+    )
+    assert response.status_code == 200
+    assert response.json()["suggestion"] == "Buy"
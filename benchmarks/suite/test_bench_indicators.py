@@ -0,0 +1,31 @@
+import pytest
+
+from app.services.analysis.stock_trend_pipeline import INDICATOR_STEPS
+from app.services.analysis.trend_analysis import generate_trend_signals
+from benchmarks.suite.conftest import SIZES
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize(
+    "index", range(len(INDICATOR_STEPS)), ids=[s.__name__ for s in INDICATOR_STEPS]
+)
+def test_indicator(benchmark, frames, size, index):
+    step = INDICATOR_STEPS[index]
+    # Later steps may read columns written by earlier ones, as in the pipeline
+    df = frames[size].copy()
+    for previous in INDICATOR_STEPS[:index]:
+        df = previous(df)
+    benchmark.group = f"indicators-{size}"
+    benchmark.pedantic(
+        step,
+        setup=lambda: ((df.copy(),), {}),
+        rounds=200 if size == "60" else 50,
+        warmup_rounds=2,
+    )
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_generate_trend_signals(benchmark, enriched_frames, size):
+    benchmark.group = f"signals-{size}"
+    signal = benchmark(generate_trend_signals, enriched_frames[size])
+    assert signal["signal_status"] == "ok"
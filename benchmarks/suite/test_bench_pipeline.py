@@ -0,0 +1,50 @@
+import pytest
+
+from app.internal.yfinance.stock_data import KlineBatch
+from app.services.analysis import stock_trend_pipeline
+from app.services.analysis.stock_trend_pipeline import (
+    analyze_stock_trend_signal,
+    analyze_stock_trend_signals_batch,
+    analyze_stock_trend_signals_panel,
+)
+from benchmarks.suite.conftest import SIZES
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_analyze_stock_trend_signal(benchmark, monkeypatch, frames, size):
+    frame = frames[size]
+    monkeypatch.setattr(
+        stock_trend_pipeline, "fetch_kline_data", lambda *_, **__: frame.copy()
+    )
+    benchmark.group = f"pipeline-{size}"
+    signal = benchmark(analyze_stock_trend_signal, "2330.TW")
+    assert signal["signal_status"] == "ok"
+
+
+@pytest.fixture
+def stub_bulk_download(monkeypatch, universe):
+    monkeypatch.setattr(
+        stock_trend_pipeline,
+        "fetch_kline_data_many",
+        lambda stock_ids, chunk_size=100: KlineBatch(
+            frames={stock_id: universe[stock_id].copy() for stock_id in stock_ids}
+        ),
+    )
+
+
+@pytest.mark.usefixtures("stub_bulk_download")
+def test_universe_batch_threads(benchmark, universe):
+    benchmark.group = "universe"
+    signals = benchmark.pedantic(
+        analyze_stock_trend_signals_batch, args=(list(universe),), rounds=2
+    )
+    assert len(signals) == len(universe)
+
+
+@pytest.mark.usefixtures("stub_bulk_download")
+def test_universe_panel(benchmark, universe):
+    benchmark.group = "universe"
+    table = benchmark.pedantic(
+        analyze_stock_trend_signals_panel, args=(list(universe),), rounds=3
+    )
+    assert len(table) == len(universe)
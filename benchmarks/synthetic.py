@@ -0,0 +1,93 @@
+"""
+Synthetic OHLCV generators shared by the benchmark scripts.
+Prices follow a floored random walk so that ties and flat bars occur as in real data.
+"""
+
+from types import SimpleNamespace
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+def make_ohlcv(n_bars: int, seed: int = 0) -> pd.DataFrame:
+    """Return a single-ticker OHLCV frame with `n_bars` bars."""
+    rng = np.random.default_rng(seed)
+    close = np.floor(100 + np.cumsum(rng.normal(0, 1.5, n_bars)))
+    open_ = close + np.floor(rng.normal(0, 1, n_bars))
+    high = np.maximum(open_, close) + np.floor(rng.uniform(0, 3, n_bars))
+    low = np.minimum(open_, close) - np.floor(rng.uniform(0, 3, n_bars))
+    volume = np.floor(rng.uniform(100, 5000, n_bars))
+    # Minute spacing keeps 1M+ bar histories inside the datetime64[ns] range
+    index = pd.date_range("2000-01-01", periods=n_bars, freq="min", name="timestamp")
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+        index=index,
+    )
+
+
+def make_universe(
+    n_tickers: int, n_bars: int, seed: int = 0
+) -> Dict[str, pd.DataFrame]:
+    """Return `n_tickers` synthetic frames keyed by a fake TWSE code."""
+    return {
+        f"{1000 + i}.TW": make_ohlcv(n_bars, seed=seed + i) for i in range(n_tickers)
+    }
+
+
+class FakeShioajiQuote:
+    """Minimal stand-in for `api.quote` that records the registered tick callback."""
+
+    def __init__(self):
+        self.callback = None
+
+    def set_on_tick_stk_v1_callback(self, callback):
+        self.callback = callback
+
+    def subscribe(self, contract, quote_type, version):
+        pass
+
+    def unsubscribe(self, contract, quote_type, version):
+        pass
+
+
+class FakeShioajiApi:
+    """Fake Shioaji `api` that replays recorded ticks through the tick callback."""
+
+    def __init__(self, codes):
+        self.quote = FakeShioajiQuote()
+        self.Contracts = SimpleNamespace(
+            Stocks={code: SimpleNamespace(code=code) for code in codes}
+        )
+
+    def replay(self, ticks) -> None:
+        for tick in ticks:
+            self.quote.callback("TSE", tick)
+
+
+FAKE_SJ = SimpleNamespace(
+    constant=SimpleNamespace(
+        QuoteType=SimpleNamespace(Tick="Tick"),
+        QuoteVersion=SimpleNamespace(v1="v1"),
+    )
+)
+
+
+def make_ticks(codes, ticks_per_code: int, session: str = "2024-06-03 09:00", seed=0):
+    """Interleaved ticks for `codes` spread evenly across one 270-minute session."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(session)
+    step = pd.Timedelta(minutes=270) / ticks_per_code
+    prices = 100 + np.cumsum(rng.normal(0, 0.2, (ticks_per_code, len(codes))), axis=0)
+    volumes = rng.integers(1, 20, (ticks_per_code, len(codes)))
+    return [
+        SimpleNamespace(
+            code=code,
+            datetime=(start + step * i).to_pydatetime(),
+            close=float(prices[i, j]),
+            volume=int(volumes[i, j]),
+            simtrade=False,
+        )
+        for i in range(ticks_per_code)
+        for j, code in enumerate(codes)
+    ]
@@ -0,0 +1,217 @@
+"""
+Fakes and helpers shared by the tests and the benchmarks: an offline LLM, a test Config,
+synthetic daily bars, a rate-limited Azure endpoint and a fake Shioaji market.
+"""
+
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from app.configs.config import Config
+from app.internal.yfinance.stock_data import KlineBatch
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(content='{"suggestion": "Buy", "reason": "uptrend"}')
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+
+def make_config(prompt_path) -> Config:
+    return Config(
+        app={
+            "host": "127.0.0.1",
+            "name": "TestApp",
+            "description": "desc",
+            "version": "0.1",
+            "port": 8000,
+            "log_level": "INFO",
+        },
+        llm={
+            "stock_analyzer_prompt_path": str(prompt_path),
+            "temperature": 0.5,
+            "max_tokens": 100,
+            "retry": 1,
+        },
+        shioaji={"api_key": "key", "api_secret": "secret"},
+        azure_openai={
+            "endpoint": "https://test",
+            "api_version": "2024-01-01",
+            "deployment": "gpt-4",
+            "subscription_key": "sk-xxx",
+        },
+    )
+
+
+def write_prompt(path, text, mtime_ns):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def make_daily_bars(n: int = 120, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.5, n))
+    open_ = close + rng.normal(0, 0.5, n)
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 1, n),
+            "low": np.minimum(open_, close) - rng.uniform(0, 1, n),
+            "close": close,
+            "volume": np.floor(rng.uniform(1_000, 50_000, n)),
+        },
+        index=pd.bdate_range("2024-01-01", periods=n),
+    )
+
+
+class FakeAzureServer:
+    """Chat-completions endpoint that answers 429 above `capacity` concurrent calls."""
+
+    def __init__(self, capacity: int, latency: float = 0.02):
+        self.capacity = capacity
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.accepted = 0
+        self.throttled = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.active >= self.capacity:
+            self.throttled += 1
+            return httpx.Response(
+                429,
+                headers={"retry-after-ms": "50"},
+                json={"error": {"code": "429", "message": "Rate limit exceeded"}},
+            )
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.active -= 1
+        self.accepted += 1
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": '{"suggestion": "Wait", "reason": "flat"}',
+                        },
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 10,
+                    "completion_tokens": 10,
+                    "total_tokens": 20,
+                },
+            },
+        )
+
+
+SJ = SimpleNamespace(
+    constant=SimpleNamespace(ScannerType=SimpleNamespace(AmountRank="AmountRank"))
+)
+
+
+class FakeStocks(dict):
+    """`api.Contracts.Stocks`: indexable by code, iterable per exchange."""
+
+    @property
+    def TSE(self):
+        return [c for c in self.values() if c.exchange == "TSE"]
+
+    @property
+    def OTC(self):
+        return [c for c in self.values() if c.exchange == "OTC"]
+
+
+class FakeMarketApi:
+    """
+    Fake Shioaji `api` for scanners and snapshots over `n` stocks. Even-numbered stocks
+    trade above 1.1x yesterday's volume; every fifth stock is on the OTC exchange.
+    """
+
+    def __init__(self, n: int, snapshot_latency: float = 0.0, failing_codes=()):
+        self.codes = [str(1000 + i) for i in range(n)]
+        self.snapshot_latency = snapshot_latency
+        self.failing_codes = set(failing_codes)
+        self.snapshot_calls = []
+        self.events = []
+        self.Contracts = SimpleNamespace(
+            Stocks=FakeStocks(
+                {
+                    code: SimpleNamespace(
+                        code=code,
+                        name=f"Stock {code}",
+                        exchange="OTC" if int(code) % 5 == 0 else "TSE",
+                    )
+                    for code in self.codes
+                }
+            )
+        )
+
+    def scanners(self, scanner_type, count):
+        return [
+            SimpleNamespace(
+                code=code, name=f"Stock {code}", ts=1_700_000_000_000_000_000
+            )
+            for code in self.codes[:count]
+        ]
+
+    def snapshots(self, contracts):
+        self.snapshot_calls.append(len(contracts))
+        time.sleep(self.snapshot_latency)
+        self.events.append("snapshot")
+        if any(contract.code in self.failing_codes for contract in contracts):
+            raise TimeoutError("snapshot request timed out")
+        return [
+            SimpleNamespace(
+                ts=1_700_000_000_000_000_000,
+                code=contract.code,
+                exchange=contract.exchange,
+                close=100.0,
+                total_volume=2000 if int(contract.code) % 2 == 0 else 900,
+                yesterday_volume=1000,
+                change_rate=float(int(contract.code) % 7),
+            )
+            for contract in contracts
+        ]
+
+
+def make_fetcher(api: FakeMarketApi, missing=(), latency: float = 0.0):
+    def fetch_bars(yf_codes, chunk_size=100):
+        time.sleep(latency)
+        api.events.append("fetch")
+        return KlineBatch(
+            frames={
+                yf_code: make_daily_bars(seed=int(yf_code.split(".")[0]))
+                for yf_code in yf_codes
+                if yf_code not in missing
+            },
+            failures={
+                yf_code: "no data returned"
+                for yf_code in yf_codes
+                if yf_code in missing
+            },
+        )
+
+    return fetch_bars
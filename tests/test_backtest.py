@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.configs.config import BarCacheConfig
+from app.internal.yfinance.bar_cache import BarCache
+from app.services.analysis import backtest
+from app.services.analysis.stock_trend_pipeline import enrich_with_all_indicators
+from app.services.analysis.trend_analysis import (
+    TREND_CATEGORIES,
+    generate_trend_signals,
+)
+
+
+def make_ohlcv(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = np.floor(100 + np.cumsum(rng.normal(0, 2, n)))
+    open_ = close + np.floor(rng.normal(0, 1, n))
+    high = np.maximum(open_, close) + np.floor(rng.uniform(0, 3, n))
+    low = np.minimum(open_, close) - np.floor(rng.uniform(0, 3, n))
+    # Fractional volumes avoid exact ties between the averaged volume MAs, which
+    # different summation orders may resolve differently
+    volume = rng.uniform(100, 5000, n) * rng.choice([1, 3], n, p=[0.8, 0.2])
+    index = pd.bdate_range("2020-01-01", periods=n, name="timestamp")
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+        index=index,
+    )
+
+
+def test_simulate_trades_exit_rules():
+    close = np.array([[100.0], [103.0], [94.0], [110.0], [120.0]])
+    entries = np.array([[True], [False], [False], [False], [False]])
+
+    returns, held = backtest.simulate_trades(
+        close, entries, backtest.BacktestRules(holding_period=4)
+    )
+    np.testing.assert_allclose(returns, [0.2])
+    assert list(held) == [4]
+
+    returns, held = backtest.simulate_trades(
+        close, entries, backtest.BacktestRules(holding_period=4, stop_loss=0.05)
+    )
+    np.testing.assert_allclose(returns, [-0.06])
+    assert list(held) == [2]
+
+    returns, held = backtest.simulate_trades(
+        close, entries, backtest.BacktestRules(holding_period=4, take_profit=0.02)
+    )
+    np.testing.assert_allclose(returns, [0.03])
+    assert list(held) == [1]
+
+
+def test_simulate_trades_drops_incomplete_horizon():
+    close = np.array([[100.0], [101.0], [102.0]])
+    entries = np.array([[False], [True], [True]])
+    returns, _ = backtest.simulate_trades(
+        close, entries, backtest.BacktestRules(holding_period=2)
+    )
+    assert len(returns) == 0
+
+
+def reference_returns(frames, holding_period):
+    """Replay generate_trend_signals bar by bar and trade rising edges."""
+    returns = {category: [] for category in TREND_CATEGORIES}
+    for frame in frames.values():
+        enriched = enrich_with_all_indicators(frame.copy())
+        previous = set()
+        for end in range(3, len(frame) + 1):
+            categories = set(
+                generate_trend_signals(enriched.iloc[:end])["trend_categories"]
+            )
+            entry = end - 1
+            for category in categories - previous:
+                if entry + holding_period < len(frame):
+                    close = frame["close"].to_numpy()
+                    returns[category].append(
+                        close[entry + holding_period] / close[entry] - 1
+                    )
+            previous = categories
+    return returns
+
+
+def test_run_backtest_matches_bar_by_bar_replay():
+    frames = {f"{1000 + i}.TW": make_ohlcv(90, i) for i in range(3)}
+    frames["2000.TW"] = make_ohlcv(90, 7).iloc[30:]
+    result = backtest.run_backtest(
+        frames, backtest.BacktestRules(holding_period=5), chunk_size=2, max_workers=2
+    )
+    expected = reference_returns(frames, holding_period=5)
+    assert list(result.summary.index) == TREND_CATEGORIES
+    for category in TREND_CATEGORIES:
+        assert result.summary.loc[category, "trades"] == len(expected[category])
+        np.testing.assert_allclose(
+            np.sort(result.returns[category]), np.sort(expected[category])
+        )
+        if expected[category]:
+            assert result.summary.loc[category, "hit_rate"] == pytest.approx(
+                np.mean(np.array(expected[category]) > 0)
+            )
+
+
+def test_load_bars_from_csv_and_bar_cache(tmp_path):
+    frames = {"1000.TW": make_ohlcv(30, 1), "1001.TW": make_ohlcv(20, 2)}
+    for ticker, frame in frames.items():
+        frame.to_csv(tmp_path / f"{ticker}.csv")
+    loaded = backtest.load_bars_from_csv(str(tmp_path))
+    assert list(loaded) == ["1000.TW", "1001.TW"]
+    pd.testing.assert_frame_equal(
+        loaded["1000.TW"], frames["1000.TW"], check_freq=False
+    )
+
+    config = BarCacheConfig(enabled=True, path=str(tmp_path / "bars.sqlite3"))
+    cache = BarCache(config, downloader=lambda code, start, interval: frames[code])
+    cache.get("1000.TW")
+    cache.get("1001.TW")
+    stored = backtest.load_bars_from_bar_cache(cache)
+    assert list(stored) == ["1000.TW", "1001.TW"]
+    np.testing.assert_array_equal(
+        stored["1001.TW"]["close"].to_numpy(), frames["1001.TW"]["close"].to_numpy()
+    )
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.internal.yfinance.bar_archive import BarArchive
+from app.internal.yfinance.stock_data import KlineBatch
+from app.services.analysis.backtest import load_bars_from_archive
+from app.services.analysis.stock_trend_pipeline import enrich_with_all_indicators
+
+
+def make_bars(start: str, periods: int, close_offset: float = 0.0) -> pd.DataFrame:
+    index = pd.bdate_range(start, periods=periods, name="timestamp")
+    close = 100.0 + np.arange(periods) + close_offset
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": np.full(periods, 1000.0),
+        },
+        index=index,
+    )
+
+
+def test_append_only_adds_newer_bars(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    bars = make_bars("2024-01-01", 30)
+    assert archive.append("2330.TW", bars.iloc[:20]) == 20
+    # Overlapping bars are ignored; only the 10 newer ones are written
+    assert archive.append("2330.TW", bars.iloc[10:]) == 10
+    assert archive.append("2330.TW", bars.iloc[:5]) == 0
+    assert archive.bar_count("2330.TW") == 30
+    assert archive.last_timestamp("2330.TW") == bars.index[-1]
+    pd.testing.assert_frame_equal(archive.read("2330.TW"), bars, check_freq=False)
+    assert archive.tickers() == ["2330.TW"]
+    assert archive.tickers("1m") == []
+
+
+def test_read_range_is_zero_copy_and_read_only(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    bars = make_bars("2024-01-01", 60)
+    archive.append("2330.TW", bars)
+    df = archive.read(
+        "2330.TW", start=pd.Timestamp("2024-01-10"), end=pd.Timestamp("2024-01-19")
+    )
+    pd.testing.assert_frame_equal(
+        df, bars.loc["2024-01-10":"2024-01-19"], check_freq=False
+    )
+    close = df["close"].to_numpy()
+    assert isinstance(close.base, np.memmap) or isinstance(close, np.memmap)
+    assert not close.flags.writeable
+    assert archive.read("2330.TW", start=pd.Timestamp("2025-01-01")).empty
+    assert archive.read("0050.TW").empty
+
+
+def test_indicators_run_on_mapped_frames(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    bars = make_bars("2024-01-01", 80)
+    archive.append("2330.TW", bars)
+    mapped = archive.read("2330.TW")
+    enriched = enrich_with_all_indicators(mapped)
+    expected = enrich_with_all_indicators(bars.copy())
+    pd.testing.assert_frame_equal(enriched, expected, check_freq=False)
+    # The archive files are untouched by indicator columns
+    pd.testing.assert_frame_equal(archive.read("2330.TW"), bars, check_freq=False)
+
+
+def test_torn_append_is_discarded(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    bars = make_bars("2024-01-01", 20)
+    archive.append("2330.TW", bars.iloc[:10])
+    # Simulate a crash after a field file was extended but before the commit
+    with open(tmp_path / "1d" / "2330.TW" / "open.bin", "ab") as f:
+        f.write(np.zeros(3).tobytes())
+    assert archive.bar_count("2330.TW") == 10
+    archive.append("2330.TW", bars.iloc[10:])
+    pd.testing.assert_frame_equal(archive.read("2330.TW"), bars, check_freq=False)
+
+
+def test_intraday_bars_are_stored_in_utc(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    index = pd.date_range("2024-06-03 09:00", periods=5, freq="1min", tz="Asia/Taipei")
+    bars = make_bars("2024-06-03", 5).set_axis(index)
+    archive.append("2330.TW", bars, interval="1m")
+    df = archive.read(
+        "2330.TW", "1m", start=pd.Timestamp("2024-06-03 09:02", tz="Asia/Taipei")
+    )
+    assert list(df.index) == list(index[2:].tz_convert("UTC").tz_localize(None))
+
+
+def test_invalid_ticker_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        BarArchive(str(tmp_path)).read("..")
+
+
+def test_sync_resumes_from_last_bar(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    history = make_bars("2024-01-01", 40)
+    archive.append("2330.TW", history.iloc[:25])
+    calls = []
+
+    def downloader(codes, start, interval, chunk_size):
+        calls.append((list(codes), start))
+        frames = {
+            code: history if start is None else history[history.index >= start]
+            for code in codes
+            if code != "9999.TW"
+        }
+        return KlineBatch(frames=frames, failures={"9999.TW": "no data returned"})
+
+    result = archive.sync(["2330.TW", "2317.TW", "9999.TW"], downloader=downloader)
+    assert calls == [
+        (["2330.TW"], history.index[24]),
+        (["2317.TW", "9999.TW"], None),
+    ]
+    assert result.appended == {"2330.TW": 15, "2317.TW": 40}
+    assert result.failures == {"9999.TW": "no data returned"}
+    frames = load_bars_from_archive(archive)
+    assert list(frames) == ["2317.TW", "2330.TW"]
+    pd.testing.assert_frame_equal(frames["2330.TW"], history, check_freq=False)
@@ -0,0 +1,208 @@
+import threading
+
+import pandas as pd
+
+from app.configs.config import BarCacheConfig
+from app.internal.yfinance import stock_data
+from app.internal.yfinance.bar_cache import BarCache
+
+
+def make_bars(start: str, periods: int, close_offset: float = 0.0) -> pd.DataFrame:
+    index = pd.bdate_range(start, periods=periods, name="timestamp")
+    close = [100.0 + i + close_offset for i in range(periods)]
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": [c + 1 for c in close],
+            "low": [c - 1 for c in close],
+            "close": close,
+            "volume": [1000.0] * periods,
+        },
+        index=index,
+    )
+
+
+class StubDownloader:
+    def __init__(self, history: pd.DataFrame):
+        self.history = history
+        self.calls = []
+
+    def __call__(self, yf_code, start, interval):
+        self.calls.append((yf_code, start, interval))
+        return self.history[self.history.index >= start]
+
+
+class Clock:
+    def __init__(self, now: str):
+        self.now = pd.Timestamp(now, tz="Asia/Taipei")
+
+    def __call__(self):
+        return self.now
+
+
+def build_cache(tmp_path, downloader, clock) -> BarCache:
+    config = BarCacheConfig(enabled=True, path=str(tmp_path / "bars.sqlite3"))
+    return BarCache(config, downloader=downloader, clock=clock)
+
+
+def test_bar_cache_serves_fresh_bars_without_download(tmp_path):
+    # Monday 2024-06-03 after market close
+    downloader = StubDownloader(make_bars("2024-03-01", 66))
+    clock = Clock("2024-06-03 15:00")
+    cache = build_cache(tmp_path, downloader, clock)
+    first = cache.get("2330.TW")
+    assert len(downloader.calls) == 1
+    assert downloader.calls[0][1] == pd.Timestamp("2024-03-03")
+    clock.now += pd.Timedelta(hours=2)
+    second = cache.get("2330.TW")
+    assert len(downloader.calls) == 1
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
+    assert list(second.columns) == ["open", "high", "low", "close", "volume"]
+    assert second.index.min() >= pd.Timestamp("2024-03-03")
+
+
+def test_bar_cache_tops_up_trailing_bars_intraday(tmp_path):
+    history = make_bars("2024-05-01", 24)  # Through Monday 2024-06-03
+    downloader = StubDownloader(history.iloc[:-1])
+    clock = Clock("2024-05-31 15:00")
+    cache = build_cache(tmp_path, downloader, clock)
+    cache.get("2330.TW")
+
+    # During the session the TTL applies
+    downloader.history = history
+    clock.now = pd.Timestamp("2024-06-03 10:00", tz="Asia/Taipei")
+    cache.get("2330.TW")
+    assert len(downloader.calls) == 2
+    # Only the bars since the last cached one are requested
+    assert downloader.calls[1][1] == pd.Timestamp("2024-05-31")
+    clock.now += pd.Timedelta(minutes=2)
+    cache.get("2330.TW")
+    assert len(downloader.calls) == 2
+
+    # A revised partial bar replaces the cached one once the TTL expires
+    downloader.history = make_bars("2024-05-01", 24, close_offset=0.5)
+    clock.now += pd.Timedelta(minutes=10)
+    bars = cache.get("2330.TW")
+    assert len(downloader.calls) == 3
+    assert bars.index[-1] == pd.Timestamp("2024-06-03")
+    assert bars["close"].iloc[-1] == 123.5
+    assert bars["close"].iloc[0] == 100.0
+    assert bars.index.is_unique
+
+
+def test_bar_cache_after_close_and_weekend_rules(tmp_path):
+    downloader = StubDownloader(make_bars("2024-05-01", 25))
+    clock = Clock("2024-06-04 12:00")  # Tuesday, market open
+    cache = build_cache(tmp_path, downloader, clock)
+    cache.get("2330.TW")
+    # First request after the close refreshes the final bar
+    clock.now = pd.Timestamp("2024-06-04 14:00", tz="Asia/Taipei")
+    cache.get("2330.TW")
+    assert len(downloader.calls) == 2
+    # Later that evening and over the weekend the entry stays fresh
+    clock.now = pd.Timestamp("2024-06-04 20:00", tz="Asia/Taipei")
+    cache.get("2330.TW")
+    assert len(downloader.calls) == 2
+    assert (
+        cache.is_stale(
+            pd.Timestamp("2024-06-07 14:00", tz="Asia/Taipei"),
+            pd.Timestamp("2024-06-09 10:00", tz="Asia/Taipei"),
+        )
+        is False
+    )
+    assert (
+        cache.is_stale(
+            pd.Timestamp("2024-06-07 12:00", tz="Asia/Taipei"),
+            pd.Timestamp("2024-06-09 10:00", tz="Asia/Taipei"),
+        )
+        is True
+    )
+
+
+def test_bar_cache_serves_cached_bars_when_download_fails(tmp_path):
+    downloader = StubDownloader(make_bars("2024-05-01", 24))
+    clock = Clock("2024-06-03 15:00")
+    cache = build_cache(tmp_path, downloader, clock)
+    cached = cache.get("2330.TW")
+
+    def failing_downloader(yf_code, start, interval):
+        raise RuntimeError("network down")
+
+    cache.downloader = failing_downloader
+    clock.now += pd.Timedelta(days=1)
+    pd.testing.assert_frame_equal(cache.get("2330.TW"), cached, check_freq=False)
+
+
+def test_bar_cache_keys_by_interval(tmp_path):
+    downloader = StubDownloader(make_bars("2024-05-01", 24))
+    cache = build_cache(tmp_path, downloader, Clock("2024-06-03 15:00"))
+    cache.get("2330.TW", interval="1d")
+    cache.get("2330.TW", interval="1wk")
+    assert [call[2] for call in downloader.calls] == ["1d", "1wk"]
+
+
+def test_bar_cache_records_fetch_when_no_new_bars(tmp_path):
+    downloader = StubDownloader(make_bars("2024-05-01", 24))
+    clock = Clock("2024-06-03 15:00")
+    cache = build_cache(tmp_path, downloader, clock)
+    cache.get("2330.TW")
+    downloader.history = downloader.history.iloc[:0]
+    clock.now += pd.Timedelta(days=1)
+    cache.get("2330.TW")
+    cache.get("2330.TW")
+    assert len(downloader.calls) == 2
+
+
+def test_bar_cache_download_does_not_block_other_tickers(tmp_path):
+    history = make_bars("2024-05-01", 24)
+    release = threading.Event()
+    started = threading.Event()
+
+    def downloader(yf_code, start, interval):
+        if yf_code == "SLOW.TW":
+            started.set()
+            assert release.wait(5)
+        return history[history.index >= start]
+
+    cache = build_cache(tmp_path, downloader, Clock("2024-06-03 15:00"))
+    slow = threading.Thread(target=cache.get, args=("SLOW.TW",))
+    slow.start()
+    assert started.wait(5)
+    try:
+        assert len(cache.get("2330.TW")) == 24
+        assert slow.is_alive()
+    finally:
+        release.set()
+        slow.join()
+
+
+def test_bar_cache_retries_after_default_downloader_error(tmp_path, monkeypatch):
+    downloader = StubDownloader(make_bars("2024-05-01", 24))
+    clock = Clock("2024-06-03 15:00")
+    cache = build_cache(tmp_path, downloader, clock)
+    cached = cache.get("2330.TW")
+    calls = []
+
+    def failing_download(**kwargs):
+        calls.append(kwargs)
+        raise ConnectionError("network down")
+
+    monkeypatch.setattr(stock_data.yf, "download", failing_download)
+    cache = BarCache(cache.config, clock=clock)  # default downloader
+    clock.now += pd.Timedelta(days=1)
+    pd.testing.assert_frame_equal(cache.get("2330.TW"), cached, check_freq=False)
+    cache.get("2330.TW")
+    assert len(calls) == 2
+
+
+def test_bar_cache_marks_empty_first_download_fetched(tmp_path):
+    downloader = StubDownloader(make_bars("2024-05-01", 24).iloc[:0])
+    clock = Clock("2024-06-03 15:00")
+    cache = build_cache(tmp_path, downloader, clock)
+    assert cache.get("NEW.TW").empty
+    assert cache.get("NEW.TW").empty
+    assert len(downloader.calls) == 1
+    # Retried once the staleness rules expire the fetch
+    clock.now += pd.Timedelta(days=1)
+    cache.get("NEW.TW")
+    assert len(downloader.calls) == 2
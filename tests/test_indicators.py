@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 from app.internal.analysis import indicators
@@ -77,3 +78,77 @@ def test_calculate_obv():
     assert "obv" in result.columns
     # OBV calculation: [0, 20, 50, 10, -40]
     assert result["obv"].iloc[-1] == -40
+
+
+def _legacy_obv(df):
+    obv = [0]
+    for i in range(1, len(df)):
+        if df["close"].iloc[i] > df["close"].iloc[i - 1]:
+            obv.append(obv[-1] + df["volume"].iloc[i])
+        elif df["close"].iloc[i] < df["close"].iloc[i - 1]:
+            obv.append(obv[-1] - df["volume"].iloc[i])
+        else:
+            obv.append(obv[-1])
+    return pd.Series(obv, index=df.index, dtype=float)
+
+
+def _legacy_cci(df, window):
+    typical_price = (df["high"] + df["low"] + df["close"]) / 3
+    moving_avg = typical_price.rolling(window=window).mean()
+    mean_deviation = typical_price.rolling(window=window).apply(
+        lambda x: abs(x - x.mean()).mean(), raw=True
+    )
+    return (typical_price - moving_avg) / (0.015 * mean_deviation)
+
+
+def _random_ohlcv(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Floored prices produce unchanged closes, exercising the OBV "flat" branch
+    close = np.floor(100 + np.cumsum(rng.normal(0, 1.5, n)))
+    high = close + np.floor(rng.uniform(0, 3, n))
+    low = close - np.floor(rng.uniform(0, 3, n))
+    volume = rng.integers(1, 5000, n)
+    return pd.DataFrame({"high": high, "low": low, "close": close, "volume": volume})
+
+
+def test_calculate_obv_matches_legacy_loop():
+    df = _random_ohlcv(500, seed=1)
+    result = indicators.calculate_obv(df.copy())
+    pd.testing.assert_series_equal(
+        result["obv"], _legacy_obv(df), check_names=False, check_exact=True
+    )
+
+
+def test_calculate_obv_matches_legacy_loop_with_gaps():
+    df = _random_ohlcv(300, seed=3).astype({"volume": float})
+    df.loc[50, "close"] = np.nan  # no contribution around a missing close
+    flat = df.index[df["close"].diff() == 0][0]
+    df.loc[flat, "volume"] = np.nan  # a flat bar ignores its volume
+    moving = df.index[(df["close"].diff() != 0) & (df.index > 200)][0]
+    df.loc[moving, "volume"] = np.nan  # OBV is NaN from here on
+    result = indicators.calculate_obv(df.copy())
+    expected = _legacy_obv(df)
+    assert expected.loc[moving:].isna().all()
+    assert expected.loc[: moving - 1].notna().all()
+    pd.testing.assert_series_equal(
+        result["obv"], expected, check_names=False, check_exact=True
+    )
+
+
+def test_calculate_cci_matches_legacy_rolling_apply():
+    df = _random_ohlcv(500, seed=2)
+    df.loc[100, "close"] = np.nan  # Windows containing NaN stay NaN
+    for window in (2, 20):
+        result = indicators.calculate_cci(df.copy(), window=window)
+        np.testing.assert_allclose(
+            result["cci"].to_numpy(),
+            _legacy_cci(df, window).to_numpy(),
+            rtol=1e-9,
+            equal_nan=True,
+        )
+
+
+def test_calculate_cci_short_history():
+    df = _random_ohlcv(5)
+    result = indicators.calculate_cci(df.copy(), window=20)
+    assert result["cci"].isna().all()
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import re
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import endpoints
+from app.configs.config import LLMConfig
+from app.internal.llm.batch import (
+    aanalyze_signals_batched,
+    load_batch_prompt_template,
+    parse_batch_response,
+    plan_batches,
+)
+from app.internal.llm.cache import InMemoryCacheBackend, LLMResponseCache
+from app.internal.llm.provider import AnalysisChainProvider
+from tests.fakes import make_config, write_prompt
+
+BATCH_PROMPT = Path("app/prompts/stock_batch_analyzer_prompt.md")
+
+
+def make_llm_config(**overrides) -> LLMConfig:
+    values = {
+        "stock_analyzer_prompt_path": "./prompt.md",
+        "temperature": 0.0,
+        "max_tokens": 800,
+        "retry": 3,
+        "batch_output_tokens_per_ticker": 160,
+    }
+    values.update(overrides)
+    return LLMConfig(**values)
+
+
+def make_signals(n: int):
+    return {
+        f"{2300 + i}.TW": {"signal_status": "ok", "rsi": 40.0 + i} for i in range(n)
+    }
+
+
+class BatchLLM:
+    """Answers every ticker in the prompt, except those listed in `drop` / `garble`."""
+
+    def __init__(self, drop=(), garble=()):
+        self.drop = set(drop)
+        self.garble = set(garble)
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        entries = []
+        stock_ids = batch_ids(prompt)
+        for stock_id in stock_ids:
+            if stock_id in self.drop:
+                continue
+            if stock_id in self.garble:
+                entries.append({"stock_id": stock_id, "suggestion": "Maybe"})
+                continue
+            entries.append(
+                {"stock_id": stock_id, "suggestion": "Long", "reason": f"{stock_id} up"}
+            )
+        # Every ticker answers correctly once it has been retried
+        self.drop.difference_update(stock_ids)
+        self.garble.difference_update(stock_ids)
+        return SimpleNamespace(content=f"```json\n{json.dumps(entries)}\n```")
+
+
+def batch_ids(prompt):
+    return re.findall(r'"stock_id": "([^"]+)"', prompt.split("```json")[-1])
+
+
+def test_batch_size_adapts_to_completion_budget():
+    entries = list(make_signals(12).items())
+    batches = plan_batches(entries, make_llm_config(max_tokens=800))
+    assert [len(batch) for batch in batches] == [5, 5, 2]
+    assert [e for batch in batches for e in batch] == entries
+    assert len(plan_batches(entries, make_llm_config(max_tokens=4096))) == 1
+    # A tiny budget still sends one ticker per request
+    assert len(plan_batches(entries, make_llm_config(max_tokens=10))) == 12
+    capped = plan_batches(
+        entries, make_llm_config(max_tokens=4096, batch_max_prompt_tokens=40)
+    )
+    assert len(capped) > 1
+
+
+def test_parse_batch_response_flags_missing_and_malformed_entries():
+    text = json.dumps(
+        [
+            {"stock_id": "2330.TW", "suggestion": "Long", "reason": "trend"},
+            {"stock_id": "2330.TW", "suggestion": "Short", "reason": "duplicate"},
+            {"stock_id": "2317.TW", "suggestion": "Buy!", "reason": "bad label"},
+            {"stock_id": "9999.TW", "suggestion": "Wait", "reason": "not requested"},
+            "garbage",
+        ]
+    )
+    reports, failures = parse_batch_response(text, ["2330.TW", "2317.TW", "2454.TW"])
+    assert reports == {"2330.TW": {"suggestion": "Long", "reason": "trend"}}
+    assert set(failures) == {"2317.TW", "2454.TW"}
+    reports, failures = parse_batch_response("not json at all", ["2330.TW"])
+    assert reports == {} and set(failures) == {"2330.TW"}
+
+
+def test_only_failed_tickers_are_retried():
+    signals = make_signals(7)
+    llm = BatchLLM(drop={"2301.TW"}, garble={"2305.TW"})
+    result = asyncio.run(
+        aanalyze_signals_batched(
+            signals,
+            llm,
+            load_batch_prompt_template(BATCH_PROMPT),
+            make_llm_config(max_tokens=800),
+        )
+    )
+    assert list(result.reports) == list(signals)
+    assert result.failures == {}
+    assert [batch_ids(p) for p in llm.prompts] == [
+        list(signals)[:5],
+        list(signals)[5:],
+        ["2301.TW", "2305.TW"],
+    ]
+    assert result.requests == 3
+    assert result.retried == 2
+
+
+def test_failures_after_last_attempt_and_cache_hits():
+    class FailingLLM:
+        def __init__(self):
+            self.calls = 0
+
+        async def ainvoke(self, prompt):
+            self.calls += 1
+            if "2301.TW" in prompt:
+                raise RuntimeError("429 Too Many Requests")
+            return await BatchLLM().ainvoke(prompt)
+
+    signals = make_signals(2)
+    cache = LLMResponseCache(InMemoryCacheBackend(16, ttl_seconds=60))
+    template = load_batch_prompt_template(BATCH_PROMPT)
+    config = make_llm_config(max_tokens=160, retry=2)
+    llm = FailingLLM()
+    result = asyncio.run(
+        aanalyze_signals_batched(signals, llm, template, config, cache)
+    )
+    assert list(result.reports) == ["2300.TW"]
+    assert result.failures == {"2301.TW": "request failed: 429 Too Many Requests"}
+    assert llm.calls == 3
+    again = asyncio.run(aanalyze_signals_batched(signals, llm, template, config, cache))
+    assert again.cache_hits == 1
+    assert llm.calls == 5
+
+
+def test_batch_llm_report_endpoint(tmp_path, monkeypatch):
+    signals = make_signals(3)
+    signals["9999.TW"] = {"signal_status": "invalid", "reason": "No kbar data"}
+    monkeypatch.setattr(
+        endpoints, "analyze_stock_trend_signals_batch", lambda stock_ids, *_: signals
+    )
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "{stock_id} {signal_json}", 1_000_000_000)
+    config = make_config(prompt_path)
+    config.llm.batch_prompt_path = str(BATCH_PROMPT)
+    config.llm.max_tokens = 4096
+    llm = BatchLLM()
+    app = FastAPI()
+    app.include_router(endpoints.router, prefix="/api/v1")
+    app.state.analysis_chain_provider = AnalysisChainProvider(config, llm_client=llm)
+
+    response = TestClient(app).post(
+        "/api/v1/stock/batch-llm-report", json={"stock_ids": list(signals)}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["reports"]) == ["2300.TW", "2301.TW", "2302.TW"]
+    assert body["reports"]["2300.TW"] == {"suggestion": "Long", "reason": "2300.TW up"}
+    assert body["failures"] == {"9999.TW": "No kbar data"}
+    assert len(llm.prompts) == 1
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pandas as pd
+from langchain_core.prompts import PromptTemplate
+
+from app.internal.llm import chain as llm_chain
+from app.internal.llm.cache import (
+    DiskCacheBackend,
+    InMemoryCacheBackend,
+    LLMResponseCache,
+    get_prompt_version,
+    make_cache_key,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return SimpleNamespace(content='{"suggestion": "Long", "reason": "trend"}')
+
+
+def test_cache_key_is_canonical():
+    signal_a = {"rsi": 55.0, "macd": 1.2, "trend_categories": ["macd_bullish"]}
+    signal_b = {"trend_categories": ["macd_bullish"], "macd": 1.2, "rsi": 55.0}
+    assert make_cache_key("v1", "2330.TW", signal_a) == make_cache_key(
+        "v1", "2330.TW", signal_b
+    )
+    assert make_cache_key("v1", "2330.TW", signal_a) != make_cache_key(
+        "v2", "2330.TW", signal_a
+    )
+    assert make_cache_key("v1", "2330.TW", signal_a) != make_cache_key(
+        "v1", "2317.TW", signal_a
+    )
+
+
+def test_in_memory_backend_lru_and_ttl():
+    clock = FakeClock()
+    cache = LLMResponseCache(InMemoryCacheBackend(2, ttl_seconds=60, clock=clock))
+    cache.set("a", {"suggestion": "Long"})
+    cache.set("b", {"suggestion": "Short"})
+    assert cache.get("a") == {"suggestion": "Long"}  # "a" becomes most recent
+    cache.set("c", {"suggestion": "Wait"})  # evicts "b"
+    assert cache.get("b") is None
+    clock.now += 61
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+
+
+def test_disk_backend_persists_and_evicts(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "llm_cache.sqlite3")
+    backend = DiskCacheBackend(path, max_entries=2, ttl_seconds=60, clock=clock)
+    backend.set("a", {"suggestion": "Long"})
+    clock.now += 1
+    backend.set("b", {"suggestion": "Short"})
+    clock.now += 1
+    backend.get("a")
+    clock.now += 1
+    assert backend.set("c", {"suggestion": "Wait"}) == 1
+    reopened = DiskCacheBackend(path, max_entries=2, ttl_seconds=60, clock=clock)
+    assert reopened.get("a") == ({"suggestion": "Long"}, False)
+    assert reopened.get("b") == (None, False)
+    clock.now += 120
+    assert reopened.get("c") == (None, True)
+
+
+def test_analysis_chain_skips_llm_on_cache_hit(monkeypatch):
+    signal = {"signal_status": "ok", "rsi": 50.0, "trend_categories": []}
+    monkeypatch.setattr(llm_chain, "fetch_and_prepare_kline", lambda *_: pd.DataFrame())
+    monkeypatch.setattr(llm_chain, "compute_trend_signal", lambda *_: dict(signal))
+    llm = CountingLLM()
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"],
+        template="{stock_id} {signal_json}",
+    )
+    cache = LLMResponseCache(InMemoryCacheBackend(16, ttl_seconds=60))
+    chain = llm_chain.build_stock_analysis_chain(llm, prompt, response_cache=cache)
+    first = chain.invoke("2330.TW")
+    second = chain.invoke("2330.TW")
+    assert first == second == {"suggestion": "Long", "reason": "trend"}
+    assert llm.calls == 1
+    # A changed signal or prompt misses the cache
+    signal["rsi"] = 75.0
+    chain.invoke("2330.TW")
+    assert llm.calls == 2
+    new_prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"],
+        template="v2 {stock_id} {signal_json}",
+    )
+    assert get_prompt_version(new_prompt) != get_prompt_version(prompt)
+    llm_chain.build_stock_analysis_chain(llm, new_prompt, response_cache=cache).invoke(
+        "2330.TW"
+    )
+    assert llm.calls == 3
+    assert cache.stats()["hits"] == 1
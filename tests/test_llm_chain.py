@@ -0,0 +1,145 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+from langchain_core.prompts import PromptTemplate
+
+from app.internal.llm import chain as llm_chain
+
+FETCH_SECONDS = 0.2
+LLM_SECONDS = 0.2
+
+
+class AsyncOnlyLLM:
+    """Fake LLM whose sync path fails, proving the chain awaits `ainvoke`."""
+
+    def invoke(self, prompt):
+        raise AssertionError("sync invoke must not be used in async mode")
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(LLM_SECONDS)
+        return SimpleNamespace(content='{"suggestion": "Wait", "reason": "flat"}')
+
+
+def slow_fetch(stock_id, bar_cache=None):
+    time.sleep(FETCH_SECONDS)  # Blocking download
+    return pd.DataFrame()
+
+
+def fake_signal(df, stock_id):
+    return {"signal_status": "ok", "stock_id": stock_id}
+
+
+def build_chain(monkeypatch, executor):
+    monkeypatch.setattr(llm_chain, "fetch_and_prepare_kline", slow_fetch)
+    monkeypatch.setattr(llm_chain, "compute_trend_signal", fake_signal)
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"],
+        template="{stock_id} {signal_json}",
+    )
+    return llm_chain.build_stock_analysis_chain(
+        AsyncOnlyLLM(), prompt, executor=executor
+    )
+
+
+def test_concurrent_requests_overlap(monkeypatch):
+    n_requests = 8
+    chain = build_chain(monkeypatch, ThreadPoolExecutor(max_workers=n_requests))
+
+    async def run():
+        heartbeats = 0
+
+        async def heartbeat():
+            nonlocal heartbeats
+            while True:
+                await asyncio.sleep(0.01)
+                heartbeats += 1
+
+        ticker = asyncio.create_task(heartbeat())
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(chain.ainvoke(f"{2300 + i}.TW") for i in range(n_requests))
+        )
+        elapsed = time.perf_counter() - start
+        ticker.cancel()
+        return results, elapsed, heartbeats
+
+    results, elapsed, heartbeats = asyncio.run(run())
+    assert all(r == {"suggestion": "Wait", "reason": "flat"} for r in results)
+    serialized = n_requests * (FETCH_SECONDS + LLM_SECONDS)
+    assert elapsed < serialized / 3
+    # The event loop kept running while the blocking stages were in progress
+    assert heartbeats >= (FETCH_SECONDS + LLM_SECONDS) / 0.01 / 2
+
+
+def test_signal_stage_is_bounded_by_executor(monkeypatch):
+    chain = build_chain(monkeypatch, ThreadPoolExecutor(max_workers=2))
+
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(chain.ainvoke(f"{2300 + i}.TW") for i in range(4)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    # Four blocking fetches on two workers take two rounds
+    assert elapsed >= 2 * FETCH_SECONDS
+
+
+def test_concurrent_identical_requests_are_coalesced(monkeypatch):
+    fetches = []
+    signals = []
+    monkeypatch.setattr(
+        llm_chain,
+        "fetch_and_prepare_kline",
+        lambda stock_id, bar_cache=None: (
+            fetches.append(stock_id) or slow_fetch(stock_id)
+        ),
+    )
+    monkeypatch.setattr(
+        llm_chain,
+        "compute_trend_signal",
+        lambda df, stock_id: signals.append(stock_id) or fake_signal(df, stock_id),
+    )
+    llm = CountingAsyncLLM()
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"],
+        template="{stock_id} {signal_json}",
+    )
+    flights = llm_chain.AnalysisFlights()
+    chain = llm_chain.build_stock_analysis_chain(
+        llm, prompt, executor=ThreadPoolExecutor(max_workers=8), flights=flights
+    )
+
+    async def run():
+        return await asyncio.gather(
+            *(chain.ainvoke("2330.TW") for _ in range(6)), chain.ainvoke("2317.TW")
+        )
+
+    results = asyncio.run(run())
+    assert all(r == {"suggestion": "Wait", "reason": "flat"} for r in results)
+    assert sorted(fetches) == ["2317.TW", "2330.TW"]
+    assert sorted(signals) == ["2317.TW", "2330.TW"]
+    assert llm.calls == 2
+    stats = flights.stats()
+    for stage in ("fetch", "signal", "llm"):
+        assert stats[stage] == {
+            "calls": 7,
+            "executions": 2,
+            "coalesced": 5,
+            "in_flight": 0,
+        }
+    # Requests after the shared call completed run again (nothing is cached)
+    asyncio.run(chain.ainvoke("2330.TW"))
+    assert llm.calls == 3
+    assert flights.stats()["llm"]["coalesced"] == 5
+
+
+class CountingAsyncLLM(AsyncOnlyLLM):
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        return await super().ainvoke(prompt)
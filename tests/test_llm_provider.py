@@ -0,0 +1,102 @@
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import router
+from app.internal.llm import chain as llm_chain
+from app.internal.llm.provider import AnalysisChainProvider, PromptTemplateLoader
+from tests.fakes import FakeLLM, make_config, write_prompt
+
+
+def test_prompt_loader_reloads_only_on_mtime_change(tmp_path):
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "v1 {stock_id} {signal_json}", 1_000_000_000)
+    loader = PromptTemplateLoader(prompt_path)
+
+    first = loader.get()
+    assert loader.get() is first
+    assert loader.reloads == 1
+
+    write_prompt(prompt_path, "v2 {stock_id} {signal_json}", 2_000_000_000)
+    second = loader.get()
+    assert second is not first
+    assert second.template.startswith("v2")
+    assert loader.reloads == 2
+
+
+def test_provider_reuses_chain_until_prompt_changes(tmp_path):
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "v1 {stock_id} {signal_json}", 1_000_000_000)
+    provider = AnalysisChainProvider(make_config(prompt_path), llm_client=FakeLLM())
+
+    chain = provider.get_chain()
+    assert all(provider.get_chain() is chain for _ in range(4))
+    stats = provider.stats()
+    assert stats["requests_served"] == 5
+    assert stats["chain_builds"] == 1
+    assert stats["setup_seconds_saved"] == stats["setup_seconds"] * 4
+
+    write_prompt(prompt_path, "v2 {stock_id} {signal_json}", 2_000_000_000)
+    assert provider.get_chain() is not chain
+    assert provider.stats()["chain_builds"] == 2
+    assert provider.stats()["prompt_reloads"] == 2
+
+
+def test_provider_setup_seconds_use_mean_chain_build(tmp_path):
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "v1 {stock_id} {signal_json}", 1_000_000_000)
+    # Client setup takes 1s, the first chain build 1s and the second 3s
+    ticks = iter([0.0, 1.0, 10.0, 11.0, 20.0, 21.0, 22.0, 30.0, 33.0])
+    provider = AnalysisChainProvider(
+        make_config(prompt_path), llm_client=FakeLLM(), clock=lambda: next(ticks)
+    )
+
+    for _ in range(4):
+        provider.get_chain()
+    write_prompt(prompt_path, "v2 {stock_id} {signal_json}", 2_000_000_000)
+    provider.get_chain()
+
+    stats = provider.stats()
+    assert stats["chain_builds"] == 2
+    assert stats["setup_seconds"] == 1.0 + 2.0
+    assert stats["setup_seconds_saved"] == 3.0 * 3
+
+
+def test_provider_builds_pooled_client(tmp_path):
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "{stock_id} {signal_json}", 1_000_000_000)
+    provider = AnalysisChainProvider(make_config(prompt_path))
+    assert provider.llm_client.http_async_client is provider._http_async_client
+    assert provider.llm_client.http_client is provider._http_client
+
+
+def test_llm_report_endpoint_uses_shared_provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_chain, "fetch_and_prepare_kline", lambda *_: pd.DataFrame())
+    monkeypatch.setattr(
+        llm_chain, "compute_trend_signal", lambda *_: {"signal_status": "ok"}
+    )
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "{stock_id} {signal_json}", 1_000_000_000)
+    llm = FakeLLM()
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.state.analysis_chain_provider = AnalysisChainProvider(
+        make_config(prompt_path), llm_client=llm
+    )
+    client = TestClient(app)
+
+    for _ in range(3):
+        response = client.post("/api/v1/stock/llm-report", json={"stock_id": "2330"})
+        assert response.status_code == 200
+        assert response.json() == {
+            "stock_id": "2330",
+            "suggestion": "Buy",
+            "reason": "uptrend",
+        }
+    assert len(llm.prompts) == 3
+
+    runtime_stats = client.get("/api/v1/runtime/stats").json()
+    assert runtime_stats["coalescing"]["llm"]["executions"] == 3
+    stats = runtime_stats["analysis_chain"]
+    assert stats["requests_served"] == 3
+    assert stats["chain_builds"] == 1
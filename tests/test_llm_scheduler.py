@@ -0,0 +1,183 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.configs.config import LLMSchedulerConfig
+from app.internal.llm.chain import get_llm_client
+from app.internal.llm.scheduler import (
+    BATCH,
+    INTERACTIVE,
+    LLMScheduler,
+    ScheduledLLM,
+    throttle_delay,
+)
+from tests.fakes import FakeAzureServer, make_config
+
+
+def make_scheduler(**overrides) -> LLMScheduler:
+    return LLMScheduler(LLMSchedulerConfig(**overrides))
+
+
+def test_throttle_delay_reads_retry_after_headers():
+    def error(status, headers):
+        return SimpleNamespace(
+            status_code=status, response=SimpleNamespace(headers=headers)
+        )
+
+    assert throttle_delay(error(429, {"retry-after-ms": "250"}), 1.0) == 0.25
+    assert throttle_delay(error(429, {"retry-after": "2"}), 1.0) == 2.0
+    assert throttle_delay(error(429, {}), 1.0) == 1.0
+    assert throttle_delay(error(500, {"retry-after": "2"}), 1.0) is None
+    assert throttle_delay(ValueError("bad json"), 1.0) is None
+
+
+def test_scheduler_absorbs_throttling_from_fake_azure_server(tmp_path):
+    server = FakeAzureServer(capacity=4)
+    config = make_config(tmp_path / "prompt.md")
+    config.llm.scheduler = LLMSchedulerConfig(
+        initial_concurrency=16, max_concurrency=32, decrease_cooldown_seconds=0.05
+    )
+    scheduler = LLMScheduler(config.llm.scheduler)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(server)) as http:
+            llm = ScheduledLLM(
+                get_llm_client(config, http_async_client=http), scheduler, config.llm
+            )
+            return await asyncio.gather(*(llm.ainvoke(f"p{i}") for i in range(40)))
+
+    responses = asyncio.run(run())
+    assert len(responses) == 40
+    assert all("Wait" in response.content for response in responses)
+    assert server.accepted == 40
+    assert server.throttled > 0
+    assert scheduler.throttled == server.throttled
+    # Multiplicative decrease brought the limit down to the server's capacity
+    assert scheduler.limit < 16
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_scheduler_retries_transient_server_error(tmp_path):
+    server = FakeAzureServer(capacity=4)
+    failures = []
+
+    async def flaky(request: httpx.Request) -> httpx.Response:
+        if not failures:
+            failures.append(request)
+            return httpx.Response(
+                500, json={"error": {"code": "500", "message": "Internal error"}}
+            )
+        return await server(request)
+
+    config = make_config(tmp_path / "prompt.md")
+    config.llm.scheduler = LLMSchedulerConfig(transient_backoff_seconds=0.01)
+    scheduler = LLMScheduler(config.llm.scheduler)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(flaky)) as http:
+            llm = ScheduledLLM(
+                get_llm_client(config, http_async_client=http), scheduler, config.llm
+            )
+            return await llm.ainvoke("p")
+
+    assert "Wait" in asyncio.run(run()).content
+    assert len(failures) == 1
+    assert server.accepted == 1
+    assert scheduler.transient_retries == 1
+    assert scheduler.throttled == 0
+
+
+def test_interactive_calls_are_dispatched_before_batch():
+    scheduler = make_scheduler(initial_concurrency=1, max_concurrency=1)
+    order = []
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+
+        async def call(name):
+            order.append(name)
+
+        holding = asyncio.ensure_future(scheduler.run(blocker, 1, BATCH))
+        await asyncio.sleep(0)
+        waiting = [
+            asyncio.ensure_future(scheduler.run(lambda n=n: call(n), 1, BATCH))
+            for n in ("batch-1", "batch-2", "batch-3")
+        ]
+        waiting.append(
+            asyncio.ensure_future(
+                scheduler.run(lambda: call("interactive"), 1, INTERACTIVE)
+            )
+        )
+        await asyncio.sleep(0)
+        depth = scheduler.queue_depth()
+        gate.set()
+        await asyncio.gather(holding, *waiting)
+        return depth
+
+    depth = asyncio.run(run())
+    assert depth == {"interactive": 1, "batch": 3}
+    assert order == ["interactive", "batch-1", "batch-2", "batch-3"]
+
+
+def test_requests_per_minute_budget_delays_dispatch():
+    # 120 RPM refills 2 requests/s with a 10 s burst of 20
+    scheduler = make_scheduler(requests_per_minute=120, initial_concurrency=64)
+
+    async def call():
+        return None
+
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(scheduler.run(call, 1) for _ in range(22)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    assert 0.9 <= elapsed < 3
+
+
+def test_tokens_per_minute_budget_and_usage_refund():
+    # 1200 TPM refills 20 tokens/s with a 10 s burst of 200
+    scheduler = make_scheduler(tokens_per_minute=1200)
+
+    async def call():
+        return SimpleNamespace(usage_metadata={"total_tokens": 40})
+
+    async def run():
+        start = time.perf_counter()
+        # Each call reserves 100 tokens but reports 40, refunding 60
+        await asyncio.gather(*(scheduler.run(call, 100) for _ in range(3)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.5
+    assert scheduler.tokens_bucket.level == pytest.approx(200 - 3 * 40, abs=1)
+
+
+def test_additive_increase_and_non_throttle_errors():
+    scheduler = make_scheduler(initial_concurrency=2, max_concurrency=4)
+    attempts = []
+
+    async def ok():
+        return None
+
+    async def broken():
+        attempts.append(1)
+        raise ValueError("malformed response")
+
+    async def run():
+        for _ in range(20):
+            await scheduler.run(ok, 1)
+        with pytest.raises(ValueError):
+            await scheduler.run(broken, 1)
+
+    asyncio.run(run())
+    assert scheduler.limit == 4
+    # Errors other than 429 are neither retried nor treated as congestion
+    assert attempts == [1]
+    assert scheduler.throttled == 0
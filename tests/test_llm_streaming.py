@@ -0,0 +1,175 @@
+import asyncio
+import json
+import time
+
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.prompts import PromptTemplate
+
+from app.api.v1.endpoints import router
+from app.internal.llm import chain as llm_chain
+from app.internal.llm.cache import InMemoryCacheBackend, LLMResponseCache
+from app.internal.llm.provider import AnalysisChainProvider
+from tests.fakes import make_config, write_prompt
+
+REPORT = '{"suggestion": "Long", "reason": "MACD \\"bullish\\" crossover"}'
+SIGNAL = {"signal_status": "ok", "rsi": 55.0}
+
+
+class SlowStreamingLLM:
+    """Streams the report in small chunks, `delay` seconds apart."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def astream(self, prompt):
+        self.calls += 1
+        for offset in range(0, len(REPORT), 8):
+            await asyncio.sleep(self.delay)
+            yield AIMessageChunk(content=REPORT[offset : offset + 8])
+
+
+def patch_data_stage(monkeypatch):
+    monkeypatch.setattr(llm_chain, "fetch_and_prepare_kline", lambda *_: pd.DataFrame())
+    monkeypatch.setattr(llm_chain, "compute_trend_signal", lambda *_: dict(SIGNAL))
+
+
+def parse_sse(lines):
+    events = []
+    event = None
+    for line in lines:
+        if line.startswith("event: "):
+            event = line[len("event: ") :]
+        elif line.startswith("data: "):
+            events.append((event, json.loads(line[len("data: ") :])))
+    return events
+
+
+def collect(stream):
+    async def run():
+        return [event async for event in stream]
+
+    return asyncio.run(run())
+
+
+def test_partial_suggestion_is_reported_only_when_complete():
+    assert llm_chain.parse_partial_suggestion('{"suggestion": "Lo') is None
+    assert llm_chain.parse_partial_suggestion('{"suggestion": "Long",') == "Long"
+    assert (
+        llm_chain.parse_partial_suggestion('```json\n{"suggestion":"Say \\"hi\\"",')
+        == 'Say "hi"'
+    )
+
+
+def test_stream_emits_signal_tokens_suggestion_and_report(monkeypatch):
+    patch_data_stage(monkeypatch)
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"],
+        template="{stock_id} {signal_json}",
+    )
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content=REPORT)]))
+    events = collect(llm_chain.astream_stock_analysis("2330.TW", llm, prompt))
+
+    names = [name for name, _ in events]
+    assert names[0] == "signal"
+    assert events[0][1] == {"stock_id": "2330.TW", "signal": SIGNAL}
+    assert names[-1] == "report"
+    assert events[-1][1] == json.loads(REPORT)
+    tokens = [data for name, data in events if name == "token"]
+    assert "".join(tokens) == REPORT
+    # The suggestion is sent right after the token that completes it
+    suggestion_at = names.index("suggestion")
+    assert events[suggestion_at][1] == "Long"
+    streamed = "".join(data for name, data in events[:suggestion_at] if name == "token")
+    assert '"Long"' in streamed and "reason" not in streamed
+
+
+def test_stream_serves_cached_report_without_llm(monkeypatch):
+    patch_data_stage(monkeypatch)
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"],
+        template="{stock_id} {signal_json}",
+    )
+    cache = LLMResponseCache(InMemoryCacheBackend(16, ttl_seconds=60))
+    llm = SlowStreamingLLM()
+    first = collect(
+        llm_chain.astream_stock_analysis("2330.TW", llm, prompt, response_cache=cache)
+    )
+    second = collect(
+        llm_chain.astream_stock_analysis("2330.TW", llm, prompt, response_cache=cache)
+    )
+    assert llm.calls == 1
+    assert first[-1] == second[-1] == ("report", json.loads(REPORT))
+    assert [name for name, _ in second] == ["signal", "suggestion", "report"]
+
+
+def test_signal_is_sent_before_llm_starts(monkeypatch):
+    patch_data_stage(monkeypatch)
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"],
+        template="{stock_id} {signal_json}",
+    )
+    llm = SlowStreamingLLM(delay=0.05)
+
+    async def run():
+        start = time.perf_counter()
+        arrivals = []
+        async for name, _ in llm_chain.astream_stock_analysis("2330.TW", llm, prompt):
+            arrivals.append((name, time.perf_counter() - start))
+        return arrivals
+
+    arrivals = asyncio.run(run())
+    assert arrivals[0][0] == "signal"
+    total = arrivals[-1][1]
+    assert total >= (len(REPORT) // 8) * llm.delay
+    assert arrivals[0][1] < llm.delay
+    suggestion_at = dict(arrivals)["suggestion"]
+    assert suggestion_at < total
+
+
+def test_stream_endpoint_sends_server_sent_events(tmp_path, monkeypatch):
+    patch_data_stage(monkeypatch)
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "{stock_id} {signal_json}", 1_000_000_000)
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.state.analysis_chain_provider = AnalysisChainProvider(
+        make_config(prompt_path), llm_client=SlowStreamingLLM()
+    )
+    client = TestClient(app)
+
+    with client.stream(
+        "POST", "/api/v1/stock/llm-report/stream", json={"stock_id": "2330.TW"}
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.iter_lines())
+    assert events[0] == ("signal", {"stock_id": "2330.TW", "signal": SIGNAL})
+    assert ("suggestion", "Long") in events
+    assert "".join(data for name, data in events if name == "token") == REPORT
+    assert events[-1] == ("report", json.loads(REPORT))
+    stats = client.get("/api/v1/runtime/stats").json()["analysis_chain"]
+    assert stats["streams_served"] == 1
+
+
+def test_stream_endpoint_reports_errors_as_events(tmp_path, monkeypatch):
+    def fail(*_):
+        raise RuntimeError("no bars")
+
+    monkeypatch.setattr(llm_chain, "fetch_and_prepare_kline", fail)
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "{stock_id} {signal_json}", 1_000_000_000)
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.state.analysis_chain_provider = AnalysisChainProvider(
+        make_config(prompt_path), llm_client=SlowStreamingLLM()
+    )
+    response = TestClient(app).post(
+        "/api/v1/stock/llm-report/stream", json={"stock_id": "2330.TW"}
+    )
+    events = parse_sse(response.text.splitlines())
+    assert events == [("error", {"detail": "LLM analysis failed: no bars"})]
@@ -0,0 +1,148 @@
+import io
+import json
+import logging
+import threading
+import time
+
+from loguru import logger
+
+from app.configs.config import LoggingConfig
+from app.utils.logger import InterceptHandler, Logger, QueuedSink, SamplingFilter
+from app.utils.metrics import MetricsRegistry
+
+
+class BlockingStream(io.StringIO):
+    """StringIO whose writes wait until `release` is set, like a stalled pipe."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.writes = 0
+
+    def write(self, text):
+        self.release.wait()
+        self.writes += 1
+        return super().write(text)
+
+
+def test_queued_sink_batches_writes_and_drains_on_stop():
+    stream = BlockingStream()
+    sink = QueuedSink(stream, queue_size=100, batch_size=50)
+    for i in range(100):
+        sink.write(f"line {i}\n")
+    stream.release.set()
+    sink.stop()
+
+    assert stream.getvalue().splitlines() == [f"line {i}" for i in range(100)]
+    # The first line may be written alone while the others are still being queued
+    assert stream.writes <= 3
+    assert sink.stats()["written"] == 100
+    assert sink.stats()["dropped"] == 0
+
+
+def test_queued_sink_writes_after_stop_are_not_lost():
+    stream = io.StringIO()
+    sink = QueuedSink(stream)
+    sink.write("queued\n")
+    sink.stop()
+    sink.write("after stop\n")
+    assert stream.getvalue().splitlines() == ["queued", "after stop"]
+
+    closing = QueuedSink(io.StringIO(), close_stream=True)
+    closing.stop()
+    closing.write("after close\n")
+    assert closing.dropped == 1
+
+
+def test_queued_sink_drop_new_keeps_oldest_lines():
+    stream = BlockingStream()
+    counter = MetricsRegistry().counter("dropped_total", "Dropped.", ["sink"])
+    sink = QueuedSink(
+        stream,
+        name="test",
+        queue_size=5,
+        batch_size=1,
+        drop_policy="drop_new",
+        dropped_counter=counter,
+    )
+    sink.write("first\n")
+    while sink.stats()["queued"]:
+        time.sleep(0.001)  # writer holds "first" and blocks on the stream
+    for i in range(10):
+        sink.write(f"line {i}\n")
+    stream.release.set()
+    sink.stop()
+
+    assert stream.getvalue().splitlines() == ["first"] + [f"line {i}" for i in range(5)]
+    assert sink.dropped == 5
+    assert counter.value(sink="test") == 5
+
+
+def test_queued_sink_drop_oldest_keeps_newest_lines():
+    stream = BlockingStream()
+    sink = QueuedSink(stream, queue_size=5, batch_size=1, drop_policy="drop_oldest")
+    sink.write("first\n")
+    while sink.stats()["queued"]:
+        time.sleep(0.001)
+    for i in range(10):
+        sink.write(f"line {i}\n")
+    stream.release.set()
+    sink.stop()
+
+    assert stream.getvalue().splitlines() == ["first"] + [
+        f"line {i}" for i in range(5, 10)
+    ]
+    assert sink.dropped == 5
+
+
+def test_sampling_filter_keeps_one_in_n_matching_records():
+    sampling = SamplingFilter({"health_check": 10})
+    kept = [sampling({"message": "{'event': 'health_check'}"}) for _ in range(30)]
+    assert sum(kept) == 3
+    assert kept[0]
+    assert all(sampling({"message": "analysis done"}) for _ in range(5))
+
+
+def test_intercept_handler_attributes_records_to_caller():
+    records = []
+    handler_id = logger.add(records.append, format="{function}:{line}")
+    stdlib_logger = logging.getLogger("test_intercept")
+    stdlib_logger.handlers = [InterceptHandler()]
+    stdlib_logger.propagate = False
+
+    def caller():
+        stdlib_logger.warning("first")
+        return stdlib_logger.warning("second")
+
+    try:
+        caller()
+        caller()  # second call reuses the cached depths
+    finally:
+        logger.remove(handler_id)
+        stdlib_logger.handlers = []
+    line = caller.__code__.co_firstlineno
+    assert [r.strip() for r in records] == [
+        f"caller:{line + 1}",
+        f"caller:{line + 2}",
+    ] * 2
+
+
+def test_init_config_queued_writes_json_lines(tmp_path):
+    log_path = tmp_path / "app.log"
+    loggers = Logger()
+    try:
+        loggers.init_config(
+            log_path=str(log_path),
+            options=LoggingConfig(sample_every={"health_check": 5}),
+        )
+        assert all(isinstance(sink, QueuedSink) for sink in loggers.sinks)
+        for _ in range(10):
+            logger.info({"event": "health_check"})
+        logger.info("request served")
+    finally:
+        loggers.shutdown()
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    messages = [record["record"]["message"] for record in records]
+    assert messages.count("{'event': 'health_check'}") == 2
+    assert messages[-1] == "request served"
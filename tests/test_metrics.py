@@ -0,0 +1,136 @@
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import router
+from app.internal.llm import chain as llm_chain
+from app.internal.llm.cache import InMemoryCacheBackend, LLMResponseCache
+from app.internal.llm.provider import AnalysisChainProvider
+from app.services.analysis.stock_trend_pipeline import (
+    INDICATOR_STEPS,
+    compute_trend_signal,
+)
+from app.utils.metrics import (
+    INDICATOR_SECONDS,
+    STAGE_ERRORS,
+    STAGE_SECONDS,
+    MetricsRegistry,
+    metrics,
+    span,
+)
+from tests.fakes import FakeLLM, make_config, make_daily_bars, write_prompt
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.", ["route"])
+    counter.inc(route="/a")
+    counter.inc(2, route='/"b"')
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a"} 1' in lines
+    assert 'requests_total{route="/\\"b\\""} 2' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_registry_rejects_kind_mismatch_and_reuses_metrics():
+    registry = MetricsRegistry()
+    counter = registry.counter("x_total", "X.")
+    assert registry.counter("x_total", "X.") is counter
+    with pytest.raises(ValueError):
+        registry.histogram("x_total", "X.")
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    registry.counter("c_total", "C.").inc()
+    registry.histogram("h_seconds", "H.").observe(1.0)
+    assert registry.counter("c_total", "C.").value() == 0
+    assert registry.histogram("h_seconds", "H.").count() == 0
+
+
+def test_span_counts_errors_per_stage():
+    errors = STAGE_ERRORS.value(stage="test_stage")
+    observed = STAGE_SECONDS.count(stage="test_stage")
+    with pytest.raises(RuntimeError):
+        with span("test_stage"):
+            raise RuntimeError("boom")
+    with span("test_stage"):
+        pass
+    assert STAGE_ERRORS.value(stage="test_stage") == errors + 1
+    assert STAGE_SECONDS.count(stage="test_stage") == observed + 2
+
+
+def test_compute_trend_signal_times_stages_and_indicators():
+    before = {
+        step.__name__: INDICATOR_SECONDS.count(indicator=step.__name__)
+        for step in INDICATOR_STEPS
+    }
+    enrich = STAGE_SECONDS.count(stage="enrich")
+    signals = STAGE_SECONDS.count(stage="signals")
+
+    compute_trend_signal(make_daily_bars(), "2330")
+
+    assert STAGE_SECONDS.count(stage="enrich") == enrich + 1
+    assert STAGE_SECONDS.count(stage="signals") == signals + 1
+    for name, count in before.items():
+        assert INDICATOR_SECONDS.count(indicator=name) == count + 1
+
+
+def test_metrics_endpoint_reports_chain_stages(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_chain, "fetch_and_prepare_kline", lambda *_: pd.DataFrame())
+    monkeypatch.setattr(
+        llm_chain, "compute_trend_signal", lambda *_: {"signal_status": "ok"}
+    )
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "{stock_id} {signal_json}", 1_000_000_000)
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.state.analysis_chain_provider = AnalysisChainProvider(
+        make_config(prompt_path),
+        llm_client=FakeLLM(),
+        response_cache=LLMResponseCache(InMemoryCacheBackend(10, 60)),
+    )
+    client = TestClient(app)
+    before = {
+        stage: STAGE_SECONDS.count(stage=stage) for stage in ("prompt", "llm", "parse")
+    }
+
+    for _ in range(2):
+        response = client.post("/api/v1/stock/llm-report", json={"stock_id": "2330"})
+        assert response.status_code == 200
+
+    # The second request is a cache hit: prompt, LLM and parse run once
+    for stage, count in before.items():
+        assert STAGE_SECONDS.count(stage=stage) == count + 1
+    response = client.get("/api/v1/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'analysis_stage_seconds_count{stage="llm"}' in body
+    assert 'llm_cache_lookups_total{result="hit"}' in body
+    assert "analysis_chain_attempts_total" in body
+    assert 'analysis_requests_served{mode="invoke"} 2' in body
+    assert 'llm_scheduler_queue_depth{priority="interactive"} 0' in body
+
+
+def test_metrics_endpoint_is_404_when_disabled(tmp_path, monkeypatch):
+    prompt_path = tmp_path / "prompt.md"
+    write_prompt(prompt_path, "{stock_id} {signal_json}", 1_000_000_000)
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.state.analysis_chain_provider = AnalysisChainProvider(
+        make_config(prompt_path), llm_client=FakeLLM()
+    )
+    monkeypatch.setattr(metrics, "enabled", False)
+    assert TestClient(app).get("/api/v1/metrics").status_code == 404
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.internal.analysis import panel_indicators
+from app.services.analysis.stock_trend_pipeline import enrich_with_all_indicators
+
+INDICATOR_COLUMNS = [
+    "5ma",
+    "10ma",
+    "20ma",
+    "macd",
+    "signal_line",
+    "vma_short",
+    "vma_long",
+    "cci",
+    "rsi",
+    "bollinger_middle",
+    "bollinger_upper",
+    "bollinger_lower",
+    "atr",
+    "kdj_k",
+    "kdj_d",
+    "kdj_j",
+    "obv",
+    "adx",
+]
+
+
+def make_ohlcv(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = np.floor(100 + np.cumsum(rng.normal(0, 2, n)))
+    open_ = close + np.floor(rng.normal(0, 1, n))
+    high = np.maximum(open_, close) + np.floor(rng.uniform(0, 3, n))
+    low = np.minimum(open_, close) - np.floor(rng.uniform(0, 3, n))
+    volume = np.floor(rng.uniform(100, 5000, n))
+    index = pd.bdate_range("2024-01-01", periods=n)
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+        index=index,
+    )
+
+
+def test_panel_indicators_match_single_ticker():
+    # Tickers with different history lengths share the same trading calendar tail
+    frames = {
+        "A.TW": make_ohlcv(80, 1),
+        "B.TW": make_ohlcv(80, 2).iloc[25:],
+        "C.TW": make_ohlcv(80, 3),
+    }
+    stacked = pd.concat(frames, names=["ticker", "timestamp"])
+    panel = panel_indicators.build_ohlcv_panel(stacked)
+    result = panel_indicators.calculate_panel_indicators(panel)
+    for ticker, frame in frames.items():
+        expected = enrich_with_all_indicators(frame.copy())
+        for column in INDICATOR_COLUMNS:
+            actual = result[column][ticker].loc[expected.index]
+            np.testing.assert_allclose(
+                actual.to_numpy(),
+                expected[column].to_numpy(dtype=float),
+                rtol=1e-9,
+                equal_nan=True,
+                err_msg=f"{ticker} {column}",
+            )
+
+
+def test_panel_from_arrays_and_stack_roundtrip():
+    frames = {"A": make_ohlcv(40, 4), "B": make_ohlcv(40, 5)}
+    panel = panel_indicators.build_ohlcv_panel_from_arrays(
+        close=np.column_stack([f["close"] for f in frames.values()]),
+        high=np.column_stack([f["high"] for f in frames.values()]),
+        low=np.column_stack([f["low"] for f in frames.values()]),
+        volume=np.column_stack([f["volume"] for f in frames.values()]),
+        tickers=list(frames),
+    )
+    result = panel_indicators.calculate_panel_indicators(panel)
+    expected = enrich_with_all_indicators(frames["B"].reset_index(drop=True))
+    np.testing.assert_allclose(
+        result["adx"]["B"].to_numpy(), expected["adx"].to_numpy(), equal_nan=True
+    )
+    stacked = panel_indicators.stack_panel(result)
+    assert stacked.index.names == ["ticker", "timestamp"]
+    assert len(stacked) == 80
+    assert "obv" in stacked.columns
+
+
+def test_panel_from_arrays_rejects_shape_mismatch():
+    with pytest.raises(ValueError):
+        panel_indicators.build_ohlcv_panel_from_arrays(
+            close=np.zeros((5, 2)),
+            high=np.zeros((5, 2)),
+            low=np.zeros((5, 3)),
+            volume=np.zeros((5, 2)),
+        )
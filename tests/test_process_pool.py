@@ -0,0 +1,89 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.internal.yfinance.stock_data import KlineBatch
+from app.services.analysis import stock_trend_pipeline
+from app.services.analysis.process_pool import (
+    SharedBarBlock,
+    compute_trend_signals_in_processes,
+    score_shared_shard,
+)
+from app.services.analysis.stock_trend_pipeline import compute_trend_signal
+
+
+def make_ohlcv(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = np.floor(100 + np.cumsum(rng.normal(0, 2, n)))
+    open_ = close + np.floor(rng.normal(0, 1, n))
+    high = np.maximum(open_, close) + np.floor(rng.uniform(0, 3, n))
+    low = np.minimum(open_, close) - np.floor(rng.uniform(0, 3, n))
+    volume = np.floor(rng.uniform(100, 5000, n))
+    index = pd.bdate_range("2024-01-01", periods=n)
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+        index=index,
+    )
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    with ProcessPoolExecutor(max_workers=2, mp_context=get_context("spawn")) as pool:
+        yield pool
+
+
+def make_frames():
+    frames = {f"{1000 + i}.TW": make_ohlcv(40 + 5 * i, i) for i in range(12)}
+    frames["9999.TW"] = pd.DataFrame()
+    return frames
+
+
+def test_shared_bar_block_shards_cover_all_tickers():
+    frames = make_frames()
+    with SharedBarBlock(frames) as block:
+        shards = block.shards(4)
+        assert 1 < len(shards) <= 4
+        assert [t for shard in shards for t, _, _ in shard] == list(frames)
+        # The worker entry point also runs in-process against the shared block
+        signals = score_shared_shard(block.spec, [s for shard in shards for s in shard])
+    for ticker, frame in frames.items():
+        assert signals[ticker] == compute_trend_signal(frame, ticker)
+
+
+def test_process_pool_matches_in_process_signals(process_pool):
+    frames = make_frames()
+    signals = compute_trend_signals_in_processes(
+        frames, max_workers=2, executor=process_pool
+    )
+    assert list(signals) == list(frames)
+    for ticker, frame in frames.items():
+        assert signals[ticker] == compute_trend_signal(frame, ticker)
+    assert signals["9999.TW"]["signal_status"] == "invalid"
+
+
+def test_batch_pipeline_process_backend(monkeypatch, process_pool):
+    frames = make_frames()
+    monkeypatch.setattr(
+        stock_trend_pipeline,
+        "fetch_kline_data_many",
+        lambda stock_ids, chunk_size=100: KlineBatch(
+            frames={t: f for t, f in frames.items() if not f.empty},
+            failures={"9999.TW": "no data returned"},
+        ),
+    )
+    monkeypatch.setattr(
+        "app.services.analysis.process_pool.get_process_pool",
+        lambda max_workers: process_pool,
+    )
+    stock_ids = list(frames)
+    by_thread = stock_trend_pipeline.analyze_stock_trend_signals_batch(
+        stock_ids, max_workers=2, backend="thread"
+    )
+    by_process = stock_trend_pipeline.analyze_stock_trend_signals_batch(
+        stock_ids, max_workers=2, backend="process"
+    )
+    assert by_process == by_thread
+    assert list(by_process) == stock_ids
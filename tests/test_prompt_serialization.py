@@ -0,0 +1,130 @@
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from langchain_core.prompts import PromptTemplate
+
+from app.internal.llm import chain as llm_chain
+from app.internal.llm.batch import format_batch_prompt, load_batch_prompt_template
+from app.internal.llm.cache import InMemoryCacheBackend, LLMResponseCache
+from app.internal.llm.serialization import (
+    SIGNAL_LEGEND,
+    PromptTokenStats,
+    compact_signal,
+    estimate_tokens,
+    round_number,
+    serialize_signal,
+)
+
+SIGNAL = {
+    "macd_bullish": True,
+    "macd": -0.21216198458898816,
+    "signal_line": -0.6394731699945667,
+    "recent_high": True,
+    "sustained_highs": 2,
+    "sustained_highs_enough": False,
+    "trend_momentum": True,
+    "cci": 104.41767068273121,
+    "vma_short": 2792.8,
+    "vma_long": 2756.95,
+    "volume_spike": False,
+    "volume": 3468.0,
+    "momentum_kbar": False,
+    "rsi": 60.0,
+    "rsi_overbought": False,
+    "rsi_oversold": False,
+    "bollinger_upper": 114.92481043304883,
+    "bollinger_lower": 106.07518956695117,
+    "bollinger_breakout": "none",
+    "atr": 3.4285714285714284,
+    "trend_categories": ["macd_bullish", "recent_high", "trend_momentum"],
+    "signal_status": "ok",
+}
+
+
+def test_round_number_keeps_significant_digits():
+    assert round_number(-0.21216198458898816) == -0.2122
+    assert round_number(114.92481043304883) == 114.9
+    assert round_number(2792.8) == 2793
+    assert round_number(60.0) == 60
+    assert round_number(float("nan")) is None
+
+
+def test_compact_signal_drops_redundant_fields_and_shortens_keys():
+    compact = compact_signal(SIGNAL)
+    assert compact == {
+        "macd": -0.2122,
+        "sig": -0.6395,
+        "sh": 2,
+        "cci": 104.4,
+        "vs": 2793,
+        "vl": 2757,
+        "vol": 3468,
+        "rsi": 60,
+        "bbu": 114.9,
+        "bbl": 106.1,
+        "atr": 3.429,
+        "cat": ["macd_bullish", "recent_high", "trend_momentum"],
+    }
+    # A breakout side is kept since trend_categories does not say which band broke
+    assert compact_signal({**SIGNAL, "bollinger_breakout": "upper"})["bb"] == "upper"
+
+
+def test_compact_format_uses_far_fewer_tokens():
+    full = serialize_signal(SIGNAL)
+    assert json.loads(full) == SIGNAL
+    compact = serialize_signal(SIGNAL, "compact")
+    assert estimate_tokens(compact) * 2 < estimate_tokens(full)
+    with pytest.raises(ValueError):
+        serialize_signal(SIGNAL, "yaml")
+
+
+def test_chain_uses_signal_format_and_records_prompt_tokens(monkeypatch):
+    monkeypatch.setattr(llm_chain, "fetch_and_prepare_kline", lambda *_: pd.DataFrame())
+    monkeypatch.setattr(llm_chain, "compute_trend_signal", lambda *_: dict(SIGNAL))
+
+    class RecordingLLM:
+        def __init__(self):
+            self.prompts = []
+
+        def invoke(self, prompt):
+            self.prompts.append(prompt)
+            return SimpleNamespace(content='{"suggestion": "Long", "reason": "trend"}')
+
+    prompt = PromptTemplate(
+        input_variables=["stock_id", "signal_json"],
+        template="{stock_id} {signal_json}",
+    )
+    llm = RecordingLLM()
+    cache = LLMResponseCache(InMemoryCacheBackend(16, ttl_seconds=60))
+    token_stats = PromptTokenStats()
+    for signal_format in ("json", "compact"):
+        llm_chain.build_stock_analysis_chain(
+            llm,
+            prompt,
+            response_cache=cache,
+            signal_format=signal_format,
+            token_stats=token_stats,
+        ).invoke("2330.TW")
+    full, compact = llm.prompts
+    assert SIGNAL_LEGEND not in full
+    assert compact.endswith(SIGNAL_LEGEND)
+    assert '"macd_bullish"' in compact.split("cat")[1]  # only inside categories
+    # The format is part of the prompt version, so the compact run missed the cache
+    assert len(llm.prompts) == 2
+    stats = token_stats.stats()
+    assert stats["prompts"] == 2
+    assert stats["last_tokens"] == estimate_tokens(compact)
+    assert stats["total_tokens"] == estimate_tokens(full) + estimate_tokens(compact)
+
+
+def test_batch_prompt_appends_legend_once():
+    template = load_batch_prompt_template("app/prompts/stock_batch_analyzer_prompt.md")
+    entries = [("2330.TW", SIGNAL), ("2317.TW", SIGNAL)]
+    prompt = format_batch_prompt(template, entries, "compact")
+    assert prompt.count(SIGNAL_LEGEND) == 1
+    assert '"stock_id":"2317.TW"' in prompt
+    assert estimate_tokens(prompt) < estimate_tokens(
+        format_batch_prompt(template, entries)
+    )
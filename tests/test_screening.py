@@ -0,0 +1,197 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.configs.config import ScreeningConfig
+from app.internal.llm.batch import BatchAnalysisResult
+from app.internal.shioaji.stock_data import (
+    SNAPSHOT_CHUNK_LIMIT,
+    filter_snapshots,
+    get_filtered_stocks,
+    get_market_contracts,
+    get_shioaji_snapshots,
+    records_to_frame,
+    to_yf_codes,
+)
+from app.services.analysis.screening import ascreen_market, rank_signals
+from tests.fakes import SJ, FakeMarketApi, make_fetcher
+
+
+def test_to_yf_codes_maps_exchanges_vectorized():
+    codes = pd.Series(["2330", "6488", "9999"])
+    exchanges = pd.Series(["TSE", "OTC", "OES"])
+    assert to_yf_codes(codes, exchanges).tolist() == ["2330.TW", "6488.TWO", None]
+
+
+def test_filter_snapshots_matches_volume_rule_and_names():
+    snapshots = pd.DataFrame(
+        {
+            "code": ["2330", "6488", "2317"],
+            "exchange": ["TSE", "OTC", "TSE"],
+            "total_volume": [1100, 3000, 1000],
+            "yesterday_volume": [1000, 1000, 1000],
+            "change_rate": [1.5, -0.5, 2.0],
+        }
+    )
+    scanners = pd.DataFrame({"code": ["2330", "6488", "2317"], "name": ["A", "B", "C"]})
+    result = filter_snapshots(snapshots, scanners)
+    assert result.to_dict("records") == [
+        {"yf_code": "2330.TW", "name": "A", "change_rate": 1.5},
+        {"yf_code": "6488.TWO", "name": "B", "change_rate": -0.5},
+    ]
+
+
+def test_records_to_frame_builds_columns_from_attributes():
+    records = [
+        SimpleNamespace(code="2330", close=1.0),
+        SimpleNamespace(code="2317", close=2.0),
+    ]
+    assert records_to_frame(records).equals(pd.DataFrame(r.__dict__ for r in records))
+    assert list(records_to_frame(records, ["close"]).columns) == ["close"]
+    assert records_to_frame([]).empty
+
+
+def test_snapshots_are_chunked_concurrently_in_contract_order():
+    api = FakeMarketApi(1200)
+    contracts = list(api.Contracts.Stocks.values())
+    df = get_shioaji_snapshots(
+        api, contracts, chunk_size=10_000, max_workers=3, fields=["code", "close"]
+    )
+    assert sorted(api.snapshot_calls) == [
+        200,
+        SNAPSHOT_CHUNK_LIMIT,
+        SNAPSHOT_CHUNK_LIMIT,
+    ]
+    assert df["code"].tolist() == api.codes
+    assert list(df.columns) == ["code", "close"]
+
+
+def test_snapshots_skip_failed_chunks():
+    api = FakeMarketApi(30, failing_codes={"1015"})
+    contracts = list(api.Contracts.Stocks.values())
+    df = get_shioaji_snapshots(api, contracts, chunk_size=10, max_workers=2)
+    assert df["code"].tolist() == api.codes[:10] + api.codes[20:]
+    assert str(df["ts"].dtype).startswith("datetime64")
+
+
+def test_get_market_contracts_keeps_common_stocks():
+    api = FakeMarketApi(5)
+    api.Contracts.Stocks["030001"] = SimpleNamespace(
+        code="030001", name="Warrant", exchange="TSE"
+    )
+    codes = [contract.code for contract in get_market_contracts(api)]
+    assert sorted(codes) == api.codes
+
+
+def test_get_filtered_stocks_with_fake_api():
+    result = get_filtered_stocks(FakeMarketApi(10), SJ)
+    assert result["yf_code"].tolist() == [
+        "1000.TWO",
+        "1002.TW",
+        "1004.TW",
+        "1006.TW",
+        "1008.TW",
+    ]
+    assert result["name"].tolist()[0] == "Stock 1000"
+
+
+def test_rank_signals_orders_by_categories_then_change_rate():
+    signals = {
+        "A": {"signal_status": "ok", "trend_categories": ["macd_bullish"]},
+        "B": {
+            "signal_status": "ok",
+            "trend_categories": ["macd_bullish", "recent_high"],
+        },
+        "C": {"signal_status": "ok", "trend_categories": ["volume_spike"]},
+        "D": {"signal_status": "invalid"},
+    }
+    assert rank_signals(signals, {"A": 1.0, "C": 3.0}, top_n=3) == ["B", "C", "A"]
+    assert rank_signals(signals, {}, top_n=1) == ["B"]
+
+
+def test_screen_market_end_to_end_with_fakes():
+    api = FakeMarketApi(45)
+    analyzed = []
+
+    async def analyze(signals):
+        analyzed.append(list(signals))
+        return BatchAnalysisResult(
+            reports={
+                yf_code: {"suggestion": "Wait", "reason": "test"} for yf_code in signals
+            }
+        )
+
+    config = ScreeningConfig(scanner_count=45, snapshot_chunk_size=20, top_n=5)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        result = asyncio.run(
+            ascreen_market(
+                api,
+                SJ,
+                analyze=analyze,
+                config=config,
+                executor=executor,
+                fetch_bars=make_fetcher(api, missing={"1002.TW"}),
+                download_chunk_size=4,
+            )
+        )
+
+    assert api.snapshot_calls == [20, 20, 5]
+    assert len(result.candidates) == 23
+    assert set(result.signals) == set(result.candidates["yf_code"]) - {"1002.TW"}
+    assert "1002.TW" in result.failures
+    assert analyzed == [result.top]
+    assert len(result.top) == 5
+    categories = [
+        len(result.signals[yf_code]["trend_categories"]) for yf_code in result.top
+    ]
+    assert categories == sorted(categories, reverse=True)
+    assert set(result.reports) == set(result.top)
+    assert result.first_signal_seconds <= result.seconds
+
+
+def test_screen_market_starts_fetching_before_snapshots_finish():
+    api = FakeMarketApi(60, snapshot_latency=0.05)
+    config = ScreeningConfig(scanner_count=60, snapshot_chunk_size=10)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        asyncio.run(
+            ascreen_market(
+                api,
+                SJ,
+                config=config,
+                executor=executor,
+                fetch_bars=make_fetcher(api, latency=0.01),
+            )
+        )
+    assert api.events.count("snapshot") == 6
+    # Bars of the first chunk arrive while later snapshot chunks are still requested
+    last_snapshot = max(i for i, event in enumerate(api.events) if event == "snapshot")
+    assert api.events.index("fetch") < last_snapshot
+
+
+def test_screen_market_scans_full_market_beyond_scanner_count():
+    api = FakeMarketApi(450)
+    # Score only a few candidates; the rest have no bars
+    missing = {
+        f"{code}.{suffix}" for code in api.codes[20:] for suffix in ("TW", "TWO")
+    }
+    config = ScreeningConfig(
+        full_market=True, snapshot_chunk_size=100, snapshot_concurrency=3, top_n=3
+    )
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        result = asyncio.run(
+            ascreen_market(
+                api,
+                SJ,
+                config=config,
+                executor=executor,
+                fetch_bars=make_fetcher(api, missing=missing),
+                download_chunk_size=50,
+            )
+        )
+    assert sum(api.snapshot_calls) == 450
+    assert len(result.candidates) == 225
+    assert result.candidates["name"].notna().all()
+    assert len(result.signals) == 10
+    assert len(result.top) == 3
@@ -0,0 +1,189 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from app.internal.shioaji.tick_stream import (
+    Bar,
+    BarCloseEvent,
+    BarRingBuffer,
+    ShioajiTickStream,
+)
+from app.services.analysis.live_trend import LiveTrendMonitor
+
+SJ = SimpleNamespace(
+    constant=SimpleNamespace(
+        QuoteType=SimpleNamespace(Tick="Tick"),
+        QuoteVersion=SimpleNamespace(v1="v1"),
+    )
+)
+
+
+class FakeQuote:
+    def __init__(self):
+        self.callback = None
+        self.subscribed = []
+
+    def set_on_tick_stk_v1_callback(self, callback):
+        self.callback = callback
+
+    def subscribe(self, contract, quote_type, version):
+        self.subscribed.append((contract.code, quote_type, version))
+
+    def unsubscribe(self, contract, quote_type, version):
+        self.subscribed.remove((contract.code, quote_type, version))
+
+
+class FakeApi:
+    """Replays recorded ticks through the registered tick callback."""
+
+    def __init__(self, codes):
+        self.quote = FakeQuote()
+        self.Contracts = SimpleNamespace(
+            Stocks={code: SimpleNamespace(code=code) for code in codes}
+        )
+
+    def replay(self, ticks):
+        for tick in ticks:
+            self.quote.callback("TSE", tick)
+
+
+def tick(code, ts, close, volume, simtrade=False):
+    return SimpleNamespace(
+        code=code, datetime=ts, close=close, volume=volume, simtrade=simtrade
+    )
+
+
+def test_tick_stream_aggregates_minute_and_daily_bars():
+    api = FakeApi(["2330"])
+    events = []
+    stream = ShioajiTickStream(api, SJ, events.append)
+    assert stream.subscribe(["2330", "9999"]) == ["2330"]
+    assert api.quote.subscribed == [("2330", "Tick", "v1")]
+
+    day1 = datetime(2024, 6, 3, 9, 0, 5)
+    day2 = datetime(2024, 6, 4, 9, 0, 1)
+    api.replay(
+        [
+            tick("2330", day1 - timedelta(seconds=10), 999.0, 50, simtrade=True),
+            tick("2330", day1, 100.0, 5),
+            tick("2330", day1 + timedelta(seconds=20), 103.0, 2),
+            tick("2330", day1 + timedelta(seconds=40), 99.0, 1),
+            tick("2330", day1 + timedelta(minutes=1), 101.0, 4),
+            tick("2330", day2, 105.0, 7),
+        ]
+    )
+    assert [(e.interval, e.bar.timestamp) for e in events] == [
+        ("1m", pd.Timestamp("2024-06-03 09:00")),
+        ("1m", pd.Timestamp("2024-06-03 09:01")),
+        ("1d", pd.Timestamp("2024-06-03")),
+    ]
+    first_minute = events[0].bar
+    assert (first_minute.open, first_minute.high, first_minute.low) == (100, 103, 99)
+    assert (first_minute.close, first_minute.volume) == (99, 8)
+    assert events[0].session_bar.volume == 8
+    daily = events[2].bar
+    assert (daily.open, daily.high, daily.low, daily.close, daily.volume) == (
+        100,
+        103,
+        99,
+        101,
+        12,
+    )
+    assert stream.tick_count == 5
+    assert len(stream.bars("2330", "1m")) == 2
+
+    stream.flush()
+    assert events[-1].interval == "1d"
+    assert events[-1].bar.close == 105
+
+
+def test_tick_stream_dispatches_bar_closes_outside_lock():
+    api = FakeApi(["2330"])
+    locked = []
+
+    def on_bar_close(event):
+        locked.append(stream._lock.locked())
+        raise RuntimeError("consumer failed")
+
+    stream = ShioajiTickStream(api, SJ, on_bar_close)
+    stream.subscribe(["2330"])
+    start = datetime(2024, 6, 3, 9, 0, 5)
+    api.replay(
+        [
+            tick("2330", start, 100.0, 5),
+            tick("2330", start + timedelta(minutes=1), 101.0, 4),
+            tick("2330", start + timedelta(minutes=2), 102.0, 3),
+        ]
+    )
+    stream.flush()
+    # Consumer errors are logged and do not stop ingestion
+    assert stream.tick_count == 3
+    assert locked == [False] * 4
+
+
+def test_bar_ring_buffer_wraps_in_order():
+    buffer = BarRingBuffer(capacity=3)
+    for i in range(5):
+        buffer.append(
+            Bar(pd.Timestamp("2024-06-03") + pd.Timedelta(minutes=i), i, i, i, i, i)
+        )
+    frame = buffer.to_frame()
+    assert len(buffer) == 3
+    assert frame["close"].tolist() == [2.0, 3.0, 4.0]
+    assert frame.index.is_monotonic_increasing
+
+
+def test_live_trend_monitor_updates_categories_intraday():
+    rng = np.random.default_rng(0)
+    close = np.floor(100 + np.cumsum(rng.normal(0, 2, 80)))
+    history = pd.DataFrame(
+        {
+            "open": close,
+            "high": close + 2,
+            "low": close - 2,
+            "close": close,
+            "volume": np.full(80, 1000.0),
+        },
+        index=pd.bdate_range("2024-01-01", periods=80, name="timestamp"),
+    )
+    monitor = LiveTrendMonitor()
+    monitor.seed("2330", history)
+    seeded_bars = monitor.states["2330"].bar_count
+
+    api = FakeApi(["2330"])
+    stream = ShioajiTickStream(api, SJ, monitor.on_bar_close)
+    stream.subscribe(["2330"])
+    session = datetime(2024, 4, 22, 9, 0)
+    api.replay(
+        [
+            tick("2330", session + timedelta(minutes=m), close[-1] + 30 + m, 3000)
+            for m in range(3)
+        ]
+    )
+    signal = monitor.signals["2330"]
+    assert signal["interval"] == "1m"
+    assert signal["signal_status"] == "ok"
+    # Minute closes score a preview; the daily state only advances on the daily close
+    assert monitor.states["2330"].bar_count == seeded_bars
+    assert "volume_spike" in monitor.trend_categories()["2330"]
+
+    stream.flush()
+    assert monitor.states["2330"].bar_count == seeded_bars + 1
+    assert monitor.signals["2330"]["interval"] == "1d"
+
+
+def test_live_trend_monitor_drops_out_of_order_bars():
+    monitor = LiveTrendMonitor()
+    day = pd.Timestamp("2024-06-03")
+    newer = Bar(day + pd.Timedelta(days=1), 101.0, 102.0, 100.0, 101.0, 10.0)
+    older = Bar(day, 90.0, 91.0, 89.0, 90.0, 10.0)
+
+    monitor.on_bar_close(BarCloseEvent("2330", "1d", newer))
+    monitor.on_bar_close(BarCloseEvent("2330", "1d", older))
+    monitor.on_bar_close(BarCloseEvent("2330", "1d", newer))
+
+    state = monitor.states["2330"]
+    assert state.bar_count == 1
+    assert state.latest["close"] == 101.0
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+def test_do_shares_one_execution_between_threads():
+    flight = SingleFlight("fetch")
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return {"bars": 60}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, "2330.TW", work)
+        started.wait(5)
+        followers = [executor.submit(flight.do, "2330.TW", work) for _ in range(3)]
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+    assert runs == [1]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {
+        "calls": 4,
+        "executions": 1,
+        "coalesced": 3,
+        "in_flight": 0,
+    }
+
+
+def test_do_propagates_errors_to_waiters_and_does_not_cache_them():
+    flight = SingleFlight("fetch")
+
+    def fail():
+        raise ValueError("download failed")
+
+    with pytest.raises(ValueError):
+        flight.do("2330.TW", fail)
+    assert flight.do("2330.TW", lambda: "ok") == "ok"
+    assert flight.stats()["executions"] == 2
+
+
+def test_ado_coalesces_and_survives_caller_cancellation():
+    flight = SingleFlight("llm")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "report"
+
+    async def run():
+        first = asyncio.ensure_future(flight.ado("2330.TW", work))
+        await asyncio.sleep(0)
+        rest = [asyncio.ensure_future(flight.ado("2330.TW", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # The caller that started the call goes away; the others still get the result
+        first.cancel()
+        return await asyncio.gather(*rest), await flight.ado("2317.TW", work)
+
+    shared, other = asyncio.run(run())
+    assert shared == ["report"] * 3
+    assert other == "report"
+    assert runs == [1, 1]
+    assert flight.stats() == {
+        "calls": 5,
+        "executions": 2,
+        "coalesced": 3,
+        "in_flight": 0,
+    }
+
+
+def test_ado_propagates_errors_to_all_waiters():
+    flight = SingleFlight("signal")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("no bars")
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.ado("2330.TW", fail) for _ in range(3)), return_exceptions=True
+        )
+
+    errors = asyncio.run(run())
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.stats()["executions"] == 1
@@ -1,6 +1,16 @@
+import numpy as np
 import pandas as pd
+import pytest
 
-from app.services.analysis.stock_trend_pipeline import enrich_with_all_indicators
+from app.internal.yfinance.stock_data import KlineBatch
+from app.services.analysis import stock_trend_pipeline
+from app.services.analysis.stock_trend_pipeline import (
+    compute_trend_signal,
+    enrich_with_all_indicators,
+    memory_usage_bytes,
+)
+from app.services.analysis.trend_analysis import REQUIRED_COLUMNS
+from tests.fakes import make_daily_bars
 
 
 def test_enrich_with_all_indicators_adds_columns():
@@ -39,3 +49,102 @@ def test_enrich_with_all_indicators_adds_columns():
     # Ensure original DataFrame is not modified in place
     for col in expected_columns:
         assert col not in df.columns
+
+
+def test_analyze_stock_trend_signals_batch(monkeypatch):
+    n = 30
+    df = pd.DataFrame(
+        {
+            "open": [10.0 + i for i in range(n)],
+            "high": [11.0 + i for i in range(n)],
+            "low": [9.0 + i for i in range(n)],
+            "close": [10.5 + i for i in range(n)],
+            "volume": [100 + 10 * i for i in range(n)],
+        }
+    )
+    requested = []
+
+    def fake_fetch_many(stock_ids, chunk_size=100):
+        requested.append(list(stock_ids))
+        return KlineBatch(
+            frames={"2330.TW": df.copy()}, failures={"9999.TW": "no data returned"}
+        )
+
+    monkeypatch.setattr(stock_trend_pipeline, "fetch_kline_data_many", fake_fetch_many)
+    result = stock_trend_pipeline.analyze_stock_trend_signals_batch(
+        ["2330.TW", "9999.TW", "2330.TW"], max_workers=2
+    )
+    # One bulk download for the de-duplicated universe
+    assert requested == [["2330.TW", "9999.TW"]]
+    assert list(result) == ["2330.TW", "9999.TW"]
+    assert result["2330.TW"]["signal_status"] == "ok"
+    assert result["9999.TW"]["signal_status"] == "invalid"
+    assert "no data returned" in result["9999.TW"]["reason"]
+
+
+def test_analyze_stock_trend_signals_panel(monkeypatch):
+    n = 30
+    frames = {
+        stock_id: pd.DataFrame(
+            {
+                "open": [10.0 + i * step for i in range(n)],
+                "high": [11.0 + i * step for i in range(n)],
+                "low": [9.0 + i * step for i in range(n)],
+                "close": [10.5 + i * step for i in range(n)],
+                "volume": [100 + 10 * i for i in range(n)],
+            },
+            index=pd.bdate_range("2024-01-01", periods=n),
+        )
+        for stock_id, step in (("2330.TW", 1), ("2317.TW", -0.1))
+    }
+
+    def fake_fetch_many(stock_ids, chunk_size=100):
+        return KlineBatch(frames=frames, failures={"9999.TW": "no data returned"})
+
+    monkeypatch.setattr(stock_trend_pipeline, "fetch_kline_data_many", fake_fetch_many)
+    table = stock_trend_pipeline.analyze_stock_trend_signals_panel(
+        ["9999.TW", "2330.TW", "2317.TW"]
+    )
+    assert list(table.index) == ["9999.TW", "2330.TW", "2317.TW"]
+    assert list(table["signal_status"]) == ["invalid", "ok", "ok"]
+    for stock_id, frame in frames.items():
+        expected = stock_trend_pipeline.compute_trend_signal(frame, stock_id)
+        assert table.loc[stock_id, "trend_categories"] == expected["trend_categories"]
+
+
+def test_enrich_compact_keeps_required_columns_as_float32():
+    df = make_daily_bars()
+    compact = enrich_with_all_indicators(df, compact=True)
+    standard = enrich_with_all_indicators(df.copy())
+    assert list(compact.columns) == REQUIRED_COLUMNS
+    assert compact["volume"].dtype == np.int32
+    assert all(
+        compact[col].dtype == np.float32 for col in REQUIRED_COLUMNS if col != "volume"
+    )
+    # The input frame is not modified in compact mode
+    assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+    assert memory_usage_bytes(compact) * 3 < memory_usage_bytes(standard)
+    np.testing.assert_allclose(
+        compact[REQUIRED_COLUMNS].to_numpy(dtype=float),
+        standard[REQUIRED_COLUMNS].to_numpy(dtype=float),
+        rtol=1e-5,
+        atol=1e-3,
+    )
+
+
+def test_compact_volume_falls_back_to_float32_when_not_integral():
+    df = make_daily_bars()
+    df["volume"] += 0.5
+    assert enrich_with_all_indicators(df, compact=True)["volume"].dtype == np.float32
+
+
+def test_compute_trend_signal_compact_matches_standard():
+    df = make_daily_bars()
+    standard = compute_trend_signal(df.copy(), "2330.TW")
+    compact = compute_trend_signal(df, "2330.TW", compact=True)
+    assert compact.keys() == standard.keys()
+    for key, value in standard.items():
+        if isinstance(value, float):
+            assert compact[key] == pytest.approx(value, rel=1e-5, abs=1e-3), key
+        else:
+            assert compact[key] == value, key
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from app.internal.analysis.streaming_indicators import (
+    STREAMING_COLUMNS,
+    StreamingIndicatorState,
+)
+from app.services.analysis.stock_trend_pipeline import enrich_with_all_indicators
+from app.services.analysis.trend_analysis import (
+    generate_trend_signals,
+    generate_trend_signals_from_state,
+)
+
+
+def make_ohlcv(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = np.floor(100 + np.cumsum(rng.normal(0, 2, n)))
+    open_ = close + np.floor(rng.normal(0, 1, n))
+    high = np.maximum(open_, close) + np.floor(rng.uniform(0, 3, n))
+    low = np.minimum(open_, close) - np.floor(rng.uniform(0, 3, n))
+    volume = np.floor(rng.uniform(100, 5000, n))
+    index = pd.bdate_range("2023-01-02", periods=n, name="timestamp")
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+        index=index,
+    )
+
+
+def test_streaming_state_matches_batch_indicators():
+    df = make_ohlcv(300, seed=7)
+    # Flat bars exercise the 0/0 paths in KDJ and CCI
+    df.iloc[100:112] = [[50.0, 50.0, 50.0, 50.0, 1000.0]] * 12
+    expected = enrich_with_all_indicators(df.copy())
+    state = StreamingIndicatorState(history_size=len(df))
+    for timestamp, row in zip(df.index, df.itertuples(index=False)):
+        state.update(*row, timestamp=timestamp)
+    actual = state.to_frame()
+    for column in STREAMING_COLUMNS:
+        np.testing.assert_allclose(
+            actual[column].to_numpy(dtype=float),
+            expected[column].to_numpy(dtype=float),
+            rtol=1e-7,
+            atol=1e-8,
+            equal_nan=True,
+            err_msg=column,
+        )
+
+
+def test_streaming_state_keeps_bounded_history():
+    df = make_ohlcv(120, seed=3)
+    state = StreamingIndicatorState.from_frame(df, history_size=60)
+    assert len(state.history) == 60
+    assert state.bar_count == 120
+    assert state.latest["close"] == df["close"].iloc[-1]
+    assert list(state.to_frame().index) == list(df.index[-60:])
+
+
+def test_generate_trend_signals_from_state_matches_full_history():
+    df = make_ohlcv(200, seed=11)
+    state = StreamingIndicatorState.from_frame(df.iloc[:150])
+    for timestamp, row in zip(df.index[150:], df.iloc[150:].itertuples(index=False)):
+        state.update(*row, timestamp=timestamp)
+    expected = generate_trend_signals(enrich_with_all_indicators(df.copy()))
+    actual = generate_trend_signals_from_state(state)
+    assert actual["trend_categories"] == expected["trend_categories"]
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert np.isclose(actual[key], value, rtol=1e-7, equal_nan=True), key
+        else:
+            assert actual[key] == value, key
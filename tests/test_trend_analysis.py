@@ -1,6 +1,12 @@
+import numpy as np
 import pandas as pd
 
+from app.internal.analysis.panel_indicators import (
+    build_ohlcv_panel_from_frames,
+    calculate_panel_indicators,
+)
 from app.services.analysis import trend_analysis
+from app.services.analysis.stock_trend_pipeline import enrich_with_all_indicators
 
 
 def test_generate_trend_signals_valid():
@@ -39,3 +45,72 @@ def test_generate_trend_signals_missing_columns():
     result = trend_analysis.generate_trend_signals(df)
     assert result["signal_status"] == "invalid"
     assert "reason" in result
+
+
+def make_ohlcv(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = np.floor(100 + np.cumsum(rng.normal(0, 2, n)))
+    open_ = close + np.floor(rng.normal(0, 1, n))
+    high = np.maximum(open_, close) + np.floor(rng.uniform(0, 3, n))
+    low = np.minimum(open_, close) - np.floor(rng.uniform(0, 3, n))
+    # Occasional 3x volume bars so that volume spikes and momentum K-bars occur
+    volume = np.floor(rng.uniform(100, 5000, n) * rng.choice([1, 3], n, p=[0.8, 0.2]))
+    index = pd.bdate_range("2024-01-01", periods=n)
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+        index=index,
+    )
+
+
+def make_enriched_universe():
+    frames = {f"{1000 + i}.TW": make_ohlcv(120, i) for i in range(40)}
+    # Shorter histories aligned on the same calendar tail
+    frames["2000.TW"] = make_ohlcv(120, 99).iloc[90:]
+    frames["2001.TW"] = make_ohlcv(120, 98).iloc[116:]
+    panel = build_ohlcv_panel_from_frames(frames)
+    return frames, calculate_panel_indicators(panel)
+
+
+def test_generate_trend_signals_panel_matches_single_ticker():
+    frames, enriched = make_enriched_universe()
+    table = trend_analysis.generate_trend_signals_panel(enriched)
+    assert list(table.index) == list(frames)
+    for ticker, frame in frames.items():
+        expected = trend_analysis.generate_trend_signals(
+            enrich_with_all_indicators(frame.copy())
+        )
+        row = table.loc[ticker]
+        for key, value in expected.items():
+            if isinstance(value, float):
+                np.testing.assert_allclose(row[key], value, rtol=1e-9, equal_nan=True)
+            else:
+                assert row[key] == value, (ticker, key)
+
+
+def test_trend_signal_flags_match_every_date():
+    frames, enriched = make_enriched_universe()
+    flags = trend_analysis.trend_signal_flags(enriched)
+    ticker = "1003.TW"
+    df = enrich_with_all_indicators(frames[ticker].copy())
+    for end in range(3, len(df) + 1, 7):
+        expected = trend_analysis.generate_trend_signals(df.iloc[:end])
+        date = df.index[end - 1]
+        for key in trend_analysis.BOOLEAN_SIGNALS + ["sustained_highs"]:
+            assert flags[key].at[date, ticker] == expected[key], (end, key)
+
+
+def test_generate_trend_signals_panel_marks_delisted_invalid():
+    frames, enriched = make_enriched_universe()
+    enriched = {name: frame.copy() for name, frame in enriched.items()}
+    for frame in enriched.values():
+        frame.iloc[-1, 0] = np.nan
+    table = trend_analysis.generate_trend_signals_panel(enriched)
+    assert table["signal_status"].iloc[0] == "invalid"
+    assert (table["signal_status"].iloc[1:] == "ok").all()
+
+
+def test_generate_trend_signals_panel_missing_columns():
+    table = trend_analysis.generate_trend_signals_panel(
+        {"close": pd.DataFrame({"A": [1.0]})}
+    )
+    assert table.loc["A", "signal_status"] == "invalid"
@@ -2,6 +2,7 @@ from unittest.mock import MagicMock, patch
 
 import pandas as pd
 
+from app.internal.analysis.panel_indicators import build_ohlcv_panel_from_frames
 from app.internal.yfinance import stock_data
 
 
@@ -65,3 +66,88 @@ def test_fetch_stock_info_exception():
         info = stock_data.fetch_stock_info("2330.TW")
         assert info["sector"] == "未知行業"
         assert info["industry"] == "未知產業"
+
+
+def make_bulk_frame(tickers, rows=2, missing=()):
+    index = pd.date_range("2024-01-01", periods=rows)
+    columns = pd.MultiIndex.from_product(
+        [tickers, ["Open", "High", "Low", "Close", "Volume"]]
+    )
+    values = [
+        [100 + r, 110 + r, 90 + r, 105 + r, 10000] * len(tickers) for r in range(rows)
+    ]
+    df = pd.DataFrame(values, index=index, columns=columns, dtype=float)
+    for ticker in missing:
+        df[ticker] = None
+    return df
+
+
+def test_fetch_kline_data_many_splits_tickers():
+    index = pd.date_range("2024-01-01", periods=2)
+    columns = pd.MultiIndex.from_product(
+        [["2330.TW", "2317.TW"], ["Open", "High", "Low", "Close", "Volume"]]
+    )
+    mock_df = pd.DataFrame(
+        [
+            [100, 110, 90, 105, 10000, 50, 55, 45, 52, 20000],
+            [106, 112, 101, 111, 12000, None, None, None, None, None],
+        ],
+        index=index,
+        columns=columns,
+    )
+    with patch("yfinance.download", return_value=mock_df):
+        batch = stock_data.fetch_kline_data_many(["2330.TW", "2317.TW", "9999.TW"])
+    assert set(batch.frames) == {"2330.TW", "2317.TW"}
+    assert batch.failures == {"9999.TW": "no data returned"}
+    frame = batch.frames["2330.TW"]
+    assert list(frame.columns) == ["open", "high", "low", "close", "volume"]
+    assert frame["volume"].iloc[1] == 12
+    # All-NaN rows for a ticker are dropped
+    assert len(batch.frames["2317.TW"]) == 1
+
+
+def test_fetch_kline_data_many_chunks_requests():
+    tickers = [f"{1000 + i}.TW" for i in range(5)]
+    calls = []
+
+    def fake_download(tickers, **kwargs):
+        calls.append(list(tickers))
+        return make_bulk_frame(
+            list(tickers), missing=[t for t in tickers if t == "1003.TW"]
+        )
+
+    with patch("yfinance.download", side_effect=fake_download):
+        batch = stock_data.fetch_kline_data_many(tickers + ["1000.TW"], chunk_size=2)
+    assert calls == [["1000.TW", "1001.TW"], ["1002.TW", "1003.TW"], ["1004.TW"]]
+    assert list(batch.frames) == ["1000.TW", "1001.TW", "1002.TW", "1004.TW"]
+    assert batch.failures == {"1003.TW": "no data returned"}
+
+
+def test_fetch_kline_data_many_reports_failed_chunk():
+    def fake_download(tickers, **kwargs):
+        if "1002.TW" in tickers:
+            raise Exception("API error")
+        return make_bulk_frame(list(tickers))
+
+    tickers = ["1000.TW", "1001.TW", "1002.TW", "1003.TW"]
+    with patch("yfinance.download", side_effect=fake_download):
+        batch = stock_data.fetch_kline_data_many(tickers, chunk_size=2)
+    assert list(batch.frames) == ["1000.TW", "1001.TW"]
+    assert set(batch.failures) == {"1002.TW", "1003.TW"}
+    assert batch.failures["1002.TW"] == "download failed: API error"
+
+
+def test_fetch_kline_data_many_frames_build_panel():
+    with patch("yfinance.download", return_value=make_bulk_frame(["A", "B"], rows=3)):
+        batch = stock_data.fetch_kline_data_many(["A", "B"])
+    panel = build_ohlcv_panel_from_frames(batch.frames)
+    assert list(panel["close"].columns) == ["A", "B"]
+    assert panel["close"].shape == (3, 2)
+    assert panel["volume"].iloc[0, 0] == 10
+
+
+def test_fetch_kline_data_many_exception():
+    with patch("yfinance.download", side_effect=Exception("API error")):
+        batch = stock_data.fetch_kline_data_many(["2330.TW", "2317.TW"])
+        assert batch.frames == {}
+        assert set(batch.failures) == {"2330.TW", "2317.TW"}